@@ -0,0 +1,74 @@
+"""add full-text search index over todo title and description
+
+Revision ID: 0002_todos_full_text_search
+Revises: 0001_todos_keyset_index
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002_todos_full_text_search'
+down_revision: Union[str, Sequence[str], None] = '0001_todos_keyset_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SQLITE_UPGRADE = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS todos_fts USING fts5(
+        title, description, content='todos', tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS todos_fts_ai AFTER INSERT ON todos BEGIN
+        INSERT INTO todos_fts(rowid, title, description) VALUES (new.rowid, new.title, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS todos_fts_ad AFTER DELETE ON todos BEGIN
+        INSERT INTO todos_fts(todos_fts, rowid, title, description)
+        VALUES ('delete', old.rowid, old.title, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS todos_fts_au AFTER UPDATE OF title, description ON todos BEGIN
+        INSERT INTO todos_fts(todos_fts, rowid, title, description)
+        VALUES ('delete', old.rowid, old.title, old.description);
+        INSERT INTO todos_fts(rowid, title, description) VALUES (new.rowid, new.title, new.description);
+    END""",
+    # Index the todos that already exist
+    "INSERT INTO todos_fts(todos_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS todos_fts_au",
+    "DROP TRIGGER IF EXISTS todos_fts_ad",
+    "DROP TRIGGER IF EXISTS todos_fts_ai",
+    "DROP TABLE IF EXISTS todos_fts",
+]
+
+POSTGRES_UPGRADE = [
+    """ALTER TABLE todos ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_todos_search_vector ON todos USING GIN (search_vector)",
+]
+
+POSTGRES_DOWNGRADE = [
+    "DROP INDEX IF EXISTS ix_todos_search_vector",
+    "ALTER TABLE todos DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def _run(statements_by_dialect) -> None:
+    for statement in statements_by_dialect.get(op.get_bind().dialect.name, []):
+        op.execute(statement)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _run({"sqlite": SQLITE_UPGRADE, "postgresql": POSTGRES_UPGRADE})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _run({"sqlite": SQLITE_DOWNGRADE, "postgresql": POSTGRES_DOWNGRADE})
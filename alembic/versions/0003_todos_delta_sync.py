@@ -0,0 +1,48 @@
+"""add delta sync index and todo tombstones
+
+Revision ID: 0003_todos_delta_sync
+Revises: 0002_todos_full_text_search
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003_todos_delta_sync'
+down_revision: Union[str, Sequence[str], None] = '0002_todos_full_text_search'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _uuid_type():
+    if op.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import UUID
+        return UUID(as_uuid=True)
+    return sa.String(36)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_todos_user_updated_id", "todos", ["user_id", "updated_at", "id"])
+    op.create_table(
+        "todo_tombstones",
+        sa.Column("todo_id", _uuid_type(), primary_key=True),
+        sa.Column("user_id", _uuid_type(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index(
+        "ix_todo_tombstones_user_deleted_id",
+        "todo_tombstones",
+        ["user_id", "deleted_at", "todo_id"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_todo_tombstones_user_deleted_id", table_name="todo_tombstones")
+    op.drop_table("todo_tombstones")
+    op.drop_index("ix_todos_user_updated_id", table_name="todos")
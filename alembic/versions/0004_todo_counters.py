@@ -0,0 +1,132 @@
+"""add per-user todo counters maintained by triggers
+
+Revision ID: 0004_todo_counters
+Revises: 0003_todos_delta_sync
+Create Date: 2026-10-17 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004_todo_counters'
+down_revision: Union[str, Sequence[str], None] = '0003_todos_delta_sync'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SQLITE_UPGRADE = [
+    """CREATE TRIGGER IF NOT EXISTS todo_counters_ai AFTER INSERT ON todos BEGIN
+        INSERT INTO todo_counters(user_id, total, completed) VALUES (new.user_id, 1, new.completed)
+        ON CONFLICT(user_id) DO UPDATE SET total = total + 1, completed = completed + excluded.completed;
+        INSERT INTO todo_daily_counters(user_id, day, created, completed)
+        VALUES (new.user_id, date(new.created_at), 1, new.completed)
+        ON CONFLICT(user_id, day) DO UPDATE SET created = created + 1, completed = completed + excluded.completed;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS todo_counters_ad AFTER DELETE ON todos BEGIN
+        UPDATE todo_counters SET total = total - 1, completed = completed - old.completed
+        WHERE user_id = old.user_id;
+        UPDATE todo_daily_counters SET created = created - 1, completed = completed - old.completed
+        WHERE user_id = old.user_id AND day = date(old.created_at);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS todo_counters_au AFTER UPDATE OF completed ON todos
+    WHEN old.completed IS NOT new.completed BEGIN
+        UPDATE todo_counters SET completed = completed + new.completed - old.completed
+        WHERE user_id = new.user_id;
+        UPDATE todo_daily_counters SET completed = completed + new.completed - old.completed
+        WHERE user_id = new.user_id AND day = date(new.created_at);
+    END""",
+    # Count the todos that already exist
+    """INSERT INTO todo_counters(user_id, total, completed)
+    SELECT user_id, count(*), sum(completed) FROM todos GROUP BY user_id""",
+    """INSERT INTO todo_daily_counters(user_id, day, created, completed)
+    SELECT user_id, date(created_at), count(*), sum(completed) FROM todos GROUP BY user_id, date(created_at)""",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS todo_counters_au",
+    "DROP TRIGGER IF EXISTS todo_counters_ad",
+    "DROP TRIGGER IF EXISTS todo_counters_ai",
+]
+
+POSTGRES_UPGRADE = [
+    """CREATE OR REPLACE FUNCTION todo_counters_update() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO todo_counters(user_id, total, completed) VALUES (NEW.user_id, 1, NEW.completed::int)
+            ON CONFLICT (user_id) DO UPDATE
+            SET total = todo_counters.total + 1, completed = todo_counters.completed + EXCLUDED.completed;
+            INSERT INTO todo_daily_counters(user_id, day, created, completed)
+            VALUES (NEW.user_id, NEW.created_at::date, 1, NEW.completed::int)
+            ON CONFLICT (user_id, day) DO UPDATE
+            SET created = todo_daily_counters.created + 1,
+                completed = todo_daily_counters.completed + EXCLUDED.completed;
+        ELSIF TG_OP = 'DELETE' THEN
+            UPDATE todo_counters SET total = total - 1, completed = completed - OLD.completed::int
+            WHERE user_id = OLD.user_id;
+            UPDATE todo_daily_counters SET created = created - 1, completed = completed - OLD.completed::int
+            WHERE user_id = OLD.user_id AND day = OLD.created_at::date;
+        ELSIF OLD.completed IS DISTINCT FROM NEW.completed THEN
+            UPDATE todo_counters SET completed = completed + NEW.completed::int - OLD.completed::int
+            WHERE user_id = NEW.user_id;
+            UPDATE todo_daily_counters SET completed = completed + NEW.completed::int - OLD.completed::int
+            WHERE user_id = NEW.user_id AND day = NEW.created_at::date;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql""",
+    # Lock out writers while counting, or a todo written meanwhile is counted twice or never
+    "LOCK TABLE todos IN SHARE MODE",
+    """CREATE TRIGGER todo_counters AFTER INSERT OR DELETE OR UPDATE OF completed ON todos
+    FOR EACH ROW EXECUTE FUNCTION todo_counters_update()""",
+    """INSERT INTO todo_counters(user_id, total, completed)
+    SELECT user_id, count(*), count(*) FILTER (WHERE completed) FROM todos GROUP BY user_id""",
+    """INSERT INTO todo_daily_counters(user_id, day, created, completed)
+    SELECT user_id, created_at::date, count(*), count(*) FILTER (WHERE completed)
+    FROM todos GROUP BY user_id, created_at::date""",
+]
+
+POSTGRES_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS todo_counters ON todos",
+    "DROP FUNCTION IF EXISTS todo_counters_update()",
+]
+
+
+def _uuid_type():
+    if op.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import UUID
+        return UUID(as_uuid=True)
+    return sa.String(36)
+
+
+def _run(statements_by_dialect) -> None:
+    for statement in statements_by_dialect.get(op.get_bind().dialect.name, []):
+        op.execute(statement)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "todo_counters",
+        sa.Column("user_id", _uuid_type(), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("total", sa.Integer(), nullable=False),
+        sa.Column("completed", sa.Integer(), nullable=False),
+    )
+    op.create_table(
+        "todo_daily_counters",
+        sa.Column("user_id", _uuid_type(), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("created", sa.Integer(), nullable=False),
+        sa.Column("completed", sa.Integer(), nullable=False),
+    )
+    _run({"sqlite": SQLITE_UPGRADE, "postgresql": POSTGRES_UPGRADE})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _run({"sqlite": SQLITE_DOWNGRADE, "postgresql": POSTGRES_DOWNGRADE})
+    op.drop_table("todo_daily_counters")
+    op.drop_table("todo_counters")
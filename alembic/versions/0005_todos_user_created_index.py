@@ -0,0 +1,30 @@
+"""add index serving the unfiltered todo listing order
+
+Revision ID: 0005_todos_user_created_index
+Revises: 0004_todo_counters
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005_todos_user_created_index'
+down_revision: Union[str, Sequence[str], None] = '0004_todo_counters'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # (user_id, completed, created_at, id) only orders rows within one
+    # completion status; without a filter every page sorted all the user's rows
+    op.create_index("ix_todos_user_created_id", "todos", ["user_id", "created_at", "id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_todos_user_created_id", table_name="todos")
@@ -0,0 +1,122 @@
+"""version todo collections from the counters row
+
+Revision ID: 0006_todo_counters_last_modified
+Revises: 0005_todos_user_created_index
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006_todo_counters_last_modified'
+down_revision: Union[str, Sequence[str], None] = '0005_todos_user_created_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BACKFILL = """UPDATE todo_counters SET last_modified = (
+    SELECT max(updated_at) FROM todos WHERE todos.user_id = todo_counters.user_id
+)"""
+
+SQLITE_UPGRADE = [
+    "DROP TRIGGER IF EXISTS todo_counters_ai",
+    """CREATE TRIGGER todo_counters_ai AFTER INSERT ON todos BEGIN
+        INSERT INTO todo_counters(user_id, total, completed, last_modified)
+        VALUES (new.user_id, 1, new.completed, new.updated_at)
+        ON CONFLICT(user_id) DO UPDATE SET total = total + 1, completed = completed + excluded.completed,
+        last_modified = max(coalesce(last_modified, excluded.last_modified), excluded.last_modified);
+        INSERT INTO todo_daily_counters(user_id, day, created, completed)
+        VALUES (new.user_id, date(new.created_at), 1, new.completed)
+        ON CONFLICT(user_id, day) DO UPDATE SET created = created + 1, completed = completed + excluded.completed;
+    END""",
+    """CREATE TRIGGER todo_counters_au_modified AFTER UPDATE OF updated_at ON todos BEGIN
+        UPDATE todo_counters SET last_modified = max(coalesce(last_modified, new.updated_at), new.updated_at)
+        WHERE user_id = new.user_id;
+    END""",
+    BACKFILL,
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS todo_counters_au_modified",
+    "DROP TRIGGER IF EXISTS todo_counters_ai",
+    """CREATE TRIGGER todo_counters_ai AFTER INSERT ON todos BEGIN
+        INSERT INTO todo_counters(user_id, total, completed) VALUES (new.user_id, 1, new.completed)
+        ON CONFLICT(user_id) DO UPDATE SET total = total + 1, completed = completed + excluded.completed;
+        INSERT INTO todo_daily_counters(user_id, day, created, completed)
+        VALUES (new.user_id, date(new.created_at), 1, new.completed)
+        ON CONFLICT(user_id, day) DO UPDATE SET created = created + 1, completed = completed + excluded.completed;
+    END""",
+]
+
+POSTGRES_FUNCTION = """CREATE OR REPLACE FUNCTION todo_counters_update() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO todo_counters(user_id, total, completed{last_modified_column})
+            VALUES (NEW.user_id, 1, NEW.completed::int{last_modified_value})
+            ON CONFLICT (user_id) DO UPDATE
+            SET total = todo_counters.total + 1, completed = todo_counters.completed + EXCLUDED.completed{last_modified_set};
+            INSERT INTO todo_daily_counters(user_id, day, created, completed)
+            VALUES (NEW.user_id, NEW.created_at::date, 1, NEW.completed::int)
+            ON CONFLICT (user_id, day) DO UPDATE
+            SET created = todo_daily_counters.created + 1,
+                completed = todo_daily_counters.completed + EXCLUDED.completed;
+        ELSIF TG_OP = 'DELETE' THEN
+            UPDATE todo_counters SET total = total - 1, completed = completed - OLD.completed::int
+            WHERE user_id = OLD.user_id;
+            UPDATE todo_daily_counters SET created = created - 1, completed = completed - OLD.completed::int
+            WHERE user_id = OLD.user_id AND day = OLD.created_at::date;
+        ELSE
+            UPDATE todo_counters SET completed = completed + NEW.completed::int - OLD.completed::int{last_modified_touch}
+            WHERE user_id = NEW.user_id;
+            IF OLD.completed IS DISTINCT FROM NEW.completed THEN
+                UPDATE todo_daily_counters SET completed = completed + NEW.completed::int - OLD.completed::int
+                WHERE user_id = NEW.user_id AND day = NEW.created_at::date;
+            END IF;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql"""
+
+POSTGRES_UPGRADE = [
+    POSTGRES_FUNCTION.format(
+        last_modified_column=", last_modified",
+        last_modified_value=", NEW.updated_at",
+        last_modified_set=",\n                last_modified = GREATEST(todo_counters.last_modified, EXCLUDED.last_modified)",
+        last_modified_touch=",\n                last_modified = GREATEST(last_modified, NEW.updated_at)",
+    ),
+    # Lock out writers while backfilling, or a write meanwhile could be missed
+    "LOCK TABLE todos IN SHARE MODE",
+    "DROP TRIGGER IF EXISTS todo_counters ON todos",
+    """CREATE TRIGGER todo_counters AFTER INSERT OR DELETE OR UPDATE OF completed, updated_at ON todos
+    FOR EACH ROW EXECUTE FUNCTION todo_counters_update()""",
+    BACKFILL,
+]
+
+POSTGRES_DOWNGRADE = [
+    POSTGRES_FUNCTION.format(last_modified_column="", last_modified_value="", last_modified_set="",
+                             last_modified_touch=""),
+    "DROP TRIGGER IF EXISTS todo_counters ON todos",
+    """CREATE TRIGGER todo_counters AFTER INSERT OR DELETE OR UPDATE OF completed ON todos
+    FOR EACH ROW EXECUTE FUNCTION todo_counters_update()""",
+]
+
+
+def _run(statements_by_dialect) -> None:
+    for statement in statements_by_dialect.get(op.get_bind().dialect.name, []):
+        op.execute(statement)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("todo_counters", sa.Column("last_modified", sa.DateTime(), nullable=True))
+    _run({"sqlite": SQLITE_UPGRADE, "postgresql": POSTGRES_UPGRADE})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _run({"sqlite": SQLITE_DOWNGRADE, "postgresql": POSTGRES_DOWNGRADE})
+    op.drop_column("todo_counters", "last_modified")
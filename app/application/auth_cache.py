@@ -0,0 +1,34 @@
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+
+from ..domain.entities import User
+from ..ttl_cache import TTLCache
+
+
+class AuthCache:
+    """Process-wide cache of verified tokens and the users they resolve to.
+
+    Shared between the per-request `AuthService` instances so that repeated
+    calls with the same bearer token skip both JWT verification and the user
+    lookup until the entry expires or the user is invalidated.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 60.0):
+        # token -> (user id, jti)
+        self.tokens: TTLCache[Tuple[UUID, Optional[str]]] = TTLCache(max_size=max_size, ttl=ttl)
+        self.users: TTLCache[User] = TTLCache(max_size=max_size, ttl=ttl)
+
+    def invalidate_user(self, user_id: UUID) -> None:
+        """Drop a cached user, e.g. after it was deactivated or changed.
+
+        Tokens are left in place: they only map to a user id, so the next
+        request re-reads the user from the repository.
+        """
+        self.users.invalidate(user_id)
+
+    def clear(self) -> None:
+        self.tokens.clear()
+        self.users.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"tokens": self.tokens.stats(), "users": self.users.stats()}
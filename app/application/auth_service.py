@@ -1,27 +1,43 @@
+import time
 from datetime import datetime, timedelta
 from typing import Optional
-from uuid import UUID
-
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from uuid import UUID, uuid4
 
+from .auth_cache import AuthCache
+from .jwt_codec import JWTCodec
+from .password_hasher import PasswordHasher
+from .token_denylist import TokenDenylist
 from ..domain.entities import User
 from ..domain.repositories import UserRepository
 from ..domain.exceptions import UserAlreadyExistsError, InvalidCredentialsError
 
 
 class AuthService:
-    def __init__(self, user_repository: UserRepository, secret_key: str, algorithm: str = "HS256"):
+    def __init__(
+        self,
+        user_repository: UserRepository,
+        secret_key: str,
+        algorithm: str = "HS256",
+        cache: Optional[AuthCache] = None,
+        trust_token_claims: bool = False,
+        password_hasher: Optional[PasswordHasher] = None,
+        jwt_codec: Optional[JWTCodec] = None,
+        denylist: Optional[TokenDenylist] = None,
+    ):
         self.user_repository = user_repository
         self.secret_key = secret_key
         self.algorithm = algorithm
-        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        self.cache = cache
+        self.trust_token_claims = trust_token_claims
+        self.password_hasher = password_hasher or PasswordHasher(executor="inline")
+        self.jwt_codec = jwt_codec or JWTCodec(secret_key, algorithm)
+        self.denylist = denylist
 
-    def verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        return self.pwd_context.verify(plain_password, hashed_password)
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.password_hasher.verify(plain_password, hashed_password)
 
-    def get_password_hash(self, password: str) -> str:
-        return self.pwd_context.hash(password)
+    async def get_password_hash(self, password: str) -> str:
+        return await self.password_hasher.hash(password)
 
     def create_access_token(self, data: dict, expires_delta: Optional[timedelta] = None):
         to_encode = data.copy()
@@ -30,8 +46,28 @@ class AuthService:
         else:
             expire = datetime.utcnow() + timedelta(minutes=15)
         to_encode.update({"exp": expire})
-        encoded_jwt = jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
-        return encoded_jwt
+        to_encode.setdefault("jti", uuid4().hex)
+        return self.jwt_codec.encode(to_encode)
+
+    def create_refresh_token(self, user_id: UUID, expires_delta: timedelta) -> str:
+        """A token that can only be exchanged, once, for a new access and refresh token."""
+        return self.jwt_codec.encode({
+            "sub": str(user_id),
+            "type": "refresh",
+            "jti": uuid4().hex,
+            "exp": datetime.utcnow() + expires_delta,
+        })
+
+    @staticmethod
+    def user_claims(user: User) -> dict:
+        """Claims embedded in access tokens so the user can be rebuilt without a DB lookup."""
+        return {
+            "sub": str(user.id),
+            "email": user.email,
+            "username": user.username,
+            "is_active": user.is_active,
+            "created_at": user.created_at.isoformat(),
+        }
 
     async def register_user(self, email: str, username: str, password: str) -> User:
         # Check if user already exists
@@ -40,7 +76,7 @@ class AuthService:
             raise UserAlreadyExistsError("User with this email already exists")
 
         # Hash password and create user
-        hashed_password = self.get_password_hash(password)
+        hashed_password = await self.get_password_hash(password)
         user = User(
             email=email,
             username=username,
@@ -51,20 +87,100 @@ class AuthService:
 
     async def authenticate_user(self, email: str, password: str) -> User:
         user = await self.user_repository.get_user_by_email(email)
-        if not user or not self.verify_password(password, user.hashed_password):
+        if not user or not await self.verify_password(password, user.hashed_password):
             raise InvalidCredentialsError("Invalid email or password")
         return user
 
-    async def get_current_user(self, token: str) -> User:
+    def invalidate_user(self, user_id: UUID) -> None:
+        if self.cache is not None:
+            self.cache.invalidate_user(user_id)
+
+    def _decode_token(self, token: str, token_type: str = "access") -> dict:
+        payload = self.jwt_codec.decode(token)
+        if payload.get("type", "access") != token_type or payload.get("sub") is None:
+            raise InvalidCredentialsError("Could not validate credentials")
         try:
-            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
-            user_id: str = payload.get("sub")
-            if user_id is None:
-                raise InvalidCredentialsError("Could not validate credentials")
-        except JWTError:
+            payload["sub"] = UUID(payload["sub"])
+        except (TypeError, ValueError):
             raise InvalidCredentialsError("Could not validate credentials")
+        return payload
 
-        user = await self.user_repository.get_user_by_id(UUID(user_id))
-        if user is None:
+    def _user_from_claims(self, payload: dict) -> Optional[User]:
+        if "email" not in payload or "username" not in payload:
+            return None
+        # These claims were validated when the user was stored and are signed
+        # by us; validating the email again would cost more than the signature
+        created_at = payload.get("created_at")
+        return User.model_construct(
+            id=payload["sub"],
+            email=payload["email"],
+            username=payload["username"],
+            hashed_password="",
+            is_active=bool(payload.get("is_active", True)),
+            created_at=datetime.fromisoformat(created_at) if created_at else datetime.utcnow(),
+        )
+
+    def _raise_if_revoked(self, jti: Optional[str]) -> None:
+        if jti is not None and self.denylist is not None and self.denylist.is_revoked(jti):
             raise InvalidCredentialsError("Could not validate credentials")
+
+    async def _get_user(self, user_id: UUID) -> User:
+        user = self.cache.users.get(user_id) if self.cache is not None else None
+        if user is None:
+            user = await self.user_repository.get_user_by_id(user_id)
+            if user is None:
+                raise InvalidCredentialsError("Could not validate credentials")
+            if self.cache is not None:
+                self.cache.users.set(user_id, user)
         return user
+
+    async def get_current_user(self, token: str) -> User:
+        cached = self.cache.tokens.get(token) if self.cache is not None else None
+        if cached is None:
+            payload = self._decode_token(token)
+            user_id, jti = payload["sub"], payload.get("jti")
+            self._raise_if_revoked(jti)
+
+            if self.trust_token_claims:
+                user = self._user_from_claims(payload)
+                if user is not None:
+                    return user
+
+            if self.cache is not None:
+                self.cache.tokens.set(token, (user_id, jti), ttl=payload.get("exp", 0) - time.time())
+        else:
+            # Revocation is checked on every request, cached token or not
+            user_id, jti = cached
+            self._raise_if_revoked(jti)
+
+        return await self._get_user(user_id)
+
+    async def _revoke(self, payload: dict) -> None:
+        if self.denylist is not None and payload.get("jti"):
+            await self.denylist.revoke(payload["jti"], float(payload.get("exp", 0)))
+
+    async def refresh(self, refresh_token: str) -> User:
+        """Spend a refresh token and return its user, who gets a new pair.
+
+        Each refresh token works once: presenting it again, as a thief
+        replaying a stolen copy would, fails.
+        """
+        payload = self._decode_token(refresh_token, token_type="refresh")
+        self._raise_if_revoked(payload.get("jti"))
+        # Nothing is awaited between the check and the local revocation, so
+        # a concurrent replay in this worker fails too
+        await self._revoke(payload)
+        return await self._get_user(payload["sub"])
+
+    async def logout(self, access_token: str, refresh_token: Optional[str] = None) -> None:
+        """Revoke the access token and, when given, the refresh token issued with it."""
+        payloads = [self._decode_token(access_token)]
+        if refresh_token is not None:
+            refresh_payload = self._decode_token(refresh_token, token_type="refresh")
+            if refresh_payload["sub"] != payloads[0]["sub"]:
+                raise InvalidCredentialsError("Could not validate credentials")
+            payloads.append(refresh_payload)
+        if self.cache is not None:
+            self.cache.tokens.invalidate(access_token)
+        for payload in payloads:
+            await self._revoke(payload)
@@ -0,0 +1,249 @@
+import base64
+import binascii
+import calendar
+import hashlib
+import hmac
+import json
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from .. import metrics
+from ..domain.exceptions import InvalidCredentialsError
+
+HMAC_ALGORITHMS = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+ASYMMETRIC_ALGORITHMS = ("RS256", "EdDSA")
+# Registered claims that are NumericDate: seconds since the epoch, not datetimes
+NUMERIC_DATE_CLAIMS = ("exp", "iat", "nbf")
+
+
+def b64url_encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def b64url_decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+class JWTKey(ABC):
+    """One key of one algorithm, parsed once and reused for every token.
+
+    Asymmetric keys are built from PEM on first use, so `cryptography` is
+    only imported by deployments that sign with it.
+    """
+
+    algorithm: str
+    kid: Optional[str] = None
+
+    @abstractmethod
+    def sign(self, message: bytes) -> bytes:
+        pass
+
+    @abstractmethod
+    def verify(self, message: bytes, signature: bytes) -> bool:
+        pass
+
+    def public_jwk(self) -> Optional[Dict[str, str]]:
+        """The key as published in the JWKS; None for shared secrets."""
+        return None
+
+
+class HMACKey(JWTKey):
+    def __init__(self, secret: str, algorithm: str = "HS256", kid: Optional[str] = None):
+        if algorithm not in HMAC_ALGORITHMS:
+            raise ValueError(f"Unsupported HMAC algorithm: {algorithm}")
+        self.secret = secret.encode()
+        self.algorithm = algorithm
+        self.kid = kid
+        self._digest = HMAC_ALGORITHMS[algorithm]
+
+    def sign(self, message: bytes) -> bytes:
+        return hmac.new(self.secret, message, self._digest).digest()
+
+    def verify(self, message: bytes, signature: bytes) -> bool:
+        return hmac.compare_digest(self.sign(message), signature)
+
+
+class AsymmetricKey(JWTKey):
+    """An RS256 or EdDSA (Ed25519) key from PEM: private signs, public only verifies.
+
+    Without an explicit `kid`, the key is named by its RFC 7638 thumbprint,
+    so every worker derives the same id from the same key file.
+    """
+
+    def __init__(self, pem: bytes, algorithm: str, kid: Optional[str] = None):
+        if algorithm not in ASYMMETRIC_ALGORITHMS:
+            raise ValueError(f"Unsupported asymmetric algorithm: {algorithm}")
+        self.pem = pem
+        self.algorithm = algorithm
+        self._kid = kid
+        self._private = None
+        self._public = None
+
+    def _load(self):
+        if self._public is not None:
+            return
+        try:
+            from cryptography.exceptions import InvalidSignature
+            from cryptography.hazmat.primitives import hashes, serialization
+            from cryptography.hazmat.primitives.asymmetric import ed25519, padding, rsa
+        except ImportError:
+            raise RuntimeError(f"{self.algorithm} tokens require the 'cryptography' package")
+        self._invalid_signature = InvalidSignature
+        # RS256 signs and verifies with these; EdDSA takes no parameters
+        self._rsa_args = (padding.PKCS1v15(), hashes.SHA256()) if self.algorithm == "RS256" else ()
+        if b"PRIVATE KEY" in self.pem:
+            self._private = serialization.load_pem_private_key(self.pem, password=None)
+            self._public = self._private.public_key()
+        else:
+            self._public = serialization.load_pem_public_key(self.pem)
+        expected = rsa.RSAPublicKey if self.algorithm == "RS256" else ed25519.Ed25519PublicKey
+        if not isinstance(self._public, expected):
+            raise ValueError(f"The key is not a {self.algorithm} key")
+
+    @property
+    def kid(self) -> str:
+        if self._kid is None:
+            jwk = self.public_jwk(with_kid=False)
+            canonical = json.dumps(jwk, sort_keys=True, separators=(",", ":")).encode()
+            self._kid = b64url_encode(hashlib.sha256(canonical).digest())
+        return self._kid
+
+    def sign(self, message: bytes) -> bytes:
+        self._load()
+        if self._private is None:
+            raise RuntimeError(f"Key {self.kid} is a public key and can only verify")
+        return self._private.sign(message, *self._rsa_args)
+
+    def verify(self, message: bytes, signature: bytes) -> bool:
+        self._load()
+        try:
+            self._public.verify(signature, message, *self._rsa_args)
+        except self._invalid_signature:
+            return False
+        return True
+
+    def public_pem(self) -> bytes:
+        self._load()
+        from cryptography.hazmat.primitives import serialization
+        return self._public.public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+
+    def public_jwk(self, with_kid: bool = True) -> Dict[str, str]:
+        self._load()
+        if self.algorithm == "EdDSA":
+            from cryptography.hazmat.primitives import serialization
+            raw = self._public.public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+            jwk = {"crv": "Ed25519", "kty": "OKP", "x": b64url_encode(raw)}
+        else:
+            numbers = self._public.public_numbers()
+            jwk = {
+                "e": b64url_encode(numbers.e.to_bytes((numbers.e.bit_length() + 7) // 8, "big")),
+                "kty": "RSA",
+                "n": b64url_encode(numbers.n.to_bytes((numbers.n.bit_length() + 7) // 8, "big")),
+            }
+        if with_kid:
+            jwk.update(kid=self.kid, alg=self.algorithm, use="sig")
+        return jwk
+
+
+def load_key(algorithm: str, secret_or_pem: Any, kid: Optional[str] = None) -> JWTKey:
+    """A key for `algorithm`: a shared secret for HS*, PEM (str or bytes) for RS256/EdDSA."""
+    if algorithm in HMAC_ALGORITHMS:
+        return HMACKey(secret_or_pem, algorithm, kid=kid)
+    pem = secret_or_pem.encode() if isinstance(secret_or_pem, str) else secret_or_pem
+    return AsymmetricKey(pem, algorithm, kid=kid)
+
+
+def generate_key_pem(algorithm: str) -> bytes:
+    """A new PKCS#8 PEM private key for RS256 (2048-bit RSA) or EdDSA (Ed25519)."""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+
+    if algorithm == "EdDSA":
+        private_key = ed25519.Ed25519PrivateKey.generate()
+    elif algorithm == "RS256":
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    else:
+        raise ValueError(f"Unsupported asymmetric algorithm: {algorithm}")
+    return private_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+
+
+def read_key_file(path: str, algorithm: str, kid: Optional[str] = None) -> JWTKey:
+    with open(path, "rb") as key_file:
+        return load_key(algorithm, key_file.read(), kid=kid)
+
+
+class JWTCodec:
+    """Signs tokens with one key and verifies them against that key and older ones.
+
+    The header names the key (`kid`) and algorithm; a token is only checked
+    against the key it names, and only with that key's own algorithm. Keys
+    listed in `verification_keys` keep tokens signed before a rotation
+    valid until they expire. Stateless once built, so one instance is
+    shared by every request of a worker.
+    """
+
+    def __init__(self, signing_key: Any, algorithm: str = "HS256",
+                 verification_keys: Iterable[JWTKey] = ()):
+        if not isinstance(signing_key, JWTKey):
+            signing_key = load_key(algorithm, signing_key)
+        self.signing_key = signing_key
+        self.algorithm = signing_key.algorithm
+        self._verification_keys = [signing_key, *verification_keys]
+        self._keys: Optional[Dict[Optional[str], JWTKey]] = None
+        self._header: Optional[str] = None
+
+    @property
+    def keys(self) -> Dict[Optional[str], JWTKey]:
+        if self._keys is None:
+            self._keys = {key.kid: key for key in reversed(self._verification_keys)}
+        return self._keys
+
+    def jwks(self) -> Dict[str, List[Dict[str, str]]]:
+        """Public keys for gateways that verify tokens themselves."""
+        return {"keys": [jwk for jwk in (key.public_jwk() for key in self.keys.values()) if jwk]}
+
+    def encode(self, claims: Dict[str, Any]) -> str:
+        if self._header is None:
+            header = {"alg": self.algorithm, "typ": "JWT"}
+            if self.signing_key.kid is not None:
+                header["kid"] = self.signing_key.kid
+            self._header = b64url_encode(json.dumps(header, separators=(",", ":")).encode())
+        claims = dict(claims)
+        for name in NUMERIC_DATE_CLAIMS:
+            if isinstance(claims.get(name), datetime):
+                claims[name] = calendar.timegm(claims[name].utctimetuple())
+        payload = b64url_encode(json.dumps(claims, separators=(",", ":")).encode())
+        signing_input = f"{self._header}.{payload}"
+        return f"{signing_input}.{b64url_encode(self.signing_key.sign(signing_input.encode()))}"
+
+    def decode(self, token: str) -> Dict[str, Any]:
+        with metrics.timed("jwt"):
+            try:
+                header_segment, payload_segment, signature_segment = token.split(".")
+                header = json.loads(b64url_decode(header_segment))
+                key = self.keys.get(header.get("kid"))
+                if key is None or header.get("alg") != key.algorithm:
+                    raise InvalidCredentialsError("Could not validate credentials")
+                signing_input = f"{header_segment}.{payload_segment}".encode()
+                if not key.verify(signing_input, b64url_decode(signature_segment)):
+                    raise InvalidCredentialsError("Could not validate credentials")
+                payload = json.loads(b64url_decode(payload_segment))
+            except (ValueError, TypeError, AttributeError, binascii.Error):
+                raise InvalidCredentialsError("Could not validate credentials")
+        if not isinstance(payload, dict):
+            raise InvalidCredentialsError("Could not validate credentials")
+        now = time.time()
+        try:
+            if "exp" in payload and float(payload["exp"]) <= now:
+                raise InvalidCredentialsError("Token has expired")
+            if "nbf" in payload and float(payload["nbf"]) > now:
+                raise InvalidCredentialsError("Token is not valid yet")
+        except (TypeError, ValueError):
+            raise InvalidCredentialsError("Could not validate credentials")
+        return payload
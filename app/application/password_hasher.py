@@ -0,0 +1,101 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+from .. import metrics
+from ..domain.exceptions import ServiceBusyError
+
+_pwd_context = None
+
+
+def _get_pwd_context():
+    # passlib and the bcrypt backend load on the first hash rather than at
+    # import; process pool workers build their own context the same way
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return _pwd_context
+
+
+def hash_password(password: str) -> str:
+    return _get_pwd_context().hash(password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return _get_pwd_context().verify(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """Runs bcrypt off the event loop on a bounded worker pool.
+
+    At most `max_workers + max_pending` hashes are handed to the pool at
+    once; further callers wait for a slot, or get `ServiceBusyError` when
+    `reject_when_busy` is set. The `inline` executor hashes on the calling
+    thread and exists for comparison and tests.
+    """
+
+    EXECUTORS = ("thread", "process", "inline")
+
+    def __init__(
+        self,
+        executor: str = "thread",
+        max_workers: Optional[int] = None,
+        max_pending: int = 64,
+        reject_when_busy: bool = False,
+    ):
+        if executor not in self.EXECUTORS:
+            raise ValueError(f"Unknown password hash executor: {executor}")
+        self.executor = executor
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.reject_when_busy = reject_when_busy
+        self.rejected = 0
+        self._pool: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def _get_pool(self) -> Executor:
+        # Created on first use so process pools fork after the app has started
+        if self._pool is None:
+            if self.executor == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="password-hasher"
+                )
+        return self._pool
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers + self.max_pending)
+        return self._slots
+
+    async def _run(self, func, *args):
+        with metrics.timed("password_hash"):
+            return await self._submit(func, *args)
+
+    async def _submit(self, func, *args):
+        if self.executor == "inline":
+            return func(*args)
+
+        slots = self._get_slots()
+        if self.reject_when_busy and slots.locked():
+            self.rejected += 1
+            raise ServiceBusyError("Too many password operations in progress, retry later")
+
+        async with slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_pool(), functools.partial(func, *args))
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
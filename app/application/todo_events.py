@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, List, Optional, Set
+from uuid import UUID
+
+from ..domain.entities import TodoEvent
+from ..ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class EventBackend(ABC):
+    """Carries events between workers so each can fan them out to its own clients."""
+
+    @abstractmethod
+    async def publish(self, message: bytes) -> None:
+        pass
+
+    @abstractmethod
+    def listen(self) -> AsyncIterator[bytes]:
+        """Every message published by any worker, this one included."""
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+class Subscription:
+    """One client's view of a user's events.
+
+    The queue is bounded: a client that falls too far behind is cut off
+    with a `None` and has to reconnect, resuming from its last event id.
+    """
+
+    def __init__(self, user_id: UUID, max_queued: int):
+        self.user_id = user_id
+        self.queue: "asyncio.Queue[Optional[TodoEvent]]" = asyncio.Queue(maxsize=max_queued)
+
+    def deliver(self, event: TodoEvent) -> bool:
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+            return False
+
+    async def get(self) -> Optional[TodoEvent]:
+        return await self.queue.get()
+
+
+class TodoEventBroker:
+    """Publish/subscribe for todo changes, one topic per user.
+
+    Events are delivered to this worker's subscribers immediately and, with
+    a backend, sent to the other workers too. The last `buffer_size` events
+    of each of the `max_users` most recently active users are kept so a
+    reconnecting client can resume after the last id it saw.
+    """
+
+    def __init__(self, backend: Optional[EventBackend] = None, buffer_size: int = 100,
+                 max_users: int = 10000, buffer_ttl: float = 3600.0, max_queued: int = 1000):
+        self.backend = backend
+        self.buffer_size = buffer_size
+        self.max_queued = max_queued
+        self.origin = uuid.uuid4().hex
+        self._buffers: TTLCache[Deque[TodoEvent]] = TTLCache(max_size=max_users, ttl=buffer_ttl)
+        self._subscribers: Dict[UUID, Set[Subscription]] = {}
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self.backend is not None and self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self.backend is not None:
+            await self.backend.close()
+
+    async def publish(self, events: List[TodoEvent]) -> None:
+        """Deliver events locally and hand them to the backend.
+
+        Never raises: the change itself is already committed, and failing
+        the request over its notification would be worse than a missed push.
+        """
+        for event in events:
+            self._dispatch(event)
+        if self.backend is None:
+            return
+        for event in events:
+            try:
+                await self.backend.publish(self.origin.encode() + b" " + event.model_dump_json().encode())
+            except Exception:
+                logger.warning("Could not publish todo event %s", event.id, exc_info=True)
+
+    def _dispatch(self, event: TodoEvent) -> None:
+        buffer = self._buffers.get(event.user_id)
+        if buffer is None:
+            buffer = deque(maxlen=self.buffer_size)
+        buffer.append(event)
+        # Set on every event so the buffers of active users don't expire
+        self._buffers.set(event.user_id, buffer)
+        for subscription in list(self._subscribers.get(event.user_id, ())):
+            subscription.deliver(event)
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async for message in self.backend.listen():
+                    origin, _, payload = message.partition(b" ")
+                    if origin.decode() != self.origin:
+                        self._dispatch(TodoEvent.model_validate_json(payload))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Todo event backend failed, reconnecting", exc_info=True)
+                await asyncio.sleep(1)
+
+    def subscribe(self, user_id: UUID) -> Subscription:
+        subscription = Subscription(user_id, self.max_queued)
+        self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.user_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.user_id]
+
+    def events_after(self, user_id: UUID, last_event_id: str) -> Optional[List[TodoEvent]]:
+        """Buffered events newer than `last_event_id`, or None if it is no longer buffered."""
+        buffer = self._buffers.get(user_id)
+        if buffer is None:
+            return None
+        events = list(buffer)
+        for index, event in enumerate(events):
+            if event.id == last_event_id:
+                return events[index + 1:]
+        return None
+
+    def subscriber_count(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
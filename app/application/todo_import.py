@@ -0,0 +1,203 @@
+import codecs
+import csv
+import json
+import re
+from collections import deque
+from typing import Any, AsyncIterator, List, Tuple, Union
+
+from ..domain.entities import TodoImportRowError
+from ..domain.exceptions import InvalidImportFileError
+
+IMPORT_FORMATS = ("csv", "ndjson", "json")
+# A single record (CSV row, NDJSON line, array item) may not be larger than this
+MAX_RECORD_CHARS = 1024 * 1024
+
+# What the parsers yield per chunk of input: (row, record) pairs, or a row
+# that could not even be decoded
+ParsedRecord = Union[Tuple[int, Any], TodoImportRowError]
+
+_JSON_WHITESPACE = re.compile(r"[ \t\r\n]*")
+
+
+def parse_records(chunks: AsyncIterator[bytes], format: str) -> AsyncIterator[List[ParsedRecord]]:
+    """Parse an import file as it arrives, one list of records per chunk read.
+
+    Nothing is buffered beyond the record that straddles two chunks, so a
+    file of any size is read in constant memory. Raises
+    InvalidImportFileError when the file cannot be read any further.
+    """
+    if format not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported import format: {format}")
+    texts = _decode(chunks)
+    if format == "csv":
+        return _csv_records(texts)
+    if format == "ndjson":
+        return _ndjson_records(texts)
+    return _json_array_records(texts)
+
+
+async def _decode(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    # utf-8-sig drops the byte order mark spreadsheet exports start with
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    try:
+        async for chunk in chunks:
+            text = decoder.decode(chunk)
+            if text:
+                yield text
+        text = decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise InvalidImportFileError("The file is not valid UTF-8")
+    if text:
+        yield text
+
+
+async def _lines(texts: AsyncIterator[str]) -> AsyncIterator[Tuple[List[str], bool]]:
+    """Complete lines (newline included) per chunk; the last batch may end without one."""
+    pending = ""
+    async for text in texts:
+        parts = (pending + text).split("\n")
+        pending = parts.pop()
+        if len(pending) > MAX_RECORD_CHARS:
+            raise InvalidImportFileError(f"A line is longer than {MAX_RECORD_CHARS} characters")
+        yield [part + "\n" for part in parts], False
+    yield ([pending] if pending else []), True
+
+
+class _NeedMoreData(Exception):
+    pass
+
+
+class _LineFeed:
+    """Lines for csv.reader, which may need several for one quoted record.
+
+    Running dry before the input has ended raises _NeedMoreData instead of
+    ending the reader; the lines of the unfinished record are handed back
+    with `rewind` and parsed again once more have arrived.
+    """
+
+    def __init__(self):
+        self.lines = deque()
+        self.taken: List[str] = []
+        self.ended = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            if self.ended:
+                raise StopIteration
+            raise _NeedMoreData
+        line = self.lines.popleft()
+        self.taken.append(line)
+        return line
+
+    def rewind(self) -> None:
+        self.lines.extendleft(reversed(self.taken))
+        self.taken = []
+
+
+async def _csv_records(texts: AsyncIterator[str]) -> AsyncIterator[List[ParsedRecord]]:
+    feed = _LineFeed()
+    reader = csv.reader(feed)
+    header = None
+    line = 1
+    async for lines, ended in _lines(texts):
+        feed.lines.extend(lines)
+        feed.ended = ended
+        records: List[ParsedRecord] = []
+        while True:
+            try:
+                fields = next(reader)
+            except _NeedMoreData:
+                if sum(map(len, feed.taken)) > MAX_RECORD_CHARS:
+                    raise InvalidImportFileError(f"Line {line}: unterminated quote or record too large")
+                feed.rewind()
+                break
+            except StopIteration:
+                break
+            except csv.Error as exc:
+                raise InvalidImportFileError(f"Line {line}: {exc}")
+            row = line
+            line += len(feed.taken)
+            feed.taken = []
+            if not fields:
+                continue
+            if header is None:
+                header = [name.strip().lower() for name in fields]
+                continue
+            # Empty cells count as missing, so they fall back to the defaults
+            records.append((row, {name: value for name, value in zip(header, fields) if value != ""}))
+        if records:
+            yield records
+
+
+async def _ndjson_records(texts: AsyncIterator[str]) -> AsyncIterator[List[ParsedRecord]]:
+    line = 0
+    async for lines, _ in _lines(texts):
+        records: List[ParsedRecord] = []
+        for text in lines:
+            line += 1
+            if not text.strip():
+                continue
+            try:
+                records.append((line, json.loads(text)))
+            except ValueError as exc:
+                records.append(TodoImportRowError(row=line, detail=f"Invalid JSON: {exc}"))
+        if records:
+            yield records
+
+
+async def _until_end(texts: AsyncIterator[str]) -> AsyncIterator[Tuple[str, bool]]:
+    async for text in texts:
+        yield text, False
+    yield "", True
+
+
+async def _json_array_records(texts: AsyncIterator[str]) -> AsyncIterator[List[ParsedRecord]]:
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    item = 0
+    state = "start"  # then "value", "separator" and finally "end"
+    async for text, ended in _until_end(texts):
+        buffer = buffer[position:] + text
+        position = 0
+        records: List[ParsedRecord] = []
+        while True:
+            position = _JSON_WHITESPACE.match(buffer, position).end()
+            if position == len(buffer):
+                break
+            char = buffer[position]
+            if state == "end":
+                raise InvalidImportFileError("Unexpected data after the JSON array")
+            if state == "start":
+                if char != "[":
+                    raise InvalidImportFileError("Expected a JSON array of todos")
+                state = "value"
+                position += 1
+            elif char == "]" and (state == "separator" or item == 0):
+                state = "end"
+                position += 1
+            elif state == "separator":
+                if char != ",":
+                    raise InvalidImportFileError(f"Item {item}: expected ',' or ']'")
+                state = "value"
+                position += 1
+            else:
+                try:
+                    value, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError as exc:
+                    if ended or len(buffer) - position > MAX_RECORD_CHARS:
+                        raise InvalidImportFileError(f"Item {item + 1}: {exc.msg}")
+                    break
+                if end == len(buffer) and not ended and not isinstance(value, (dict, list, str)):
+                    break  # a number or literal may continue in the next chunk
+                item += 1
+                records.append((item, value))
+                state = "separator"
+                position = end
+        if records:
+            yield records
+    if state != "end":
+        raise InvalidImportFileError("The JSON array is not closed")
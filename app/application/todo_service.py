@@ -1,14 +1,49 @@
-from typing import List, Optional
-from uuid import UUID
+from datetime import date, datetime, timedelta
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+from uuid import UUID, uuid4
 
-from ..domain.entities import Todo
+from pydantic import TypeAdapter, ValidationError
+
+from ..domain.entities import (
+    Todo,
+    TodoChanges,
+    TodoEvent,
+    TodoImportResult,
+    TodoImportRow,
+    TodoImportRowError,
+    TodoOperation,
+    TodoOperationResult,
+    TodoStats,
+)
 from ..domain.repositories import TodoRepository
-from ..domain.exceptions import TodoNotFoundError, UnauthorizedError
+from ..domain.exceptions import (
+    InvalidImportFileError,
+    TodoNotFoundError,
+    TodoVersionConflictError,
+    UnauthorizedError,
+)
+from .todo_events import TodoEventBroker
+from .todo_import import ParsedRecord
+
+# Sorts after every real id, so (t, MAX_UUID) means "everything up to t"
+MAX_UUID = UUID(int=2 ** 128 - 1)
+
+_import_rows_adapter = TypeAdapter(List[TodoImportRow])
+
+
+def _describe_error(error: Dict[str, Any]) -> str:
+    location = ".".join(str(part) for part in error["loc"][1:])
+    return f"{location}: {error['msg']}" if location else error["msg"]
 
 
 class TodoService:
-    def __init__(self, todo_repository: TodoRepository):
+    def __init__(self, todo_repository: TodoRepository, events: Optional[TodoEventBroker] = None):
         self.todo_repository = todo_repository
+        self.events = events
+
+    async def _publish(self, events: List[TodoEvent]) -> None:
+        if self.events is not None and events:
+            await self.events.publish(events)
 
     async def create_todo(self, title: str, description: Optional[str], user_id: UUID) -> Todo:
         todo = Todo(
@@ -16,13 +51,71 @@ class TodoService:
             description=description,
             user_id=user_id
         )
-        return await self.todo_repository.create_todo(todo)
+        todo = await self.todo_repository.create_todo(todo)
+        await self._publish([TodoEvent(type="created", user_id=user_id, todo_id=todo.id, todo=todo)])
+        return todo
+
+    async def get_user_todos(
+        self,
+        user_id: UUID,
+        completed: Optional[bool] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        cursor: Optional[Tuple[datetime, UUID]] = None,
+        limit: Optional[int] = None,
+    ) -> List[Todo]:
+        return await self.todo_repository.get_todos_by_user_id(
+            user_id,
+            completed=completed,
+            created_after=created_after,
+            created_before=created_before,
+            cursor=cursor,
+            limit=limit,
+        )
+
+    def export_user_todos(self, user_id: UUID) -> AsyncIterator[Todo]:
+        return self.todo_repository.stream_todos_by_user_id(user_id)
+
+    async def search_todos(self, user_id: UUID, query: str, limit: int, offset: int = 0) -> List[Todo]:
+        return await self.todo_repository.search_todos(user_id, query.strip(), limit, offset)
+
+    async def get_changes(self, user_id: UUID, since: Optional[Tuple[datetime, UUID]],
+                          limit: int, settle_seconds: float = 0.0) -> TodoChanges:
+        """Todos changed and deleted after the `since` cursor, oldest change first.
+
+        Changes from the last `settle_seconds` are held back until the next
+        call: a write stamped just before `until` may not have committed yet,
+        and a cursor that moved past it would skip it for good.
+        """
+        until = datetime.utcnow() - timedelta(seconds=settle_seconds)
+        changed, deleted = await self.todo_repository.get_changes(user_id, since, until, limit + 1)
+        entries = sorted(
+            [(todo.updated_at, todo.id, todo) for todo in changed]
+            + [(tombstone.deleted_at, tombstone.id, tombstone) for tombstone in deleted],
+            key=lambda entry: (entry[0], str(entry[1])),
+        )
+        changes = TodoChanges(cursor=since or (until, MAX_UUID), has_more=len(entries) > limit)
+        for _, _, entry in entries[:limit]:
+            if isinstance(entry, Todo):
+                changes.todos.append(entry)
+            else:
+                changes.deleted.append(entry)
+        if changes.has_more:
+            changes.cursor = entries[limit - 1][:2]
+        elif since is None or since[0] < until:
+            # Caught up: everything up to `until` has been delivered
+            changes.cursor = (until, MAX_UUID)
+        return changes
+
+    async def get_stats(self, user_id: UUID, group_by: str = "day",
+                        since: Optional[date] = None, until: Optional[date] = None) -> TodoStats:
+        return await self.todo_repository.get_stats(user_id, group_by, since, until)
 
-    async def get_user_todos(self, user_id: UUID) -> List[Todo]:
-        return await self.todo_repository.get_todos_by_user_id(user_id)
+    async def purge_tombstones(self, retention: timedelta) -> int:
+        return await self.todo_repository.purge_tombstones(datetime.utcnow() - retention)
 
-    async def get_todo_by_id(self, todo_id: UUID, user_id: UUID) -> Todo:
-        todo = await self.todo_repository.get_todo_by_id(todo_id)
+    async def get_todo_by_id(self, todo_id: UUID, user_id: UUID, fresh: bool = False) -> Todo:
+        todo = await self.todo_repository.get_todo_by_id(todo_id, fresh=fresh)
         if not todo:
             raise TodoNotFoundError("Todo not found")
 
@@ -31,19 +124,208 @@ class TodoService:
 
         return todo
 
-    async def update_todo(self, todo_id: UUID, user_id: UUID, title: Optional[str] = None,
-                         description: Optional[str] = None, completed: Optional[bool] = None) -> Todo:
-        todo = await self.get_todo_by_id(todo_id, user_id)
+    async def get_collection_version(self, user_id: UUID) -> Tuple[Optional[datetime], int]:
+        return await self.todo_repository.get_collection_version(user_id)
+
+    async def _raise_for_missing_todo(self, todo_id: UUID, user_id: UUID) -> None:
+        # Only reached when an owner-scoped write matched nothing; a cached
+        # copy could be the very version that no longer matches
+        todo = await self.todo_repository.get_todo_by_id(todo_id, fresh=True)
+        if todo is None:
+            raise TodoNotFoundError("Todo not found")
+        if todo.user_id != user_id:
+            raise UnauthorizedError("Not authorized to access this todo")
+        raise TodoVersionConflictError("Todo was modified by another request")
 
+    async def update_todo(self, todo_id: UUID, user_id: UUID, title: Optional[str] = None,
+                         description: Optional[str] = None, completed: Optional[bool] = None,
+                         expected_updated_at: Optional[List[datetime]] = None) -> Todo:
+        changes = {}
         if title is not None:
-            todo.title = title
+            changes["title"] = title
         if description is not None:
-            todo.description = description
+            changes["description"] = description
         if completed is not None:
-            todo.completed = completed
+            changes["completed"] = completed
+
+        if not changes:
+            todo = await self.get_todo_by_id(todo_id, user_id, fresh=expected_updated_at is not None)
+            if expected_updated_at is not None and todo.updated_at not in expected_updated_at:
+                raise TodoVersionConflictError("Todo was modified by another request")
+            return todo
+
+        changes["updated_at"] = datetime.utcnow()
+        todo = await self.todo_repository.update_todo(todo_id, user_id, changes, expected_updated_at)
+        if todo is None:
+            await self._raise_for_missing_todo(todo_id, user_id)
+        await self._publish([TodoEvent(type="updated", user_id=user_id, todo_id=todo_id, todo=todo)])
+        return todo
+
+    async def delete_todo(self, todo_id: UUID, user_id: UUID,
+                          expected_updated_at: Optional[List[datetime]] = None) -> bool:
+        deleted = await self.todo_repository.delete_todo(todo_id, user_id, expected_updated_at)
+        if not deleted:
+            await self._raise_for_missing_todo(todo_id, user_id)
+        await self._publish([TodoEvent(type="deleted", user_id=user_id, todo_id=todo_id)])
+        return deleted
+
+    async def apply_batch(self, user_id: UUID, operations: List[TodoOperation]) -> List[TodoOperationResult]:
+        """Apply a list of operations in a single transaction.
+
+        Creates run first, then updates (repeated updates of one todo are
+        merged in order), then deletes. Invalid, missing and forbidden items
+        are reported per item and do not abort the rest of the batch.
+        """
+        results: List[Optional[TodoOperationResult]] = [None] * len(operations)
+        creates: List[Tuple[int, Todo]] = []
+        updates = {}
+        deletes = []
+        now = datetime.utcnow()
+
+        for index, operation in enumerate(operations):
+            if operation.op == "create":
+                if not operation.title:
+                    results[index] = TodoOperationResult(
+                        index=index, op=operation.op, status="invalid", detail="title is required"
+                    )
+                    continue
+                todo = Todo(
+                    title=operation.title,
+                    description=operation.description,
+                    completed=bool(operation.completed),
+                    user_id=user_id,
+                    created_at=now,
+                    updated_at=now,
+                )
+                creates.append((index, todo))
+            elif operation.id is None:
+                results[index] = TodoOperationResult(
+                    index=index, op=operation.op, status="invalid", detail="id is required"
+                )
+            elif operation.op == "update":
+                changes = updates.setdefault(operation.id, {"updated_at": now})
+                for field in ("title", "description", "completed"):
+                    value = getattr(operation, field)
+                    if value is not None:
+                        changes[field] = value
+            else:
+                deletes.append(operation.id)
+
+        batch = await self.todo_repository.bulk_write_todos(
+            user_id, [todo for _, todo in creates], updates, deletes
+        )
+
+        for index, todo in creates:
+            results[index] = TodoOperationResult(
+                index=index, op="create", id=todo.id, status="created", todo=todo
+            )
+
+        for index, operation in enumerate(operations):
+            if results[index] is not None:
+                continue
+            if operation.op == "update" and operation.id in batch.updated:
+                status, todo = "updated", batch.updated[operation.id]
+            elif operation.op == "delete" and operation.id in batch.deleted:
+                status, todo = "deleted", None
+            elif operation.id in batch.forbidden:
+                status, todo = "forbidden", None
+            else:
+                status, todo = "not_found", None
+            results[index] = TodoOperationResult(
+                index=index, op=operation.op, id=operation.id, status=status, todo=todo
+            )
+
+        await self._publish(
+            [TodoEvent(type="created", user_id=user_id, todo_id=todo.id, todo=todo) for _, todo in creates]
+            + [TodoEvent(type="updated", user_id=user_id, todo_id=todo.id, todo=todo)
+               for todo in batch.updated.values()]
+            + [TodoEvent(type="deleted", user_id=user_id, todo_id=todo_id) for todo_id in batch.deleted]
+        )
+        return results
+
+    async def import_todos(
+        self,
+        user_id: UUID,
+        records: AsyncIterator[List[ParsedRecord]],
+        batch_size: int = 20000,
+        max_errors: Optional[int] = 1000,
+        progress: Optional[Callable[[TodoImportResult], Any]] = None,
+        offline: bool = False,
+    ) -> TodoImportResult:
+        """Validate and insert parsed records, committing every `batch_size` valid rows.
+
+        Invalid rows are skipped and reported, up to `max_errors` of them
+        (None keeps all). If the file turns out to be unreadable part way,
+        the rows before that point stay imported and `aborted` says why.
+        `progress` is called with the running result after every commit.
+        `offline` lets the repository use bulk paths meant for imports run
+        outside the server.
+
+        Imported todos are not pushed to the change feed one event each;
+        they are stamped with the import time, so delta sync returns them.
+        """
+        result = TodoImportResult()
+        pending: List[Tuple[int, Any]] = []
+        try:
+            async for parsed in records:
+                for record in parsed:
+                    if isinstance(record, TodoImportRowError):
+                        self._import_failed(result, record, max_errors)
+                    else:
+                        pending.append(record)
+                while len(pending) >= batch_size:
+                    await self._import_batch(user_id, pending[:batch_size], result, max_errors, progress, offline)
+                    del pending[:batch_size]
+        except InvalidImportFileError as exc:
+            result.aborted = str(exc)
+        if pending:
+            await self._import_batch(user_id, pending, result, max_errors, progress, offline)
+        result.errors.sort(key=lambda error: error.row)
+        return result
+
+    @staticmethod
+    def _import_failed(result: TodoImportResult, error: TodoImportRowError, max_errors: Optional[int]) -> None:
+        result.failed += 1
+        if max_errors is None or len(result.errors) < max_errors:
+            result.errors.append(error)
+
+    async def _import_batch(self, user_id: UUID, batch: List[Tuple[int, Any]], result: TodoImportResult,
+                            max_errors: Optional[int], progress: Optional[Callable[[TodoImportResult], Any]],
+                            offline: bool) -> None:
+        todos = self._build_import_todos(user_id, batch, result, max_errors)
+        await self.todo_repository.insert_todos(todos, offline=offline)
+        result.imported += len(todos)
+        if progress is not None:
+            progress(result)
 
-        return await self.todo_repository.update_todo(todo)
+    def _build_import_todos(self, user_id: UUID, batch: List[Tuple[int, Any]], result: TodoImportResult,
+                            max_errors: Optional[int]) -> List[Todo]:
+        records = [record for _, record in batch]
+        try:
+            rows = _import_rows_adapter.validate_python(records)
+        except ValidationError as exc:
+            # Report the first problem of every invalid row, then validate the rest again
+            invalid: Dict[int, str] = {}
+            for error in exc.errors(include_url=False):
+                invalid.setdefault(error["loc"][0], _describe_error(error))
+            for index, detail in sorted(invalid.items()):
+                self._import_failed(result, TodoImportRowError(row=batch[index][0], detail=detail), max_errors)
+            rows = _import_rows_adapter.validate_python(
+                [record for index, record in enumerate(records) if index not in invalid]
+            )
 
-    async def delete_todo(self, todo_id: UUID, user_id: UUID) -> bool:
-        todo = await self.get_todo_by_id(todo_id, user_id)
-        return await self.todo_repository.delete_todo(todo_id)
+        now = datetime.utcnow()
+        # Every field comes from a validated row or from here, so skip validating again
+        return [
+            Todo.model_construct(
+                id=uuid4(),
+                title=row.title,
+                description=row.description,
+                completed=row.completed,
+                user_id=user_id,
+                created_at=row.created_at or now,
+                # The import is the latest change, so delta sync picks the rows up
+                updated_at=now,
+            )
+            for row in rows
+        ]
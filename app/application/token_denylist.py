@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class DenylistBackend(ABC):
+    """Shares revocations between workers so each can keep its own copy."""
+
+    @abstractmethod
+    async def add(self, jti: str, expires_at: float) -> None:
+        pass
+
+    @abstractmethod
+    async def snapshot(self) -> List[Tuple[str, float]]:
+        """Every revocation that has not expired yet."""
+        pass
+
+    @abstractmethod
+    def listen(self) -> AsyncIterator[Tuple[str, float]]:
+        """Revocations added by any worker from now on, this one included."""
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+class TokenDenylist:
+    """Revoked token ids (`jti`), each kept until its token would have expired anyway.
+
+    Lookups never leave the process: one dict probe per request. Expired
+    entries are pruned once `capacity` is reached; if the live revocations
+    still do not fit, those expiring soonest are dropped.
+
+    With a backend, revocations are published to every worker and a
+    starting worker loads the ones still in force.
+    """
+
+    def __init__(self, backend: Optional[DenylistBackend] = None, capacity: int = 100000,
+                 clock: Callable[[], float] = time.time):
+        self.backend = backend
+        self.capacity = capacity
+        self.clock = clock
+        self.evictions = 0
+        self._revoked: Dict[str, float] = {}
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self.backend is None or self._listener is not None:
+            return
+        # Listen first, so a revocation published while loading is not missed
+        self._listener = asyncio.create_task(self._listen())
+        await asyncio.sleep(0)
+        try:
+            for jti, expires_at in await self.backend.snapshot():
+                self._add(jti, expires_at)
+        except Exception:
+            logger.warning("Could not load revoked tokens", exc_info=True)
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self.backend is not None:
+            await self.backend.close()
+
+    def is_revoked(self, jti: str) -> bool:
+        expires_at = self._revoked.get(jti)
+        return expires_at is not None and expires_at > self.clock()
+
+    async def revoke(self, jti: str, expires_at: float) -> None:
+        """Deny `jti` until `expires_at` (a Unix timestamp), in every worker."""
+        self._add(jti, expires_at)
+        if self.backend is not None:
+            await self.backend.add(jti, expires_at)
+
+    def _add(self, jti: str, expires_at: float) -> None:
+        if expires_at <= self.clock() or self._revoked.get(jti, 0) >= expires_at:
+            return
+        if jti not in self._revoked and len(self._revoked) >= self.capacity:
+            self._prune()
+        self._revoked[jti] = expires_at
+
+    def _prune(self) -> None:
+        now = self.clock()
+        live = sorted(
+            ((expires_at, jti) for jti, expires_at in self._revoked.items() if expires_at > now),
+            reverse=True,
+        )
+        # Leave room for a tenth of the capacity before pruning again
+        keep = max(1, self.capacity - self.capacity // 10)
+        if len(live) > keep:
+            self.evictions += len(live) - keep
+            logger.warning("Token denylist is full, forgetting %d revocations", len(live) - keep)
+            live = live[:keep]
+        self._revoked = {jti: expires_at for expires_at, jti in live}
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async for jti, expires_at in self.backend.listen():
+                    self._add(jti, expires_at)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Token denylist backend failed, reconnecting", exc_info=True)
+                await asyncio.sleep(1)
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._revoked),
+            "capacity": self.capacity,
+            "evictions": self.evictions,
+        }
@@ -1,9 +1,15 @@
 #!/usr/bin/env python3
 """CLI commands for the FastAPI Todo application."""
 
+import argparse
+import os
 import subprocess
 import sys
 import signal
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
 
 
 def run_dev():
@@ -20,7 +26,8 @@ def run_dev():
         # Run uvicorn directly without subprocess to handle signals properly
         import uvicorn
         uvicorn.run(
-            "app.main:app",
+            "app.main:create_app",
+            factory=True,
             host="0.0.0.0",
             port=8000,
             reload=True
@@ -33,15 +40,157 @@ def run_dev():
         sys.exit(1)
 
 
-def run_start():
-    """Run production server"""
+def _default_workers() -> int:
+    # The in-memory token denylist lives in one process, so without a shared
+    # one a logout would not reach the other workers
+    if os.getenv("TOKEN_DENYLIST_BACKEND", "memory") == "memory":
+        return 1
+    return os.cpu_count() or 1
+
+
+@dataclass
+class ServerSettings:
+    host: str = "0.0.0.0"
+    port: int = 8000
+    # Defaults to one worker per CPU once the token denylist is shared
+    workers: int = field(default_factory=_default_workers)
+    # "auto" picks uvloop / httptools when they are installed
+    loop: str = "auto"
+    http: str = "auto"
+    backlog: int = 2048
+    keep_alive: int = 5
+    limit_concurrency: Optional[int] = None
+    limit_max_requests: Optional[int] = None
+    # Seconds in-flight requests get to finish after SIGTERM
+    graceful_timeout: int = 30
+    # Import the app once in the master and fork workers from it (gunicorn)
+    preload: bool = False
+
+    @classmethod
+    def from_env(cls) -> "ServerSettings":
+        defaults = cls()
+        return cls(
+            host=os.getenv("HOST") or defaults.host,
+            port=_optional_int(os.getenv("PORT")) or defaults.port,
+            workers=_optional_int(os.getenv("WEB_CONCURRENCY")) or defaults.workers,
+            loop=os.getenv("SERVER_LOOP") or defaults.loop,
+            http=os.getenv("SERVER_HTTP") or defaults.http,
+            backlog=_optional_int(os.getenv("SERVER_BACKLOG")) or defaults.backlog,
+            keep_alive=_optional_int(os.getenv("SERVER_KEEP_ALIVE")) or defaults.keep_alive,
+            limit_concurrency=_optional_int(os.getenv("SERVER_LIMIT_CONCURRENCY")),
+            limit_max_requests=_optional_int(os.getenv("SERVER_LIMIT_MAX_REQUESTS")),
+            graceful_timeout=_optional_int(os.getenv("SERVER_GRACEFUL_TIMEOUT")) or defaults.graceful_timeout,
+            preload=os.getenv("SERVER_PRELOAD", "False").lower() == "true",
+        )
+
+    def uvicorn_options(self) -> Dict[str, Any]:
+        """Options understood by both `uvicorn.run` and `uvicorn.Config`."""
+        return {
+            "loop": self.loop,
+            "http": self.http,
+            "backlog": self.backlog,
+            "timeout_keep_alive": self.keep_alive,
+            "limit_concurrency": self.limit_concurrency,
+            "limit_max_requests": self.limit_max_requests,
+            "timeout_graceful_shutdown": self.graceful_timeout,
+        }
+
+
+def _optional_int(value: Optional[str]) -> Optional[int]:
+    return int(value) if value else None
+
+
+def parse_server_settings(argv: Optional[List[str]] = None) -> ServerSettings:
+    """Environment defaults, overridden by command line flags."""
+    load_dotenv()
+    settings = ServerSettings.from_env()
+    parser = argparse.ArgumentParser(prog="start", description="Run the production server")
+    parser.add_argument("--host", default=settings.host)
+    parser.add_argument("--port", type=int, default=settings.port)
+    parser.add_argument("--workers", type=int, default=settings.workers)
+    parser.add_argument("--loop", default=settings.loop, choices=["auto", "asyncio", "uvloop"])
+    parser.add_argument("--http", default=settings.http, choices=["auto", "h11", "httptools"])
+    parser.add_argument("--backlog", type=int, default=settings.backlog)
+    parser.add_argument("--keep-alive", type=int, default=settings.keep_alive)
+    parser.add_argument("--limit-concurrency", type=int, default=settings.limit_concurrency)
+    parser.add_argument("--limit-max-requests", type=int, default=settings.limit_max_requests)
+    parser.add_argument("--graceful-timeout", type=int, default=settings.graceful_timeout)
+    parser.add_argument("--preload", action="store_true", default=settings.preload)
+    args = parser.parse_args(argv)
+    return ServerSettings(**vars(args))
+
+
+def _run_gunicorn(settings: ServerSettings):
+    """Preload the app in a gunicorn master and fork uvicorn workers from it.
+
+    The database engine is only created by the app's lifespan, which runs
+    in each worker after the fork, so workers never share connections.
+    """
     try:
+        from gunicorn.app.base import BaseApplication
+        from uvicorn.workers import UvicornWorker
+    except ImportError:
+        raise RuntimeError("--preload needs gunicorn; install the 'gunicorn' extra")
+
+    class Worker(UvicornWorker):
+        CONFIG_KWARGS = {
+            key: value for key, value in settings.uvicorn_options().items()
+            # gunicorn passes its own backlog and keep-alive settings
+            if key not in ("backlog", "timeout_keep_alive", "limit_max_requests")
+        }
+
+    class Application(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{settings.host}:{settings.port}")
+            self.cfg.set("workers", settings.workers)
+            self.cfg.set("worker_class", Worker)
+            self.cfg.set("backlog", settings.backlog)
+            self.cfg.set("keepalive", settings.keep_alive)
+            self.cfg.set("graceful_timeout", settings.graceful_timeout)
+            self.cfg.set("max_requests", settings.limit_max_requests or 0)
+            self.cfg.set("preload_app", True)
+
+        def load(self):
+            from app.main import create_app
+            return create_app()
+
+    Application().run()
+
+
+def run_start(argv: Optional[List[str]] = None):
+    """Run production server
+
+    Uvicorn handles SIGTERM by closing the listening socket and letting
+    in-flight requests finish for up to `--graceful-timeout` seconds. Every
+    worker builds its own engine and pool when its lifespan starts.
+
+    Refuses to start several workers, asked for with `--workers` or
+    `WEB_CONCURRENCY`, with the in-memory token denylist, and warns when
+    they would each keep their own rate limit counters.
+    """
+    settings = parse_server_settings(argv)
+    if settings.workers > 1 and os.getenv("TOKEN_DENYLIST_BACKEND", "memory") == "memory":
+        # Each worker would keep its own denylist: a token revoked by one stays valid on the rest
+        print("❌ Logout and refresh-token rotation need a denylist shared by all workers: "
+              "set TOKEN_DENYLIST_BACKEND=redis, or run with --workers 1")
+        sys.exit(1)
+    if settings.workers > 1 and os.getenv("RATE_LIMIT_BACKEND", "memory") == "memory":
+        print(f"⚠️  RATE_LIMIT_BACKEND=memory counts requests in each worker, so every limit is "
+              f"{settings.workers} times higher: set RATE_LIMIT_BACKEND=redis to share the counters")
+    try:
+        if settings.preload and settings.workers > 1:
+            _run_gunicorn(settings)
+            return
+
         import uvicorn
         uvicorn.run(
-            "app.main:app",
-            host="0.0.0.0",
-            port=8000,
-            reload=False
+            "app.main:create_app",
+            factory=True,
+            host=settings.host,
+            port=settings.port,
+            workers=settings.workers,
+            reload=False,
+            **settings.uvicorn_options(),
         )
     except KeyboardInterrupt:
         print("\n🛑 Production server stopped")
@@ -51,16 +200,155 @@ def run_start():
         sys.exit(1)
 
 
+def run_purge_tombstones(argv: Optional[List[str]] = None) -> None:
+    """Delete tombstones of todos deleted longer ago than the retention.
+
+    Clients syncing with an older cursor are told to resync in full, so
+    nothing still needs them. Meant to run periodically, e.g. from cron.
+    """
+    load_dotenv()
+    parser = argparse.ArgumentParser(prog="purge-tombstones", description=run_purge_tombstones.__doc__.splitlines()[0])
+    parser.add_argument(
+        "--retention-days", type=float,
+        default=float(os.getenv("TODO_TOMBSTONE_RETENTION_DAYS", "30")),
+    )
+    args = parser.parse_args(argv)
+
+    import asyncio
+    from datetime import timedelta
+
+    from .application.todo_service import TodoService
+    from .infrastructure.database import async_session, dispose_engine
+    from .infrastructure.todo_repository import SQLAlchemyTodoRepository
+
+    async def purge() -> int:
+        try:
+            async with async_session() as session:
+                service = TodoService(SQLAlchemyTodoRepository(session))
+                return await service.purge_tombstones(timedelta(days=args.retention_days))
+        finally:
+            await dispose_engine()
+
+    purged = asyncio.run(purge())
+    print(f"Purged {purged} tombstones older than {args.retention_days:g} days")
+
+
+IMPORT_EXTENSIONS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson", ".json": "json"}
+
+
+def run_import(argv: Optional[List[str]] = None) -> int:
+    """Import todos for one user from a CSV, NDJSON or JSON file.
+
+    The file is parsed as it is read and valid rows are committed in
+    batches, so it may be far larger than memory. Progress is printed to
+    stderr; rejected rows are listed at the end or written to `--errors`.
+    """
+    load_dotenv()
+    parser = argparse.ArgumentParser(prog="import-todos", description=run_import.__doc__.splitlines()[0])
+    parser.add_argument("path", help="The file to import, or - for standard input")
+    parser.add_argument("--user", required=True, help="Email or id of the user who will own the todos")
+    parser.add_argument("--format", choices=sorted(set(IMPORT_EXTENSIONS.values())),
+                        help="Defaults to the one named by the file extension")
+    parser.add_argument("--batch-size", type=int, default=int(os.getenv("TODO_IMPORT_BATCH_SIZE", "20000")))
+    parser.add_argument("--errors", help="Write every rejected row to this file, one JSON object per line")
+    args = parser.parse_args(argv)
+    format = args.format or IMPORT_EXTENSIONS.get(os.path.splitext(args.path)[1].lower())
+    if format is None:
+        parser.error("cannot tell the format from the file name, pass --format")
+
+    import asyncio
+    import gc
+    import time
+    import uuid
+
+    from .application.todo_import import parse_records
+    from .application.todo_service import TodoService
+    from .infrastructure.database import async_session, dispose_engine
+    from .infrastructure.todo_repository import SQLAlchemyTodoRepository
+    from .infrastructure.user_repository import SQLAlchemyUserRepository
+
+    started = time.perf_counter()
+
+    def report(result) -> None:
+        rate = result.imported / (time.perf_counter() - started)
+        print(f"\r{result.imported:,} imported, {result.failed:,} rejected ({rate:,.0f} todos/s)",
+              end="", file=sys.stderr, flush=True)
+
+    async def read_chunks(stream):
+        while True:
+            chunk = stream.read(1024 * 1024)
+            if not chunk:
+                return
+            yield chunk
+
+    async def import_file(stream):
+        try:
+            async with async_session() as session:
+                users = SQLAlchemyUserRepository(session)
+                try:
+                    user = await users.get_user_by_id(uuid.UUID(args.user))
+                except ValueError:
+                    user = await users.get_user_by_email(args.user)
+                if user is None:
+                    return None
+                service = TodoService(SQLAlchemyTodoRepository(session))
+                return await service.import_todos(
+                    user.id,
+                    parse_records(read_chunks(stream), format),
+                    batch_size=args.batch_size,
+                    max_errors=None,
+                    progress=report,
+                    offline=True,
+                )
+        finally:
+            await dispose_engine()
+
+    # This process only imports, and every batch keeps millions of fresh
+    # objects alive until its insert; collecting would only rescan them
+    gc.disable()
+    try:
+        if args.path == "-":
+            result = asyncio.run(import_file(sys.stdin.buffer))
+        else:
+            with open(args.path, "rb") as stream:
+                result = asyncio.run(import_file(stream))
+    finally:
+        gc.enable()
+    if result is None:
+        print(f"❌ No user {args.user}", file=sys.stderr)
+        return 1
+
+    report(result)
+    print(file=sys.stderr)
+    if args.errors:
+        with open(args.errors, "w") as errors:
+            for error in result.errors:
+                errors.write(error.model_dump_json() + "\n")
+    else:
+        for error in result.errors[:20]:
+            print(f"  row {error.row}: {error.detail}", file=sys.stderr)
+        if result.failed > 20:
+            print(f"  ... and {result.failed - 20:,} more, list them all with --errors", file=sys.stderr)
+    if result.aborted:
+        print(f"❌ Stopped early: {result.aborted}", file=sys.stderr)
+        return 1
+    return 0
+
+
 if __name__ == "__main__":
     if len(sys.argv) > 1:
         command = sys.argv[1]
         if command == "dev":
             run_dev()
         elif command == "start":
-            run_start()
+            run_start(sys.argv[2:])
+        elif command == "purge-tombstones":
+            run_purge_tombstones(sys.argv[2:])
+        elif command == "import":
+            sys.exit(run_import(sys.argv[2:]))
         else:
             print(f"Unknown command: {command}")
             sys.exit(1)
     else:
-        print("Usage: python -m app.cli [dev|start]")
+        print("Usage: python -m app.cli [dev|start [options]|purge-tombstones [options]|import FILE --user USER]")
         sys.exit(1)
@@ -1,7 +1,7 @@
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime, timezone
+from typing import Dict, List, Literal, Optional, Set, Tuple
 from uuid import UUID, uuid4
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, Field, EmailStr, field_validator
 
 
 class User(BaseModel):
@@ -28,3 +28,102 @@ class Todo(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class TodoOperation(BaseModel):
+    """One create/update/delete inside a batch request."""
+    op: Literal["create", "update", "delete"]
+    id: Optional[UUID] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    completed: Optional[bool] = None
+
+
+class TodoOperationResult(BaseModel):
+    index: int
+    op: str
+    id: Optional[UUID] = None
+    status: Literal["created", "updated", "deleted", "not_found", "forbidden", "invalid"]
+    detail: Optional[str] = None
+    todo: Optional[Todo] = None
+
+
+class TodoBatchResult(BaseModel):
+    """What a bulk write actually changed, as reported by the repository."""
+    created: List[Todo] = Field(default_factory=list)
+    updated: Dict[UUID, Todo] = Field(default_factory=dict)
+    deleted: Set[UUID] = Field(default_factory=set)
+    # Ids that exist but belong to another user
+    forbidden: Set[UUID] = Field(default_factory=set)
+
+
+class TodoEvent(BaseModel):
+    """A change to one of a user's todos, pushed to their change feed."""
+    id: str = Field(default_factory=lambda: uuid4().hex)
+    type: Literal["created", "updated", "deleted"]
+    user_id: UUID
+    todo_id: UUID
+    # None for deletes
+    todo: Optional[Todo] = None
+
+
+class TodoTombstone(BaseModel):
+    """A deleted todo, as reported by delta sync."""
+    id: UUID
+    deleted_at: datetime
+
+
+class TodoChanges(BaseModel):
+    """One page of delta sync: what changed after a cursor, and the next cursor."""
+    todos: List[Todo] = Field(default_factory=list)
+    deleted: List[TodoTombstone] = Field(default_factory=list)
+    # (updated_at or deleted_at, id) of the last change delivered
+    cursor: Tuple[datetime, UUID]
+    has_more: bool = False
+
+
+class TodoStatsBucket(BaseModel):
+    """Todos created in one day or week, and how many of those are completed."""
+    period: date
+    created: int = 0
+    completed: int = 0
+
+
+class TodoStats(BaseModel):
+    """A user's todo counts, with the todos they created grouped by period."""
+    total: int = 0
+    completed: int = 0
+    group_by: Literal["day", "week"] = "day"
+    buckets: List[TodoStatsBucket] = Field(default_factory=list)
+
+
+class TodoImportRow(BaseModel):
+    """One todo read from an import file; other columns (ids, owners) are ignored."""
+    title: str = Field(min_length=1, max_length=200)
+    description: Optional[str] = None
+    completed: bool = False
+    # Kept from the source so history survives; defaults to the import time
+    created_at: Optional[datetime] = None
+
+    @field_validator("created_at")
+    @classmethod
+    def _naive_utc(cls, value: Optional[datetime]) -> Optional[datetime]:
+        # Timestamps are stored as naive UTC, like datetime.utcnow()
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+
+class TodoImportRowError(BaseModel):
+    """A row that was skipped: its line (CSV, NDJSON) or position (JSON array), and why."""
+    row: int
+    detail: str
+
+
+class TodoImportResult(BaseModel):
+    imported: int = 0
+    failed: int = 0
+    # The first failures only; `failed` counts them all
+    errors: List[TodoImportRowError] = Field(default_factory=list)
+    # Set when the file could not be read to the end; rows before that point are kept
+    aborted: Optional[str] = None
@@ -26,3 +26,18 @@ class InvalidCredentialsError(DomainException):
 class UnauthorizedError(DomainException):
     """Raised when user is not authorized to perform action"""
     pass
+
+
+class ServiceBusyError(DomainException):
+    """Raised when a bounded resource is saturated and the caller should retry later"""
+    pass
+
+
+class TodoVersionConflictError(DomainException):
+    """Raised when a todo changed since the version the client based its write on"""
+    pass
+
+
+class InvalidImportFileError(DomainException):
+    """Raised when an import file cannot be parsed any further"""
+    pass
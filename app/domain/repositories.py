@@ -1,8 +1,9 @@
 from abc import ABC, abstractmethod
-from typing import Optional, List
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Dict, Optional, List, Tuple
 from uuid import UUID
 
-from .entities import User, Todo
+from .entities import User, Todo, TodoBatchResult, TodoStats, TodoTombstone
 
 
 class UserRepository(ABC):
@@ -25,17 +26,119 @@ class TodoRepository(ABC):
         pass
 
     @abstractmethod
-    async def get_todos_by_user_id(self, user_id: UUID) -> List[Todo]:
+    async def get_todos_by_user_id(
+        self,
+        user_id: UUID,
+        completed: Optional[bool] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        cursor: Optional[Tuple[datetime, UUID]] = None,
+        limit: Optional[int] = None,
+    ) -> List[Todo]:
+        """Return a user's todos ordered by (created_at, id).
+
+        `cursor` is the (created_at, id) of the last todo of the previous
+        page; only todos strictly after it are returned.
+        """
+        pass
+
+    @abstractmethod
+    def stream_todos_by_user_id(self, user_id: UUID) -> AsyncIterator[Todo]:
+        """Yield all of a user's todos without loading them into memory at once."""
         pass
 
     @abstractmethod
-    async def get_todo_by_id(self, todo_id: UUID) -> Optional[Todo]:
+    async def search_todos(self, user_id: UUID, query: str, limit: int, offset: int = 0) -> List[Todo]:
+        """Full-text search over a user's todo titles and descriptions, best match first."""
         pass
 
     @abstractmethod
-    async def update_todo(self, todo: Todo) -> Todo:
+    async def get_todo_by_id(self, todo_id: UUID, fresh: bool = False) -> Optional[Todo]:
+        """Return a todo; `fresh` skips caches, for checks a stale copy would get wrong."""
+        pass
+
+    @abstractmethod
+    async def get_changes(
+        self,
+        user_id: UUID,
+        since: Optional[Tuple[datetime, UUID]],
+        until: datetime,
+        limit: int,
+    ) -> Tuple[List[Todo], List[TodoTombstone]]:
+        """Return todos changed and tombstones of todos deleted after `since`.
+
+        Both are ordered by (updated_at or deleted_at, id), strictly after the
+        `since` cursor and no later than `until`, at most `limit` of each.
+        """
+        pass
+
+    @abstractmethod
+    async def purge_tombstones(self, deleted_before: datetime) -> int:
+        """Drop tombstones older than `deleted_before`; returns how many."""
+        pass
+
+    @abstractmethod
+    async def get_stats(
+        self,
+        user_id: UUID,
+        group_by: str = "day",
+        since: Optional[date] = None,
+        until: Optional[date] = None,
+    ) -> TodoStats:
+        """Return the user's totals and, per day or week, the todos created then.
+
+        Buckets are keyed by the first day of the period (weeks start on
+        Monday) and limited to `since`..`until` inclusive; totals are not.
+        """
         pass
 
     @abstractmethod
-    async def delete_todo(self, todo_id: UUID) -> bool:
+    async def get_collection_version(self, user_id: UUID) -> Tuple[Optional[datetime], int]:
+        """Return the newest `updated_at` written for the user and the number of their todos."""
+        pass
+
+    @abstractmethod
+    async def update_todo(
+        self,
+        todo_id: UUID,
+        user_id: UUID,
+        changes: Dict[str, Any],
+        expected_updated_at: Optional[List[datetime]] = None,
+    ) -> Optional[Todo]:
+        """Apply `changes` to the todo if it belongs to `user_id`.
+
+        When `expected_updated_at` is given the todo must also still carry one
+        of those `updated_at` values. Returns the updated todo, or None when
+        nothing matched.
+        """
+        pass
+
+    @abstractmethod
+    async def delete_todo(
+        self,
+        todo_id: UUID,
+        user_id: UUID,
+        expected_updated_at: Optional[List[datetime]] = None,
+    ) -> bool:
+        """Delete the todo if it belongs to `user_id`; False when nothing matched."""
+        pass
+
+    @abstractmethod
+    async def bulk_write_todos(
+        self,
+        user_id: UUID,
+        creates: List[Todo],
+        updates: Dict[UUID, Dict[str, Any]],
+        deletes: List[UUID],
+    ) -> TodoBatchResult:
+        """Apply creates, then owner-scoped updates, then deletes in one transaction."""
+        pass
+
+    @abstractmethod
+    async def insert_todos(self, todos: List[Todo], offline: bool = False) -> None:
+        """Insert new todos in one transaction.
+
+        `offline` is for imports run outside the server: they may take the
+        fastest bulk path the database has, even one that runs DDL.
+        """
         pass
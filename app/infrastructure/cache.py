@@ -0,0 +1,85 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from ..ttl_cache import TTLCache
+
+
+class CacheBackend(ABC):
+    """Key/value store used to cache serialized repository results."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        pass
+
+    @abstractmethod
+    async def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        """Store `value` only if `key` is absent; True if it was stored."""
+        pass
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None:
+        pass
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """Per-process LRU cache. Entries are not shared between workers."""
+
+    def __init__(self, max_size: int = 10000, ttl: float = 30.0):
+        self.entries: TTLCache[bytes] = TTLCache(max_size=max_size, ttl=ttl)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self.entries.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        self.entries.set(key, value, ttl=ttl)
+
+    async def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        return self.entries.add(key, value, ttl=ttl)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self.entries.invalidate(key)
+
+
+class RedisCacheBackend(CacheBackend):
+    """Cache shared by all workers, on any server speaking the Redis protocol."""
+
+    def __init__(self, url: str, ttl: float = 30.0, prefix: str = "todolist:"):
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError:
+            raise RuntimeError("The redis cache backend requires the 'redis' package")
+        self.client = redis_asyncio.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(self.prefix + key)
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        await self.client.set(self.prefix + key, value, px=int(ttl * 1000))
+
+    async def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        ttl = self.ttl if ttl is None else ttl
+        return bool(await self.client.set(self.prefix + key, value, px=int(ttl * 1000), nx=True))
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self.client.delete(*(self.prefix + key for key in keys))
+
+
+def create_cache_backend(kind: str, max_size: int = 10000, ttl: float = 30.0,
+                         redis_url: Optional[str] = None) -> Optional[CacheBackend]:
+    """Build the backend named by configuration; `none` disables caching."""
+    if kind == "none":
+        return None
+    if kind == "memory":
+        return InMemoryCacheBackend(max_size=max_size, ttl=ttl)
+    if kind == "redis":
+        return RedisCacheBackend(redis_url or "redis://localhost:6379/0", ttl=ttl)
+    raise ValueError(f"Unknown cache backend: {kind}")
@@ -0,0 +1,204 @@
+import hashlib
+import json
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from uuid import UUID, uuid4
+
+from pydantic import TypeAdapter
+
+from ..domain.entities import Todo, TodoBatchResult, TodoStats, TodoTombstone
+from ..domain.repositories import TodoRepository
+from .cache import CacheBackend
+
+_todo_list_adapter = TypeAdapter(List[Todo])
+_version_adapter = TypeAdapter(Tuple[Optional[datetime], int])
+
+# Cached in place of a deleted todo, so a read that raced the delete cannot
+# cache the row again
+_DELETED = b"deleted"
+# Cached for a few seconds in place of an updated todo: concurrent updates
+# can return in any order, so none of them caches its row. Reads go to the
+# database meanwhile and fill the slot once the marker expires.
+_UPDATED = b"updated"
+_UPDATED_TTL = 5.0
+
+
+class CachedTodoRepository(TodoRepository):
+    """Read-through cache in front of another TodoRepository.
+
+    Single todos are cached by id. Updates and deletes leave a marker in
+    their slot instead of the row, and reads only fill an empty slot, so a
+    row read or written before a concurrent write is never cached over it.
+    Per-user results (list pages and the collection version) are stored
+    under a per-user generation key; any write for that user replaces the
+    generation, which orphans every cached page at once.
+    """
+
+    def __init__(self, repository: TodoRepository, cache: CacheBackend, ttl: Optional[float] = None):
+        self.repository = repository
+        self.cache = cache
+        self.ttl = ttl
+
+    @staticmethod
+    def _todo_key(todo_id: UUID) -> str:
+        return f"todo:{todo_id}"
+
+    @staticmethod
+    def _generation_key(user_id: UUID) -> str:
+        return f"todos-gen:{user_id}"
+
+    async def _generation(self, user_id: UUID) -> str:
+        generation = await self.cache.get(self._generation_key(user_id))
+        if generation is None:
+            return await self._invalidate_user(user_id)
+        return generation.decode()
+
+    async def _invalidate_user(self, user_id: UUID) -> str:
+        # A fresh random generation, so an evicted generation key can never
+        # resurrect pages cached under an older one
+        generation = uuid4().hex
+        await self.cache.set(self._generation_key(user_id), generation.encode(), ttl=self.ttl)
+        return generation
+
+    async def create_todo(self, todo: Todo) -> Todo:
+        created = await self.repository.create_todo(todo)
+        await self.cache.set(self._todo_key(created.id), created.model_dump_json().encode(), ttl=self.ttl)
+        await self._invalidate_user(created.user_id)
+        return created
+
+    async def get_todos_by_user_id(
+        self,
+        user_id: UUID,
+        completed: Optional[bool] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        cursor: Optional[Tuple[datetime, UUID]] = None,
+        limit: Optional[int] = None,
+    ) -> List[Todo]:
+        params = json.dumps(
+            [completed, created_after, created_before, cursor, limit], default=str
+        ).encode()
+        key = f"todos:{user_id}:{await self._generation(user_id)}:{hashlib.sha1(params).hexdigest()}"
+
+        cached = await self.cache.get(key)
+        if cached is not None:
+            return _todo_list_adapter.validate_json(cached)
+
+        todos = await self.repository.get_todos_by_user_id(
+            user_id,
+            completed=completed,
+            created_after=created_after,
+            created_before=created_before,
+            cursor=cursor,
+            limit=limit,
+        )
+        await self.cache.set(key, _todo_list_adapter.dump_json(todos), ttl=self.ttl)
+        return todos
+
+    def stream_todos_by_user_id(self, user_id: UUID) -> AsyncIterator[Todo]:
+        # Exports are read once and can be arbitrarily large; never cache them
+        return self.repository.stream_todos_by_user_id(user_id)
+
+    async def search_todos(self, user_id: UUID, query: str, limit: int, offset: int = 0) -> List[Todo]:
+        # Free-text queries rarely repeat; caching them would mostly evict useful pages
+        return await self.repository.search_todos(user_id, query, limit, offset)
+
+    async def get_changes(
+        self,
+        user_id: UUID,
+        since: Optional[Tuple[datetime, UUID]],
+        until: datetime,
+        limit: int,
+    ) -> Tuple[List[Todo], List[TodoTombstone]]:
+        # Every cursor is different; there is nothing worth caching
+        return await self.repository.get_changes(user_id, since, until, limit)
+
+    async def purge_tombstones(self, deleted_before: datetime) -> int:
+        return await self.repository.purge_tombstones(deleted_before)
+
+    async def get_todo_by_id(self, todo_id: UUID, fresh: bool = False) -> Optional[Todo]:
+        if fresh:
+            return await self.repository.get_todo_by_id(todo_id, fresh=True)
+        key = self._todo_key(todo_id)
+        cached = await self.cache.get(key)
+        if cached == _DELETED:
+            return None
+        if cached is not None and cached != _UPDATED:
+            return Todo.model_validate_json(cached)
+
+        todo = await self.repository.get_todo_by_id(todo_id)
+        if todo is not None:
+            await self.cache.add(key, todo.model_dump_json().encode(), ttl=self.ttl)
+        return todo
+
+    async def get_stats(
+        self,
+        user_id: UUID,
+        group_by: str = "day",
+        since: Optional[date] = None,
+        until: Optional[date] = None,
+    ) -> TodoStats:
+        key = f"todos:{user_id}:{await self._generation(user_id)}:stats:{group_by}:{since}:{until}"
+        cached = await self.cache.get(key)
+        if cached is not None:
+            return TodoStats.model_validate_json(cached)
+
+        stats = await self.repository.get_stats(user_id, group_by, since, until)
+        await self.cache.set(key, stats.model_dump_json().encode(), ttl=self.ttl)
+        return stats
+
+    async def get_collection_version(self, user_id: UUID) -> Tuple[Optional[datetime], int]:
+        key = f"todos:{user_id}:{await self._generation(user_id)}:version"
+        cached = await self.cache.get(key)
+        if cached is not None:
+            return _version_adapter.validate_json(cached)
+
+        version = await self.repository.get_collection_version(user_id)
+        await self.cache.set(key, _version_adapter.dump_json(version), ttl=self.ttl)
+        return version
+
+    async def update_todo(
+        self,
+        todo_id: UUID,
+        user_id: UUID,
+        changes: Dict[str, Any],
+        expected_updated_at: Optional[List[datetime]] = None,
+    ) -> Optional[Todo]:
+        todo = await self.repository.update_todo(todo_id, user_id, changes, expected_updated_at)
+        if todo is not None:
+            await self.cache.set(self._todo_key(todo_id), _UPDATED, ttl=_UPDATED_TTL)
+            await self._invalidate_user(user_id)
+        return todo
+
+    async def delete_todo(
+        self,
+        todo_id: UUID,
+        user_id: UUID,
+        expected_updated_at: Optional[List[datetime]] = None,
+    ) -> bool:
+        deleted = await self.repository.delete_todo(todo_id, user_id, expected_updated_at)
+        if deleted:
+            await self.cache.set(self._todo_key(todo_id), _DELETED, ttl=self.ttl)
+            await self._invalidate_user(user_id)
+        return deleted
+
+    async def bulk_write_todos(
+        self,
+        user_id: UUID,
+        creates: List[Todo],
+        updates: Dict[UUID, Dict[str, Any]],
+        deletes: List[UUID],
+    ) -> TodoBatchResult:
+        batch = await self.repository.bulk_write_todos(user_id, creates, updates, deletes)
+        for todo_id in batch.updated:
+            await self.cache.set(self._todo_key(todo_id), _UPDATED, ttl=_UPDATED_TTL)
+        for todo_id in batch.deleted:
+            await self.cache.set(self._todo_key(todo_id), _DELETED, ttl=self.ttl)
+        if batch.updated or batch.deleted or batch.created:
+            await self._invalidate_user(user_id)
+        return batch
+
+    async def insert_todos(self, todos: List[Todo], offline: bool = False) -> None:
+        await self.repository.insert_todos(todos, offline=offline)
+        for user_id in {todo.user_id for todo in todos}:
+            await self._invalidate_user(user_id)
@@ -1,26 +1,275 @@
-from sqlalchemy import create_engine
+import time
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
+from .. import metrics
+from .routing import DatabaseRouter, RoutingSession
+
+DEFAULT_DATABASE_URL = "sqlite:///./todolist.db"
+
+
+def async_database_url(url: Optional[str] = None) -> str:
+    """DATABASE_URL (read when called, not on import) with an async driver."""
+    url = url or os.getenv("DATABASE_URL", DEFAULT_DATABASE_URL)
+    # Convert SQLite URL for async if needed
+    if url.startswith("sqlite:///"):
+        return url.replace("sqlite:///", "sqlite+aiosqlite:///")
+    return url
+
+
+def _env_bool(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() == "true"
+
+
+def _env_int(name: str, default: str) -> int:
+    # An empty value (`DB_POOL_SIZE=` in .env) means the default too
+    return int(os.getenv(name) or default)
+
+
+def replica_urls() -> List[str]:
+    """Read replicas from DATABASE_REPLICA_URLS (comma separated), async drivers applied."""
+    urls = os.getenv("DATABASE_REPLICA_URLS", "")
+    return [async_database_url(url.strip()) for url in urls.split(",") if url.strip()]
+
+
+@dataclass
+class DatabaseSettings:
+    url: str = field(default_factory=async_database_url)
+    echo: bool = False
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: int = 30
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+    # PostgreSQL only; milliseconds, None leaves the server default
+    statement_timeout_ms: Optional[int] = None
+    # SQLite only
+    sqlite_wal: bool = True
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    connect_args: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_env(cls) -> "DatabaseSettings":
+        return cls(
+            url=async_database_url(),
+            echo=_env_bool("DB_ECHO", "False"),
+            pool_size=_env_int("DB_POOL_SIZE", "5"),
+            max_overflow=_env_int("DB_MAX_OVERFLOW", "10"),
+            pool_timeout=_env_int("DB_POOL_TIMEOUT", "30"),
+            pool_recycle=_env_int("DB_POOL_RECYCLE", "1800"),
+            pool_pre_ping=_env_bool("DB_POOL_PRE_PING", "True"),
+            statement_timeout_ms=_env_int("DB_STATEMENT_TIMEOUT_MS", "0") or None,
+            sqlite_wal=_env_bool("SQLITE_WAL", "True"),
+            sqlite_synchronous=os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+            sqlite_busy_timeout_ms=_env_int("SQLITE_BUSY_TIMEOUT_MS", "5000"),
+            sqlite_mmap_size=_env_int("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)),
+        )
+
+    @property
+    def is_sqlite(self) -> bool:
+        return self.url.startswith("sqlite")
+
+    @property
+    def is_memory_sqlite(self) -> bool:
+        return self.is_sqlite and (":memory:" in self.url or self.url.rstrip("/").endswith(":"))
+
+
+def _install_sqlite_pragmas(engine: AsyncEngine, settings: DatabaseSettings) -> None:
+    pragmas = [
+        f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}",
+        f"PRAGMA synchronous={settings.sqlite_synchronous}",
+        f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}",
+    ]
+    if settings.sqlite_wal and not settings.is_memory_sqlite:
+        pragmas.insert(0, "PRAGMA journal_mode=WAL")
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Count statements and SQL time against the current request's metrics."""
+
+    # A connection runs one statement at a time, so one start time is enough;
+    # a failed statement's is consumed by handle_error instead
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_start_time"] = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        _record_query(conn)
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def handle_error(exception_context):
+        if exception_context.connection is not None:
+            _record_query(exception_context.connection)
+
+
+def _record_query(conn) -> None:
+    started = conn.info.pop("query_start_time", None)
+    if started is not None:
+        metrics.record_query(time.perf_counter() - started)
+
+
+def create_engine_from_settings(settings: Optional[DatabaseSettings] = None) -> AsyncEngine:
+    """Build the async engine with pool and driver options taken from settings."""
+    settings = settings or DatabaseSettings.from_env()
+    connect_args = dict(settings.connect_args)
+    engine_kwargs: Dict[str, Any] = {"echo": settings.echo}
 
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./todolist.db")
+    if not settings.is_memory_sqlite:
+        engine_kwargs.update(
+            pool_size=settings.pool_size,
+            max_overflow=settings.max_overflow,
+            pool_timeout=settings.pool_timeout,
+            pool_recycle=settings.pool_recycle,
+            pool_pre_ping=settings.pool_pre_ping,
+        )
 
-# Convert SQLite URL for async if needed
-if DATABASE_URL.startswith("sqlite:///"):
-    ASYNC_DATABASE_URL = DATABASE_URL.replace("sqlite:///", "sqlite+aiosqlite:///")
-else:
-    ASYNC_DATABASE_URL = DATABASE_URL
+    if settings.statement_timeout_ms and not settings.is_sqlite:
+        if "+asyncpg" in settings.url:
+            connect_args.setdefault("server_settings", {})["statement_timeout"] = str(settings.statement_timeout_ms)
+        else:
+            connect_args["options"] = f"-c statement_timeout={settings.statement_timeout_ms}"
+
+    if connect_args:
+        engine_kwargs["connect_args"] = connect_args
+
+    engine = create_async_engine(settings.url, **engine_kwargs)
+    if settings.is_sqlite:
+        _install_sqlite_pragmas(engine, settings)
+    instrument_engine(engine)
+    return engine
+
+
+def pool_metrics(engine: AsyncEngine) -> Dict[str, Any]:
+    pool = engine.sync_engine.pool
+    stats: Dict[str, Any] = {"pool_class": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if callable(method):
+            stats[name] = method()
+    return stats
 
-engine = create_async_engine(ASYNC_DATABASE_URL, echo=True)
-async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 Base = declarative_base()
 
+# Created on first use (normally by the app's lifespan), so importing this
+# module stays cheap and every worker process builds its own pool
+_engine: Optional[AsyncEngine] = None
+_router: Optional[DatabaseRouter] = None
+_sessionmaker: Optional[sessionmaker] = None
+
+
+def get_engine() -> AsyncEngine:
+    """The primary engine; replicas, when configured, are built alongside it."""
+    global _engine, _router, _sessionmaker
+    if _engine is None:
+        settings = DatabaseSettings.from_env()
+        _engine = create_engine_from_settings(settings)
+        urls = replica_urls()
+        if urls:
+            _router = DatabaseRouter(
+                _engine,
+                [create_engine_from_settings(replace(settings, url=url)) for url in urls],
+                strategy=os.getenv("DB_REPLICA_STRATEGY", "round_robin"),
+                read_your_writes_seconds=float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5")),
+            )
+            _sessionmaker = sessionmaker(
+                _engine,
+                class_=AsyncSession,
+                expire_on_commit=False,
+                sync_session_class=RoutingSession,
+                router=_router,
+            )
+        else:
+            _sessionmaker = sessionmaker(_engine, class_=AsyncSession, expire_on_commit=False)
+    return _engine
+
+
+def get_router() -> Optional[DatabaseRouter]:
+    get_engine()
+    return _router
+
+
+def _all_engines() -> List[AsyncEngine]:
+    if _router is not None:
+        return _router.engines
+    return [_engine] if _engine is not None else []
+
+
+async def dispose_engine() -> None:
+    global _engine, _router, _sessionmaker
+    engines = _all_engines()
+    _engine, _router, _sessionmaker = None, None, None
+    for engine in engines:
+        await engine.dispose()
+
+
+def async_session() -> AsyncSession:
+    get_engine()
+    return _sessionmaker()
+
+
+def _discard_inherited_pool():
+    # A forked child (multiprocessing, a preloading server) must never reuse
+    # the parent's sockets; close=False leaves them to the parent
+    for engine in _all_engines():
+        engine.sync_engine.dispose(close=False)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_discard_inherited_pool)
+
+
+class LazySession:
+    """Stands in for an AsyncSession and opens the real one on first use.
+
+    Requests answered from the auth and todo caches never reach the
+    database, so they skip the session's setup and teardown. `info` is kept
+    here until then and handed over when the session opens.
+    """
+
+    def __init__(self, factory=async_session):
+        self._factory = factory
+        self._session: Optional[AsyncSession] = None
+        self._info: Dict[Any, Any] = {}
+
+    @property
+    def info(self) -> Dict[Any, Any]:
+        return self._session.info if self._session is not None else self._info
+
+    @property
+    def is_open(self) -> bool:
+        return self._session is not None
+
+    def __getattr__(self, name: str) -> Any:
+        if self._session is None:
+            self._session = self._factory()
+            self._session.info.update(self._info)
+        return getattr(self._session, name)
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+
 
 async def get_async_session():
-    async with async_session() as session:
+    session = LazySession()
+    try:
         yield session
+    finally:
+        await session.close()
@@ -0,0 +1,59 @@
+from typing import AsyncIterator, List, Optional, Tuple
+
+from ..application.token_denylist import DenylistBackend
+
+
+class RedisDenylistBackend(DenylistBackend):
+    """Keeps revocations in Redis keys that expire with their tokens.
+
+    New revocations are also published on a channel, so workers update
+    their local copy without polling.
+    """
+
+    def __init__(self, url: str, prefix: str = "todolist:revoked:", channel: str = "todolist:revoked"):
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError:
+            raise RuntimeError("The redis token denylist backend requires the 'redis' package")
+        self.client = redis_asyncio.from_url(url)
+        self.prefix = prefix
+        self.channel = channel
+
+    async def add(self, jti: str, expires_at: float) -> None:
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.set(self.prefix + jti, repr(expires_at), exat=int(expires_at) + 1)
+            pipe.publish(self.channel, f"{jti} {expires_at!r}")
+            await pipe.execute()
+
+    async def snapshot(self) -> List[Tuple[str, float]]:
+        revoked = []
+        keys = [key async for key in self.client.scan_iter(match=self.prefix + "*", count=1000)]
+        for offset in range(0, len(keys), 1000):
+            chunk = keys[offset:offset + 1000]
+            for key, value in zip(chunk, await self.client.mget(chunk)):
+                if value is not None:
+                    revoked.append((key.decode()[len(self.prefix):], float(value)))
+        return revoked
+
+    async def listen(self) -> AsyncIterator[Tuple[str, float]]:
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(self.channel)
+        try:
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    jti, _, expires_at = message["data"].decode().partition(" ")
+                    yield jti, float(expires_at)
+        finally:
+            await pubsub.aclose()
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+def create_denylist_backend(kind: str, redis_url: Optional[str] = None) -> Optional[DenylistBackend]:
+    """Build the backend named by configuration; `memory` keeps revocations in this worker."""
+    if kind == "memory":
+        return None
+    if kind == "redis":
+        return RedisDenylistBackend(redis_url or "redis://localhost:6379/0")
+    raise ValueError(f"Unknown token denylist backend: {kind}")
@@ -0,0 +1,40 @@
+from typing import AsyncIterator, Optional
+
+from ..application.todo_events import EventBackend
+
+
+class RedisEventBackend(EventBackend):
+    """Fans events out to every worker through a Redis pub/sub channel."""
+
+    def __init__(self, url: str, channel: str = "todolist:todo-events"):
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError:
+            raise RuntimeError("The redis event backend requires the 'redis' package")
+        self.client = redis_asyncio.from_url(url)
+        self.channel = channel
+
+    async def publish(self, message: bytes) -> None:
+        await self.client.publish(self.channel, message)
+
+    async def listen(self) -> AsyncIterator[bytes]:
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(self.channel)
+        try:
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    yield message["data"]
+        finally:
+            await pubsub.aclose()
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+def create_event_backend(kind: str, redis_url: Optional[str] = None) -> Optional[EventBackend]:
+    """Build the backend named by configuration; `memory` keeps events in this worker."""
+    if kind == "memory":
+        return None
+    if kind == "redis":
+        return RedisEventBackend(redis_url or "redis://localhost:6379/0")
+    raise ValueError(f"Unknown event backend: {kind}")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, DateTime, Text, ForeignKey
+from sqlalchemy import Column, String, Boolean, Date, DateTime, Integer, Text, ForeignKey, Index, DDL, event
 from sqlalchemy.orm import relationship
 import uuid
 from datetime import datetime
@@ -31,6 +31,14 @@ class UserModel(Base):
 
 class TodoModel(Base):
     __tablename__ = "todos"
+    __table_args__ = (
+        # Serve keyset pagination on (created_at, id) scoped to a user, with
+        # and without a completion status filter.
+        Index("ix_todos_user_created_id", "user_id", "created_at", "id"),
+        Index("ix_todos_user_completed_created_id", "user_id", "completed", "created_at", "id"),
+        # Serves delta sync: a user's todos changed after an (updated_at, id) cursor.
+        Index("ix_todos_user_updated_id", "user_id", "updated_at", "id"),
+    )
 
     id = Column(UUID_TYPE, primary_key=True, default=uuid.uuid4)
     title = Column(String(200), nullable=False)
@@ -41,3 +49,185 @@ class TodoModel(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     user = relationship("UserModel", back_populates="todos")
+
+
+class TodoTombstoneModel(Base):
+    """Records a deleted todo so delta sync can tell clients to drop it."""
+
+    __tablename__ = "todo_tombstones"
+    __table_args__ = (
+        Index("ix_todo_tombstones_user_deleted_id", "user_id", "deleted_at", "todo_id"),
+    )
+
+    todo_id = Column(UUID_TYPE, primary_key=True)
+    user_id = Column(UUID_TYPE, ForeignKey("users.id"), nullable=False)
+    deleted_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class TodoCounterModel(Base):
+    """A user's todo totals, kept current by triggers on `todos`.
+
+    `last_modified` is the newest `updated_at` ever written, so together
+    with `total` it versions the user's collection without scanning it.
+    """
+
+    __tablename__ = "todo_counters"
+
+    user_id = Column(UUID_TYPE, ForeignKey("users.id"), primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+    completed = Column(Integer, nullable=False, default=0)
+    last_modified = Column(DateTime, nullable=True)
+
+
+class TodoDailyCounterModel(Base):
+    """Todos a user created on one (UTC) day, and how many of those are completed."""
+
+    __tablename__ = "todo_daily_counters"
+
+    user_id = Column(UUID_TYPE, ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    created = Column(Integer, nullable=False, default=0)
+    completed = Column(Integer, nullable=False, default=0)
+
+
+# Full-text search over title/description. SQLite keeps an external-content
+# FTS5 table in sync through triggers; it is keyed by the implicit rowid of
+# `todos`, so run `INSERT INTO todos_fts(todos_fts) VALUES('rebuild')` after
+# a VACUUM. PostgreSQL uses a generated tsvector column with a GIN index.
+SQLITE_FTS_INSERT_TRIGGER = """CREATE TRIGGER IF NOT EXISTS todos_fts_ai AFTER INSERT ON todos BEGIN
+        INSERT INTO todos_fts(rowid, title, description) VALUES (new.rowid, new.title, new.description);
+    END"""
+SQLITE_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS todos_fts USING fts5(
+        title, description, content='todos', tokenize='porter unicode61'
+    )""",
+    SQLITE_FTS_INSERT_TRIGGER,
+    """CREATE TRIGGER IF NOT EXISTS todos_fts_ad AFTER DELETE ON todos BEGIN
+        INSERT INTO todos_fts(todos_fts, rowid, title, description)
+        VALUES ('delete', old.rowid, old.title, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS todos_fts_au AFTER UPDATE OF title, description ON todos BEGIN
+        INSERT INTO todos_fts(todos_fts, rowid, title, description)
+        VALUES ('delete', old.rowid, old.title, old.description);
+        INSERT INTO todos_fts(rowid, title, description) VALUES (new.rowid, new.title, new.description);
+    END""",
+]
+
+POSTGRES_FTS_DDL = [
+    """ALTER TABLE todos ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_todos_search_vector ON todos USING GIN (search_vector)",
+]
+
+for statement in SQLITE_FTS_DDL:
+    event.listen(TodoModel.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+for statement in POSTGRES_FTS_DDL:
+    event.listen(TodoModel.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+event.listen(
+    TodoModel.__table__, "before_drop", DDL("DROP TABLE IF EXISTS todos_fts").execute_if(dialect="sqlite")
+)
+
+
+# Todo counters are maintained by the database in the writing transaction,
+# so every write path (single, batch, write-behind) keeps them exact.
+SQLITE_COUNTER_INSERT_TRIGGER = """CREATE TRIGGER IF NOT EXISTS todo_counters_ai AFTER INSERT ON todos BEGIN
+        INSERT INTO todo_counters(user_id, total, completed, last_modified)
+        VALUES (new.user_id, 1, new.completed, new.updated_at)
+        ON CONFLICT(user_id) DO UPDATE SET total = total + 1, completed = completed + excluded.completed,
+        last_modified = max(coalesce(last_modified, excluded.last_modified), excluded.last_modified);
+        INSERT INTO todo_daily_counters(user_id, day, created, completed)
+        VALUES (new.user_id, date(new.created_at), 1, new.completed)
+        ON CONFLICT(user_id, day) DO UPDATE SET created = created + 1, completed = completed + excluded.completed;
+    END"""
+SQLITE_COUNTER_DDL = [
+    SQLITE_COUNTER_INSERT_TRIGGER,
+    """CREATE TRIGGER IF NOT EXISTS todo_counters_ad AFTER DELETE ON todos BEGIN
+        UPDATE todo_counters SET total = total - 1, completed = completed - old.completed
+        WHERE user_id = old.user_id;
+        UPDATE todo_daily_counters SET created = created - 1, completed = completed - old.completed
+        WHERE user_id = old.user_id AND day = date(old.created_at);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS todo_counters_au AFTER UPDATE OF completed ON todos
+    WHEN old.completed IS NOT new.completed BEGIN
+        UPDATE todo_counters SET completed = completed + new.completed - old.completed
+        WHERE user_id = new.user_id;
+        UPDATE todo_daily_counters SET completed = completed + new.completed - old.completed
+        WHERE user_id = new.user_id AND day = date(new.created_at);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS todo_counters_au_modified AFTER UPDATE OF updated_at ON todos BEGIN
+        UPDATE todo_counters SET last_modified = max(coalesce(last_modified, new.updated_at), new.updated_at)
+        WHERE user_id = new.user_id;
+    END""",
+]
+
+# Offline bulk imports (`import-todos`) on SQLite drop the two
+# AFTER INSERT triggers for the length of their transaction (it holds the
+# write lock, so no other write can miss them), run these set-based
+# equivalents over the rows they added and recreate the triggers before
+# committing. Imports through the API keep the triggers.
+SQLITE_INSERT_TRIGGERS = {
+    "todos_fts_ai": SQLITE_FTS_INSERT_TRIGGER,
+    "todo_counters_ai": SQLITE_COUNTER_INSERT_TRIGGER,
+}
+SQLITE_BULK_INSERT_DML = [
+    """INSERT INTO todos_fts(rowid, title, description)
+    SELECT rowid, title, description FROM todos WHERE rowid > :after_rowid""",
+    """INSERT INTO todo_counters(user_id, total, completed, last_modified)
+    SELECT user_id, count(*), sum(completed), max(updated_at) FROM todos WHERE rowid > :after_rowid GROUP BY user_id
+    ON CONFLICT(user_id) DO UPDATE
+    SET total = total + excluded.total, completed = completed + excluded.completed,
+    last_modified = max(coalesce(last_modified, excluded.last_modified), excluded.last_modified)""",
+    """INSERT INTO todo_daily_counters(user_id, day, created, completed)
+    SELECT user_id, date(created_at), count(*), sum(completed) FROM todos WHERE rowid > :after_rowid
+    GROUP BY user_id, date(created_at)
+    ON CONFLICT(user_id, day) DO UPDATE
+    SET created = created + excluded.created, completed = completed + excluded.completed""",
+]
+
+POSTGRES_COUNTER_DDL = [
+    """CREATE OR REPLACE FUNCTION todo_counters_update() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO todo_counters(user_id, total, completed, last_modified)
+            VALUES (NEW.user_id, 1, NEW.completed::int, NEW.updated_at)
+            ON CONFLICT (user_id) DO UPDATE
+            SET total = todo_counters.total + 1, completed = todo_counters.completed + EXCLUDED.completed,
+                last_modified = GREATEST(todo_counters.last_modified, EXCLUDED.last_modified);
+            INSERT INTO todo_daily_counters(user_id, day, created, completed)
+            VALUES (NEW.user_id, NEW.created_at::date, 1, NEW.completed::int)
+            ON CONFLICT (user_id, day) DO UPDATE
+            SET created = todo_daily_counters.created + 1,
+                completed = todo_daily_counters.completed + EXCLUDED.completed;
+        ELSIF TG_OP = 'DELETE' THEN
+            UPDATE todo_counters SET total = total - 1, completed = completed - OLD.completed::int
+            WHERE user_id = OLD.user_id;
+            UPDATE todo_daily_counters SET created = created - 1, completed = completed - OLD.completed::int
+            WHERE user_id = OLD.user_id AND day = OLD.created_at::date;
+        ELSE
+            UPDATE todo_counters SET completed = completed + NEW.completed::int - OLD.completed::int,
+                last_modified = GREATEST(last_modified, NEW.updated_at)
+            WHERE user_id = NEW.user_id;
+            IF OLD.completed IS DISTINCT FROM NEW.completed THEN
+                UPDATE todo_daily_counters SET completed = completed + NEW.completed::int - OLD.completed::int
+                WHERE user_id = NEW.user_id AND day = NEW.created_at::date;
+            END IF;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql""",
+    """CREATE TRIGGER todo_counters AFTER INSERT OR DELETE OR UPDATE OF completed, updated_at ON todos
+    FOR EACH ROW EXECUTE FUNCTION todo_counters_update()""",
+]
+
+# On the metadata rather than a table: the triggers need all three tables
+for statement in SQLITE_COUNTER_DDL:
+    event.listen(Base.metadata, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+for statement in POSTGRES_COUNTER_DDL:
+    event.listen(Base.metadata, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+event.listen(
+    Base.metadata,
+    "after_drop",
+    DDL("DROP FUNCTION IF EXISTS todo_counters_update()").execute_if(dialect="postgresql"),
+)
@@ -0,0 +1,177 @@
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+WINDOW_UNITS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+@dataclass(frozen=True)
+class Rate:
+    """At most `limit` hits per `window` seconds."""
+
+    limit: int
+    window: float
+
+    @classmethod
+    def parse(cls, spec: str) -> Optional["Rate"]:
+        """Parse `10/minute`, `100/hour` or `5/30s`; empty or `none` means unlimited."""
+        spec = spec.strip().lower()
+        if not spec or spec == "none":
+            return None
+        try:
+            limit, period = spec.split("/")
+            if period.endswith("s") and period[:-1].replace(".", "", 1).isdigit():
+                window = float(period[:-1])
+            else:
+                window = float(WINDOW_UNITS[period])
+            rate = cls(limit=int(limit), window=window)
+        except (KeyError, ValueError):
+            raise ValueError(f"Invalid rate limit: {spec!r}")
+        if rate.limit <= 0 or rate.window <= 0:
+            raise ValueError(f"Invalid rate limit: {spec!r}")
+        return rate
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    # Seconds until the hit would be allowed; 0 when it was
+    retry_after: float
+
+
+def sliding_window(previous: float, current: float, elapsed: float,
+                   rate: Rate, cost: int = 1) -> RateLimitResult:
+    """Decide a hit from the counts of the previous and the current fixed window.
+
+    The previous window's count is weighted by how much of it still overlaps
+    the sliding window ending now, which approximates a true sliding log
+    with two counters per key.
+    """
+    budget = rate.limit - cost
+    used = previous * (1 - elapsed / rate.window) + current
+    if used <= budget:
+        return RateLimitResult(True, rate.limit, int(budget - used), 0.0)
+
+    if budget < 0:
+        retry_after = 2 * rate.window  # costs more than the whole limit
+    elif current <= budget:
+        # Allowed again once enough of the previous window has slid out
+        retry_after = rate.window * (1 - (budget - current) / previous) - elapsed
+    else:
+        # The current window alone is over; wait for it to become the previous one
+        retry_after = rate.window - elapsed + rate.window * (1 - budget / current)
+    return RateLimitResult(False, rate.limit, 0, max(retry_after, 0.0))
+
+
+class RateLimitStore(ABC):
+    """Counts hits per key and decides whether the next one is allowed."""
+
+    @abstractmethod
+    async def hit(self, key: str, rate: Rate, cost: int = 1) -> RateLimitResult:
+        """Record a hit unless it would exceed `rate`."""
+        pass
+
+
+class InMemoryRateLimitStore(RateLimitStore):
+    """Per-process sliding-window counters. Limits are not shared between workers.
+
+    Keys are spread over shards, each a dict of `[window_start, previous,
+    current, window]`. A shard that grows past `max_keys_per_shard` drops
+    its expired keys, then its least recently used ones, so cleanup cost is
+    bounded by the shard size rather than the whole table.
+    """
+
+    def __init__(self, shards: int = 16, max_keys_per_shard: int = 10000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_keys_per_shard = max_keys_per_shard
+        self.clock = clock
+        self._shards: List[Dict[str, list]] = [{} for _ in range(shards)]
+
+    def _shard(self, key: str) -> Dict[str, list]:
+        return self._shards[hash(key) % len(self._shards)]
+
+    async def hit(self, key: str, rate: Rate, cost: int = 1) -> RateLimitResult:
+        now = self.clock()
+        window_start = now - now % rate.window
+        shard = self._shard(key)
+        entry = shard.pop(key, None)
+        if entry is None or entry[0] < window_start - rate.window:
+            entry = [window_start, 0, 0, rate.window]
+        elif entry[0] < window_start:
+            entry = [window_start, entry[2], 0, rate.window]
+
+        result = sliding_window(entry[1], entry[2], now - window_start, rate, cost)
+        if result.allowed:
+            entry[2] += cost
+        # Re-inserted so dict order is least recently used first
+        shard[key] = entry
+        if len(shard) > self.max_keys_per_shard:
+            self._evict(shard, now)
+        return result
+
+    def _evict(self, shard: Dict[str, list], now: float) -> None:
+        for key in [key for key, entry in shard.items() if entry[0] + 2 * entry[3] <= now]:
+            del shard[key]
+        while len(shard) > self.max_keys_per_shard:
+            del shard[next(iter(shard))]
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+
+# Counts live in one key per fixed window, named after the window index, and
+# the clock is the server's so every worker agrees on the windows.
+SLIDING_WINDOW_SCRIPT = """
+local window = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local index = math.floor(now / window)
+local elapsed = now - index * window
+local current_key = KEYS[1] .. ':' .. string.format('%d', index)
+local previous = tonumber(redis.call('GET', KEYS[1] .. ':' .. string.format('%d', index - 1)) or '0')
+local current = tonumber(redis.call('GET', current_key) or '0')
+if previous * (1 - elapsed / window) + current + cost <= limit then
+  redis.call('INCRBY', current_key, cost)
+  redis.call('PEXPIRE', current_key, window * 2)
+end
+return {previous, current, elapsed}
+"""
+
+
+class RedisRateLimitStore(RateLimitStore):
+    """Counters shared by all workers, on any server speaking the Redis protocol."""
+
+    def __init__(self, url: str, prefix: str = "todolist:ratelimit:"):
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError:
+            raise RuntimeError("The redis rate limit store requires the 'redis' package")
+        self.client = redis_asyncio.from_url(url)
+        self.prefix = prefix
+        self._script = self.client.register_script(SLIDING_WINDOW_SCRIPT)
+
+    async def hit(self, key: str, rate: Rate, cost: int = 1) -> RateLimitResult:
+        window_ms = max(1, int(rate.window * 1000))
+        # The hash tag keeps both window keys on one cluster slot
+        previous, current, elapsed = await self._script(
+            keys=[f"{self.prefix}{{{key}}}"], args=[window_ms, rate.limit, cost]
+        )
+        return sliding_window(int(previous), int(current), int(elapsed) / 1000, rate, cost)
+
+
+def create_rate_limit_store(kind: str, redis_url: Optional[str] = None,
+                            shards: int = 16, max_keys_per_shard: int = 10000) -> Optional[RateLimitStore]:
+    """Build the store named by configuration; `none` disables rate limiting."""
+    if kind == "none":
+        return None
+    if kind == "memory":
+        return InMemoryRateLimitStore(shards=shards, max_keys_per_shard=max_keys_per_shard)
+    if kind == "redis":
+        return RedisRateLimitStore(redis_url or "redis://localhost:6379/0")
+    raise ValueError(f"Unknown rate limit store: {kind}")
+
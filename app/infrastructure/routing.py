@@ -0,0 +1,106 @@
+import itertools
+from typing import Hashable, List, Optional
+
+from sqlalchemy import CompoundSelect, Select
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+
+from ..ttl_cache import TTLCache
+
+# Session.info key naming whose writes the session's reads should observe
+READ_YOUR_WRITES_KEY = "read_your_writes_key"
+# Pass as `bind_arguments` to force a single statement onto the primary
+PRIMARY = {"primary": True}
+
+
+class DatabaseRouter:
+    """A primary engine for writes plus replica engines for reads.
+
+    Replicas are picked round-robin or by fewest checked-out connections.
+    After a key (a user id) commits a write, its reads stay on the primary
+    for `read_your_writes_seconds`, long enough to cover replication lag.
+    The window is tracked per process.
+    """
+
+    STRATEGIES = ("round_robin", "least_connections")
+
+    def __init__(
+        self,
+        primary: AsyncEngine,
+        replicas: List[AsyncEngine],
+        strategy: str = "round_robin",
+        read_your_writes_seconds: float = 5.0,
+        max_tracked_keys: int = 100000,
+    ):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown replica selection strategy: {strategy}")
+        self.primary = primary
+        self.replicas = replicas
+        self.strategy = strategy
+        self.read_your_writes_seconds = read_your_writes_seconds
+        self._recent_writers: TTLCache[bool] = TTLCache(
+            max_size=max_tracked_keys, ttl=read_your_writes_seconds
+        )
+        self._round_robin = itertools.cycle(range(len(replicas))) if replicas else None
+
+    def record_write(self, key: Hashable) -> None:
+        self._recent_writers.set(key, True)
+
+    def is_sticky(self, key: Optional[Hashable]) -> bool:
+        return key is not None and self._recent_writers.get(key) is not None
+
+    def choose_replica(self) -> AsyncEngine:
+        if not self.replicas:
+            return self.primary
+        if self.strategy == "least_connections":
+            return min(self.replicas, key=_checked_out)
+        return self.replicas[next(self._round_robin)]
+
+    @property
+    def engines(self) -> List[AsyncEngine]:
+        return [self.primary, *self.replicas]
+
+
+def _checked_out(engine: AsyncEngine) -> int:
+    checkedout = getattr(engine.sync_engine.pool, "checkedout", None)
+    return checkedout() if callable(checkedout) else 0
+
+
+class RoutingSession(Session):
+    """Sends plain SELECTs to a replica and everything else to the primary.
+
+    Once the session has written, or its read-your-writes key is inside its
+    window, all statements use the primary. One replica is chosen per
+    session so a request reads from a single consistent source.
+    """
+
+    def __init__(self, router: DatabaseRouter, **kw):
+        super().__init__(**kw)
+        self.router = router
+        self._wrote = False
+        self._replica: Optional[AsyncEngine] = None
+
+    def get_bind(self, mapper=None, clause=None, primary=False, **kw):
+        if self._flushing or isinstance(clause, UpdateBase):
+            self._wrote = True
+        # Text, DDL and bind lookups without a statement also stay on the primary
+        if primary or self._wrote or not isinstance(clause, (Select, CompoundSelect)):
+            return self.router.primary.sync_engine
+
+        # Checked per statement: the key is usually set once the request is authenticated
+        if self.router.is_sticky(self.info.get(READ_YOUR_WRITES_KEY)):
+            return self.router.primary.sync_engine
+        if self._replica is None:
+            self._replica = self.router.choose_replica()
+        return self._replica.sync_engine
+
+    def commit(self):
+        super().commit()
+        key = self.info.get(READ_YOUR_WRITES_KEY)
+        if self._wrote and key is not None:
+            self.router.record_write(key)
+
+
+def is_routed(session) -> bool:
+    return isinstance(getattr(session, "sync_session", session), RoutingSession)
@@ -1,14 +1,75 @@
-from typing import List, Optional
+import re
+from datetime import date, datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import bindparam, case, column, delete, func, insert, literal_column, select, table, text, update, and_, or_
 
-from ..domain.entities import Todo
+from ..domain.entities import Todo, TodoBatchResult, TodoStats, TodoStatsBucket, TodoTombstone
 from ..domain.repositories import TodoRepository
-from .models import TodoModel
+from .models import (
+    SQLITE_BULK_INSERT_DML,
+    SQLITE_INSERT_TRIGGERS,
+    TodoCounterModel,
+    TodoDailyCounterModel,
+    TodoModel,
+    TodoTombstoneModel,
+)
+from .routing import PRIMARY
+
+
+# Plain columns for list reads: rows skip ORM identity-map bookkeeping and
+# are trusted enough to build entities without re-validating them.
+TODO_COLUMNS = [getattr(TodoModel, name) for name in Todo.model_fields]
+IMPORT_COLUMNS = list(Todo.model_fields)
+
+
+def row_to_todo(row) -> Todo:
+    return Todo.model_construct(**row._mapping)
+
+
+# SQLite FTS5 index kept in sync by triggers, see models.py
+todos_fts = table("todos_fts", column("rowid"))
+
+_SEARCH_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def fts5_match_expression(query: str) -> Optional[str]:
+    """Turn free text into an FTS5 query that can't trip over its syntax.
+
+    Every word is quoted (so `AND`, `-` or `"` are searched for, not
+    interpreted) and the last one is a prefix match, which suits
+    search-as-you-type. Returns None when the query has no words.
+    """
+    tokens = _SEARCH_TOKEN.findall(query)
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def like_pattern(word: str) -> str:
+    """A LIKE pattern (escaped with backslash) matching `word` anywhere."""
+    escaped = word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def period_start(day: date, group_by: str) -> date:
+    """The first day of the day or (Monday-based) week containing `day`."""
+    return day - timedelta(days=day.weekday()) if group_by == "week" else day
+
+
+def _as_date(value: Any) -> date:
+    # date() on SQLite returns text, date_trunc() on PostgreSQL a timestamp
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    return value.date() if isinstance(value, datetime) else value
 
 
 class SQLAlchemyTodoRepository(TodoRepository):
+    STREAM_BATCH_SIZE = 500
+
     def __init__(self, session: AsyncSession):
         self.session = session
 
@@ -28,15 +89,97 @@ class SQLAlchemyTodoRepository(TodoRepository):
 
         return Todo.model_validate(db_todo)
 
-    async def get_todos_by_user_id(self, user_id: UUID) -> List[Todo]:
-        result = await self.session.execute(
-            select(TodoModel).where(TodoModel.user_id == user_id)
+    async def get_todos_by_user_id(
+        self,
+        user_id: UUID,
+        completed: Optional[bool] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        cursor: Optional[Tuple[datetime, UUID]] = None,
+        limit: Optional[int] = None,
+    ) -> List[Todo]:
+        query = select(*TODO_COLUMNS).where(TodoModel.user_id == user_id)
+
+        if completed is not None:
+            query = query.where(TodoModel.completed == completed)
+        if created_after is not None:
+            query = query.where(TodoModel.created_at >= created_after)
+        if created_before is not None:
+            query = query.where(TodoModel.created_at < created_before)
+        if cursor is not None:
+            cursor_created_at, cursor_id = cursor
+            query = query.where(
+                or_(
+                    TodoModel.created_at > cursor_created_at,
+                    and_(
+                        TodoModel.created_at == cursor_created_at,
+                        TodoModel.id > cursor_id,
+                    ),
+                )
+            )
+
+        query = query.order_by(TodoModel.created_at, TodoModel.id)
+        if limit is not None:
+            query = query.limit(limit)
+
+        result = await self.session.execute(query)
+
+        return [row_to_todo(row) for row in result]
+
+    async def stream_todos_by_user_id(self, user_id: UUID) -> AsyncIterator[Todo]:
+        result = await self.session.stream(
+            select(*TODO_COLUMNS)
+            .where(TodoModel.user_id == user_id)
+            .order_by(TodoModel.created_at, TodoModel.id)
+            .execution_options(yield_per=self.STREAM_BATCH_SIZE)
         )
-        db_todos = result.scalars().all()
+        async for row in result:
+            yield row_to_todo(row)
 
-        return [Todo.model_validate(todo) for todo in db_todos]
+    async def search_todos(self, user_id: UUID, query: str, limit: int, offset: int = 0) -> List[Todo]:
+        dialect = self.session.get_bind().dialect.name
+        if dialect == "sqlite":
+            match = fts5_match_expression(query)
+            if match is None:
+                return []
+            # The external-content FTS table shares rowids with `todos`;
+            # bm25() is lower for better matches, titles weigh double
+            statement = (
+                select(*TODO_COLUMNS)
+                .select_from(TodoModel.__table__.join(
+                    todos_fts, todos_fts.c.rowid == literal_column("todos.rowid")
+                ))
+                .where(literal_column("todos_fts").op("MATCH")(match), TodoModel.user_id == user_id)
+                .order_by(func.bm25(literal_column("todos_fts"), 2.0, 1.0), TodoModel.id)
+            )
+        elif dialect == "postgresql":
+            ts_query = func.websearch_to_tsquery("english", query)
+            search_vector = literal_column("todos.search_vector")
+            statement = (
+                select(*TODO_COLUMNS)
+                .where(search_vector.op("@@")(ts_query), TodoModel.user_id == user_id)
+                .order_by(func.ts_rank(search_vector, ts_query).desc(), TodoModel.id)
+            )
+        else:
+            # No full-text index: every word must appear in the title or the
+            # description, newest todos first. Scans the user's todos.
+            words = _SEARCH_TOKEN.findall(query)
+            if not words:
+                return []
+            statement = (
+                select(*TODO_COLUMNS)
+                .where(TodoModel.user_id == user_id, *[
+                    or_(TodoModel.title.ilike(pattern, escape="\\"),
+                        TodoModel.description.ilike(pattern, escape="\\"))
+                    for pattern in (like_pattern(word) for word in words)
+                ])
+                .order_by(TodoModel.created_at.desc(), TodoModel.id)
+            )
 
-    async def get_todo_by_id(self, todo_id: UUID) -> Optional[Todo]:
+        result = await self.session.execute(statement.limit(limit).offset(offset))
+        return [row_to_todo(row) for row in result]
+
+    async def get_todo_by_id(self, todo_id: UUID, fresh: bool = False) -> Optional[Todo]:
         result = await self.session.execute(
             select(TodoModel).where(TodoModel.id == todo_id)
         )
@@ -46,30 +189,319 @@ class SQLAlchemyTodoRepository(TodoRepository):
             return Todo.model_validate(db_todo)
         return None
 
-    async def update_todo(self, todo: Todo) -> Todo:
-        result = await self.session.execute(
-            select(TodoModel).where(TodoModel.id == todo.id)
+    async def get_changes(
+        self,
+        user_id: UUID,
+        since: Optional[Tuple[datetime, UUID]],
+        until: datetime,
+        limit: int,
+    ) -> Tuple[List[Todo], List[TodoTombstone]]:
+        todos = select(*TODO_COLUMNS).where(TodoModel.user_id == user_id, TodoModel.updated_at <= until)
+        tombstones = select(TodoTombstoneModel.todo_id, TodoTombstoneModel.deleted_at).where(
+            TodoTombstoneModel.user_id == user_id, TodoTombstoneModel.deleted_at <= until
         )
-        db_todo = result.scalar_one()
+        if since is not None:
+            since_at, since_id = since
+            todos = todos.where(or_(
+                TodoModel.updated_at > since_at,
+                and_(TodoModel.updated_at == since_at, TodoModel.id > since_id),
+            ))
+            tombstones = tombstones.where(or_(
+                TodoTombstoneModel.deleted_at > since_at,
+                and_(TodoTombstoneModel.deleted_at == since_at, TodoTombstoneModel.todo_id > since_id),
+            ))
 
-        db_todo.title = todo.title
-        db_todo.description = todo.description
-        db_todo.completed = todo.completed
-        db_todo.updated_at = todo.updated_at
+        todo_rows = await self.session.execute(
+            todos.order_by(TodoModel.updated_at, TodoModel.id).limit(limit)
+        )
+        changed = [row_to_todo(row) for row in todo_rows]
+        tombstone_rows = await self.session.execute(
+            tombstones.order_by(TodoTombstoneModel.deleted_at, TodoTombstoneModel.todo_id).limit(limit)
+        )
+        deleted = [TodoTombstone(id=todo_id, deleted_at=deleted_at) for todo_id, deleted_at in tombstone_rows]
+        return changed, deleted
 
+    async def purge_tombstones(self, deleted_before: datetime) -> int:
+        result = await self.session.execute(
+            delete(TodoTombstoneModel).where(TodoTombstoneModel.deleted_at < deleted_before)
+        )
         await self.session.commit()
-        await self.session.refresh(db_todo)
+        return result.rowcount
 
-        return Todo.model_validate(db_todo)
+    async def _add_tombstones(self, deleted: List[Tuple[UUID, UUID]]) -> None:
+        if deleted:
+            now = datetime.utcnow()
+            await self.session.execute(
+                insert(TodoTombstoneModel.__table__),
+                [{"todo_id": todo_id, "user_id": user_id, "deleted_at": now} for todo_id, user_id in deleted],
+            )
 
-    async def delete_todo(self, todo_id: UUID) -> bool:
+    async def get_stats(
+        self,
+        user_id: UUID,
+        group_by: str = "day",
+        since: Optional[date] = None,
+        until: Optional[date] = None,
+    ) -> TodoStats:
+        # Reads the counters the todos triggers maintain: one row for the
+        # totals and one per day with todos, however many todos there are
         result = await self.session.execute(
-            select(TodoModel).where(TodoModel.id == todo_id)
+            select(TodoCounterModel.total, TodoCounterModel.completed).where(TodoCounterModel.user_id == user_id)
+        )
+        stats = TodoStats(group_by=group_by)
+        totals = result.one_or_none()
+        if totals is not None:
+            stats.total, stats.completed = totals
+
+        query = (
+            select(TodoDailyCounterModel.day, TodoDailyCounterModel.created, TodoDailyCounterModel.completed)
+            .where(TodoDailyCounterModel.user_id == user_id, TodoDailyCounterModel.created > 0)
+            .order_by(TodoDailyCounterModel.day)
+        )
+        if since is not None:
+            query = query.where(TodoDailyCounterModel.day >= since)
+        if until is not None:
+            query = query.where(TodoDailyCounterModel.day <= until)
+        buckets: Dict[date, TodoStatsBucket] = {}
+        for day, created, completed in await self.session.execute(query):
+            period = period_start(day, group_by)
+            bucket = buckets.get(period)
+            if bucket is None:
+                bucket = buckets[period] = TodoStatsBucket(period=period)
+            bucket.created += created
+            bucket.completed += completed
+        stats.buckets = list(buckets.values())
+        return stats
+
+    async def aggregate_stats(
+        self,
+        user_id: UUID,
+        group_by: str = "day",
+        since: Optional[date] = None,
+        until: Optional[date] = None,
+    ) -> TodoStats:
+        """`get_stats` computed from the todos themselves with GROUP BY.
+
+        Reads every todo of the user; kept to check and benchmark the
+        counters against.
+        """
+        if self.session.get_bind().dialect.name == "postgresql":
+            period = func.date_trunc(group_by, TodoModel.created_at)
+        elif group_by == "week":
+            period = func.date(TodoModel.created_at, "weekday 0", "-6 days")
+        else:
+            period = func.date(TodoModel.created_at)
+        completed = func.coalesce(func.sum(case((TodoModel.completed, 1), else_=0)), 0)
+
+        result = await self.session.execute(
+            select(func.count(TodoModel.id), completed).where(TodoModel.user_id == user_id)
+        )
+        total, total_completed = result.one()
+        query = select(period, func.count(TodoModel.id), completed).where(TodoModel.user_id == user_id)
+        if since is not None:
+            query = query.where(TodoModel.created_at >= datetime.combine(since, datetime.min.time()))
+        if until is not None:
+            query = query.where(TodoModel.created_at < datetime.combine(until + timedelta(days=1), datetime.min.time()))
+        rows = await self.session.execute(query.group_by(period).order_by(period))
+        return TodoStats(
+            total=total,
+            completed=total_completed,
+            group_by=group_by,
+            buckets=[
+                TodoStatsBucket(period=_as_date(day), created=created, completed=done)
+                for day, created, done in rows
+            ],
+        )
+
+    async def get_collection_version(self, user_id: UUID) -> Tuple[Optional[datetime], int]:
+        # One row kept current by triggers, rather than an aggregate over every todo
+        result = await self.session.execute(
+            select(TodoCounterModel.last_modified, TodoCounterModel.total)
+            .where(TodoCounterModel.user_id == user_id)
+        )
+        row = result.first()
+        if row is None:
+            return None, 0
+        return row.last_modified, row.total
+
+    def _owned_by(self, todo_id: UUID, user_id: UUID, expected_updated_at: Optional[List[datetime]]):
+        criteria = [TodoModel.id == todo_id, TodoModel.user_id == user_id]
+        if expected_updated_at is not None:
+            criteria.append(TodoModel.updated_at.in_(expected_updated_at))
+        return criteria
+
+    async def update_todo(
+        self,
+        todo_id: UUID,
+        user_id: UUID,
+        changes: Dict[str, Any],
+        expected_updated_at: Optional[List[datetime]] = None,
+    ) -> Optional[Todo]:
+        result = await self.session.execute(
+            update(TodoModel)
+            .where(*self._owned_by(todo_id, user_id, expected_updated_at))
+            .values(**changes)
+            .returning(TodoModel)
+            .execution_options(synchronize_session=False)
         )
         db_todo = result.scalar_one_or_none()
+        todo = Todo.model_validate(db_todo) if db_todo else None
+        await self.session.commit()
 
-        if db_todo:
-            await self.session.delete(db_todo)
-            await self.session.commit()
-            return True
-        return False
+        return todo
+
+    async def delete_todo(
+        self,
+        todo_id: UUID,
+        user_id: UUID,
+        expected_updated_at: Optional[List[datetime]] = None,
+    ) -> bool:
+        result = await self.session.execute(
+            delete(TodoModel)
+            .where(*self._owned_by(todo_id, user_id, expected_updated_at))
+            .returning(TodoModel.id)
+            .execution_options(synchronize_session=False)
+        )
+        deleted = result.scalar_one_or_none() is not None
+        if deleted:
+            await self._add_tombstones([(todo_id, user_id)])
+        await self.session.commit()
+
+        return deleted
+
+    async def _execute_updates(self, updates: Dict[UUID, Dict[str, Any]], user_id: Optional[UUID] = None) -> None:
+        # One executemany per distinct set of changed columns
+        table = TodoModel.__table__
+        criteria = [table.c.id == bindparam("match_id")]
+        if user_id is not None:
+            criteria.append(table.c.user_id == bindparam("match_user_id"))
+
+        groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+        for todo_id, changes in updates.items():
+            columns = tuple(sorted(changes))
+            params = {f"new_{column}": changes[column] for column in columns}
+            params["match_id"] = todo_id
+            if user_id is not None:
+                params["match_user_id"] = user_id
+            groups.setdefault(columns, []).append(params)
+
+        for columns, params in groups.items():
+            await self.session.execute(
+                update(table)
+                .where(*criteria)
+                .values({column: bindparam(f"new_{column}") for column in columns}),
+                params,
+            )
+
+    async def bulk_write_todos(
+        self,
+        user_id: UUID,
+        creates: List[Todo],
+        updates: Dict[UUID, Dict[str, Any]],
+        deletes: List[UUID],
+    ) -> TodoBatchResult:
+        batch = TodoBatchResult()
+        table = TodoModel.__table__
+
+        if creates:
+            await self.session.execute(
+                insert(table),
+                [todo.model_dump() for todo in creates],
+            )
+            batch.created = list(creates)
+
+        if updates:
+            await self._execute_updates(updates, user_id)
+            result = await self.session.execute(
+                select(TodoModel).where(TodoModel.id.in_(list(updates)), TodoModel.user_id == user_id)
+            )
+            batch.updated = {db_todo.id: Todo.model_validate(db_todo) for db_todo in result.scalars()}
+
+        if deletes:
+            result = await self.session.execute(
+                delete(TodoModel)
+                .where(TodoModel.id.in_(deletes), TodoModel.user_id == user_id)
+                .returning(TodoModel.id)
+                .execution_options(synchronize_session=False)
+            )
+            batch.deleted = set(result.scalars())
+            await self._add_tombstones([(todo_id, user_id) for todo_id in batch.deleted])
+
+        missed = (set(updates) - set(batch.updated)) | (set(deletes) - batch.deleted)
+        if missed:
+            result = await self.session.execute(
+                select(TodoModel.id).where(TodoModel.id.in_(missed))
+            )
+            batch.forbidden = set(result.scalars())
+
+        await self.session.commit()
+        return batch
+
+    async def insert_todos(self, todos: List[Todo], offline: bool = False) -> None:
+        if not todos:
+            return
+        connection = await self.session.connection(bind_arguments=PRIMARY)
+        if offline and connection.dialect.name == "postgresql" and connection.dialect.driver == "asyncpg":
+            # COPY skips per-row statement overhead entirely
+            raw_connection = await connection.get_raw_connection()
+            await raw_connection.driver_connection.copy_records_to_table(
+                TodoModel.__tablename__,
+                columns=IMPORT_COLUMNS,
+                records=[tuple(getattr(todo, column) for column in IMPORT_COLUMNS) for todo in todos],
+            )
+        elif offline and connection.dialect.name == "sqlite":
+            await self._insert_without_row_triggers([todo.model_dump() for todo in todos])
+        else:
+            # One prepared statement, executed once per row by the driver,
+            # with the search index and counters kept by their usual triggers
+            await self.session.execute(insert(TodoModel.__table__), [todo.model_dump() for todo in todos])
+        await self.session.commit()
+
+    async def _insert_without_row_triggers(self, rows: List[Dict[str, Any]]) -> None:
+        """executemany with the search index and counters updated once per batch, see models.py."""
+        # DDL outside a transaction would commit on its own; a savepoint opens one if needed
+        await self.session.execute(text("SAVEPOINT bulk_insert"))
+        for name in SQLITE_INSERT_TRIGGERS:
+            await self.session.execute(text(f"DROP TRIGGER {name}"))
+        after_rowid = (await self.session.execute(text("SELECT coalesce(max(rowid), 0) FROM todos"))).scalar()
+        await self.session.execute(insert(TodoModel.__table__), rows)
+        for statement in SQLITE_BULK_INSERT_DML:
+            await self.session.execute(text(statement), {"after_rowid": after_rowid})
+        for statement in SQLITE_INSERT_TRIGGERS.values():
+            await self.session.execute(text(statement))
+
+    async def apply_write_batch(
+        self,
+        creates: List[Todo],
+        updates: Dict[UUID, Dict[str, Any]],
+        deletes: List[UUID],
+    ) -> None:
+        """Write changes whose ownership was already checked, in one transaction.
+
+        Used by the write-behind queue. Creates whose id already exists are
+        skipped and updates or deletes of missing rows match nothing, so
+        replaying a journal that was partly applied is harmless.
+        """
+        if creates:
+            result = await self.session.execute(
+                select(TodoModel.id).where(TodoModel.id.in_([todo.id for todo in creates])),
+                bind_arguments=PRIMARY,
+            )
+            existing = set(result.scalars())
+            rows = [todo.model_dump() for todo in creates if todo.id not in existing]
+            if rows:
+                await self.session.execute(insert(TodoModel.__table__), rows)
+
+        if updates:
+            await self._execute_updates(updates)
+
+        if deletes:
+            result = await self.session.execute(
+                delete(TodoModel)
+                .where(TodoModel.id.in_(deletes))
+                .returning(TodoModel.id, TodoModel.user_id)
+                .execution_options(synchronize_session=False)
+            )
+            await self._add_tombstones(list(result))
+
+        await self.session.commit()
@@ -6,6 +6,7 @@ from sqlalchemy import select
 from ..domain.entities import User
 from ..domain.repositories import UserRepository
 from .models import UserModel
+from .routing import PRIMARY, is_routed
 
 
 class SQLAlchemyUserRepository(UserRepository):
@@ -28,21 +29,22 @@ class SQLAlchemyUserRepository(UserRepository):
 
         return User.model_validate(db_user)
 
+    async def _find_user(self, query) -> Optional[UserModel]:
+        db_user = (await self.session.execute(query)).scalar_one_or_none()
+        if db_user is None and is_routed(self.session):
+            # A user who just registered may not have reached the replica yet
+            db_user = (await self.session.execute(query, bind_arguments=PRIMARY)).scalar_one_or_none()
+        return db_user
+
     async def get_user_by_email(self, email: str) -> Optional[User]:
-        result = await self.session.execute(
-            select(UserModel).where(UserModel.email == email)
-        )
-        db_user = result.scalar_one_or_none()
+        db_user = await self._find_user(select(UserModel).where(UserModel.email == email))
 
         if db_user:
             return User.model_validate(db_user)
         return None
 
     async def get_user_by_id(self, user_id: UUID) -> Optional[User]:
-        result = await self.session.execute(
-            select(UserModel).where(UserModel.id == user_id)
-        )
-        db_user = result.scalar_one_or_none()
+        db_user = await self._find_user(select(UserModel).where(UserModel.id == user_id))
 
         if db_user:
             return User.model_validate(db_user)
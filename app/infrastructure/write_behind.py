@@ -0,0 +1,527 @@
+import asyncio
+import glob
+import json
+import logging
+import os
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+from uuid import UUID
+
+from pydantic_core import to_json
+
+from ..domain.entities import Todo, TodoBatchResult, TodoStats, TodoTombstone
+from ..domain.exceptions import ServiceBusyError
+from ..domain.repositories import TodoRepository
+from .todo_repository import SQLAlchemyTodoRepository
+
+try:
+    import fcntl
+except ImportError:  # Windows: journals of dead workers are not picked up
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PendingTodo:
+    user_id: UUID
+    # None once deleted
+    todo: Optional[Todo]
+    created: bool = False
+    changed: Set[str] = field(default_factory=set)
+
+
+class TodoWriteQueue:
+    """In-process write-behind buffer for todo mutations.
+
+    Mutations update an in-memory overlay and are appended to a journal
+    (fsync'd once per group of concurrent writes) before the caller gets an
+    answer. A background task writes everything pending in one transaction
+    when `max_batch_size` todos are dirty or `max_latency` seconds after the
+    first pending write. Repeated writes to one todo are coalesced: a create
+    followed by updates is a single INSERT, a create followed by a delete
+    never reaches the database.
+
+    Each worker writes its own journal file in `journal_dir` and holds a lock
+    on it. On start, journals left behind by dead workers are replayed.
+    Without a `journal_dir`, queued writes are lost if the process dies.
+
+    A batch the database keeps refusing is never dropped: it goes back into
+    the queue and its journal entries stay, and flushing is retried with a
+    backoff of up to `max_backoff` seconds. Meanwhile readers waiting for
+    queued writes get ServiceBusyError.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable,
+        journal_dir: Optional[str] = None,
+        max_latency: float = 0.05,
+        max_batch_size: int = 500,
+        max_retries: int = 3,
+        max_backoff: float = 30.0,
+    ):
+        self.session_factory = session_factory
+        self.journal_dir = journal_dir
+        self.max_latency = max_latency
+        self.max_batch_size = max_batch_size
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+        self.flushes = 0
+        self.flushed_writes = 0
+        self.failed_flushes = 0
+        # Failed flushes since the last one that succeeded
+        self.consecutive_failures = 0
+        self.last_error: Optional[str] = None
+        self._pending: Dict[UUID, _PendingTodo] = {}
+        self._in_flight: Dict[UUID, _PendingTodo] = {}
+        self._user_seq: Dict[UUID, int] = {}
+        self._seq = 0
+        self._flushed_seq = 0
+        self._journal = None
+        self._journal_path: Optional[str] = None
+        self._journal_lines: List[bytes] = []
+        self._journal_waiters: List[asyncio.Future] = []
+        self._journal_task: Optional[asyncio.Task] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._flush_now: Optional[asyncio.Event] = None
+        self._flushed: Optional[asyncio.Condition] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+
+    # Lifecycle
+
+    async def start(self) -> None:
+        if self._flusher is not None:
+            return
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._flusher is not None:
+                return
+            self._wake = asyncio.Event()
+            self._flush_now = asyncio.Event()
+            self._flushed = asyncio.Condition()
+            if self.journal_dir:
+                os.makedirs(self.journal_dir, exist_ok=True)
+                await self._replay_orphaned_journals()
+                if self._journal is None:
+                    self._open_journal()
+            self._flusher = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Write out everything pending and stop the background task."""
+        if self._flusher is None:
+            return
+        try:
+            await self.flush()
+            unsaved = 0
+        except ServiceBusyError:
+            unsaved = len(self._pending) + len(self._in_flight)
+        self._flusher.cancel()
+        try:
+            await self._flusher
+        except asyncio.CancelledError:
+            pass
+        self._flusher = None
+        self._start_lock = None
+        if unsaved:
+            logger.error(
+                "Stopping with %d todo writes not in the database; %s", unsaved,
+                f"{self._journal_path} replays them on the next start" if self._journal else "they are lost",
+            )
+        if self._journal is not None:
+            self._journal.close()
+            if not unsaved:
+                os.remove(self._journal_path)
+            self._journal = None
+
+    def _open_journal(self) -> None:
+        self._journal_path = os.path.join(self.journal_dir, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.journal")
+        self._journal = open(self._journal_path, "ab")
+        if fcntl is not None:
+            fcntl.flock(self._journal.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    async def _replay_orphaned_journals(self) -> None:
+        if fcntl is None:
+            return
+        for path in sorted(glob.glob(os.path.join(self.journal_dir, "*.journal"))):
+            with open(path, "rb") as f:
+                try:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    continue  # held by a live worker
+                if await self._replay(f, path):
+                    os.remove(path)
+
+    async def _replay(self, f, path: str) -> bool:
+        """Apply a dead worker's journal; False if the database would not take it."""
+        records, checkpoint = [], 0
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break  # torn final line, never acknowledged
+            if "checkpoint" in record:
+                checkpoint = max(checkpoint, record["checkpoint"])
+            else:
+                records.append(record)
+        for record in records:
+            if record["seq"] <= checkpoint:
+                continue
+            if record["op"] == "delete":
+                self._apply(UUID(record["id"]), UUID(record["user_id"]), None)
+            else:
+                self._apply(
+                    UUID(record["todo"]["id"]),
+                    UUID(record["todo"]["user_id"]),
+                    Todo.model_validate(record["todo"]),
+                    created=record["op"] == "create",
+                    changed=record.get("changed", ()),
+                )
+        if not self._pending:
+            return True
+        logger.warning("Replaying %d todo writes from %s", len(self._pending), path)
+        if await self._flush_once():
+            return True
+        # The file stays, and is replayed by the next worker to start
+        logger.error("Keeping %s, its writes could not be replayed", path)
+        self._pending = {}
+        self._user_seq = {}
+        self._flushed_seq = self._seq
+        return False
+
+    # Writes
+
+    def pending_todo(self, todo_id: UUID) -> Tuple[bool, Optional[Todo]]:
+        """(known, todo): the queued state of a todo not yet in the database."""
+        entry = self._pending.get(todo_id) or self._in_flight.get(todo_id)
+        if entry is None:
+            return False, None
+        return True, entry.todo
+
+    def _apply(self, todo_id: UUID, user_id: UUID, todo: Optional[Todo],
+               created: bool = False, changed=()) -> int:
+        entry = self._pending.get(todo_id)
+        if entry is None:
+            entry = self._pending[todo_id] = _PendingTodo(user_id=user_id, todo=todo, created=created)
+        entry.todo = todo
+        entry.changed.update(changed)
+        if todo is None and entry.created:
+            # Created and deleted before it was ever written
+            del self._pending[todo_id]
+
+        self._seq += 1
+        self._user_seq[user_id] = self._seq
+        self._wake.set()
+        if len(self._pending) >= self.max_batch_size:
+            self._flush_now.set()
+        return self._seq
+
+    async def create(self, todo: Todo) -> None:
+        await self.start()
+        seq = self._apply(todo.id, todo.user_id, todo, created=True)
+        await self._append_journal({"seq": seq, "op": "create", "todo": todo})
+
+    async def update(self, todo: Todo, changed: Set[str]) -> None:
+        await self.start()
+        seq = self._apply(todo.id, todo.user_id, todo, changed=changed)
+        await self._append_journal({"seq": seq, "op": "update", "todo": todo, "changed": sorted(changed)})
+
+    async def delete(self, todo_id: UUID, user_id: UUID) -> None:
+        await self.start()
+        seq = self._apply(todo_id, user_id, None)
+        await self._append_journal({"seq": seq, "op": "delete", "id": todo_id, "user_id": user_id})
+
+    # Journal
+
+    async def _append_journal(self, record: Dict[str, Any]) -> None:
+        if self._journal is None:
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._journal_lines.append(to_json(record) + b"\n")
+        self._journal_waiters.append(waiter)
+        if self._journal_task is None or self._journal_task.done():
+            self._journal_task = asyncio.create_task(self._write_journal())
+        await waiter
+
+    async def _write_journal(self) -> None:
+        # Group commit: everything queued while the previous fsync ran shares the next one
+        while self._journal_lines:
+            lines, self._journal_lines = self._journal_lines, []
+            waiters, self._journal_waiters = self._journal_waiters, []
+            try:
+                await asyncio.to_thread(self._sync_journal, b"".join(lines))
+            except Exception as exc:
+                for waiter in waiters:
+                    waiter.set_exception(exc)
+            else:
+                for waiter in waiters:
+                    waiter.set_result(None)
+
+    def _sync_journal(self, data: bytes) -> None:
+        self._journal.write(data)
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+
+    def _checkpoint(self, seq: int) -> None:
+        if self._journal is None:
+            return
+        if not self._pending and not self._journal_lines and (
+            self._journal_task is None or self._journal_task.done()
+        ):
+            self._journal.truncate(0)
+        else:
+            # Not fsync'd: losing it only means replaying writes that are already applied
+            self._journal.write(to_json({"checkpoint": seq}) + b"\n")
+            self._journal.flush()
+
+    # Flushing
+
+    async def _run(self) -> None:
+        while True:
+            await self._wake.wait()
+            # The first pending write starts the max_latency clock; a full
+            # batch or a waiting reader cuts it short
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), self.max_latency)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            self._flush_now.clear()
+            if self._pending and not await self._flush_once():
+                await asyncio.sleep(min(self.max_backoff, self.max_latency * 2 ** self.consecutive_failures))
+                self._wake.set()
+
+    async def _flush_once(self) -> bool:
+        """Write one batch; on failure it is queued again, under any newer writes."""
+        batch, self._pending = self._pending, {}
+        self._in_flight = batch
+        seq = self._seq
+
+        creates: List[Todo] = []
+        updates: Dict[UUID, Dict[str, Any]] = {}
+        deletes: List[UUID] = []
+        for todo_id, entry in batch.items():
+            if entry.todo is None:
+                deletes.append(todo_id)
+            elif entry.created:
+                creates.append(entry.todo)
+            elif entry.changed:
+                updates[todo_id] = {name: getattr(entry.todo, name) for name in entry.changed}
+
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                async with self.session_factory() as session:
+                    await SQLAlchemyTodoRepository(session).apply_write_batch(creates, updates, deletes)
+                break
+            except Exception as exc:
+                if attempt == self.max_retries:
+                    logger.exception("Requeueing %d todo writes after %d failed attempts", len(batch), attempt)
+                    self._requeue(batch)
+                    self._in_flight = {}
+                    self.failed_flushes += 1
+                    self.consecutive_failures += 1
+                    self.last_error = repr(exc)
+                    async with self._flushed:
+                        self._flushed.notify_all()
+                    return False
+                await asyncio.sleep(self.max_latency * attempt)
+
+        self._in_flight = {}
+        self.consecutive_failures = 0
+        self.last_error = None
+        self.flushes += 1
+        self.flushed_writes += len(batch)
+        self._flushed_seq = seq
+        self._user_seq = {user_id: last for user_id, last in self._user_seq.items() if last > seq}
+        self._checkpoint(seq)
+        async with self._flushed:
+            self._flushed.notify_all()
+        return True
+
+    def _requeue(self, batch: Dict[UUID, _PendingTodo]) -> None:
+        # Writes queued during the attempt are newer and win, but a todo
+        # whose INSERT was in the failed batch still has to be created
+        for todo_id, newer in self._pending.items():
+            older = batch.get(todo_id)
+            if older is not None:
+                newer.created = newer.created or older.created
+                newer.changed.update(older.changed)
+                if newer.todo is None and newer.created:
+                    del batch[todo_id]
+                    continue
+            batch[todo_id] = newer
+        self._pending = batch
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "status": "failing" if self.consecutive_failures else "ok",
+            "pending": len(self._pending) + len(self._in_flight),
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+        }
+
+    async def flush(self) -> None:
+        """Wait until everything queued so far is in the database.
+
+        Raises ServiceBusyError when the database is refusing the writes.
+        """
+        await self._wait_for_seq(self._seq)
+
+    async def wait_for_user(self, user_id: UUID) -> None:
+        """Wait until the user's queued writes are in the database, so reads see them."""
+        seq = self._user_seq.get(user_id)
+        if seq is not None:
+            await self._wait_for_seq(seq)
+
+    async def _wait_for_seq(self, seq: int) -> None:
+        if self._flushed_seq >= seq or self._flusher is None:
+            return
+        if self.consecutive_failures:
+            raise ServiceBusyError("Queued todo writes cannot be saved right now, retry later")
+        failures = self.failed_flushes
+        self._wake.set()
+        self._flush_now.set()
+        async with self._flushed:
+            await self._flushed.wait_for(lambda: self._flushed_seq >= seq or self.failed_flushes > failures)
+        if self._flushed_seq < seq:
+            raise ServiceBusyError("Queued todo writes cannot be saved right now, retry later")
+
+
+class WriteBehindTodoRepository(TodoRepository):
+    """Queues creates, updates and deletes instead of committing them.
+
+    Single-todo reads see queued writes immediately. Collection reads
+    first wait for the user's queued writes to reach the database, which
+    takes at most the queue's `max_latency`. Ownership and `If-Match`
+    checks run against the queued state of this worker; other workers see
+    a write once it has been flushed.
+    """
+
+    def __init__(self, repository: TodoRepository, queue: TodoWriteQueue):
+        self.repository = repository
+        self.queue = queue
+
+    async def _current(self, todo_id: UUID, fresh: bool = False) -> Optional[Todo]:
+        known, todo = self.queue.pending_todo(todo_id)
+        if known:
+            return todo
+        todo = await self.repository.get_todo_by_id(todo_id, fresh=fresh)
+        # Another request may have queued a write while we were reading
+        known, queued = self.queue.pending_todo(todo_id)
+        return queued if known else todo
+
+    async def _owned(self, todo_id: UUID, user_id: UUID,
+                     expected_updated_at: Optional[List[datetime]]) -> Optional[Todo]:
+        todo = await self._current(todo_id)
+        if todo is None or todo.user_id != user_id:
+            return None
+        if expected_updated_at is not None and todo.updated_at not in expected_updated_at:
+            return None
+        return todo
+
+    async def create_todo(self, todo: Todo) -> Todo:
+        await self.queue.create(todo)
+        return todo
+
+    async def get_todos_by_user_id(
+        self,
+        user_id: UUID,
+        completed: Optional[bool] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        cursor: Optional[Tuple[datetime, UUID]] = None,
+        limit: Optional[int] = None,
+    ) -> List[Todo]:
+        await self.queue.wait_for_user(user_id)
+        return await self.repository.get_todos_by_user_id(
+            user_id,
+            completed=completed,
+            created_after=created_after,
+            created_before=created_before,
+            cursor=cursor,
+            limit=limit,
+        )
+
+    async def stream_todos_by_user_id(self, user_id: UUID) -> AsyncIterator[Todo]:
+        await self.queue.wait_for_user(user_id)
+        async for todo in self.repository.stream_todos_by_user_id(user_id):
+            yield todo
+
+    async def search_todos(self, user_id: UUID, query: str, limit: int, offset: int = 0) -> List[Todo]:
+        await self.queue.wait_for_user(user_id)
+        return await self.repository.search_todos(user_id, query, limit, offset)
+
+    async def get_changes(
+        self,
+        user_id: UUID,
+        since: Optional[Tuple[datetime, UUID]],
+        until: datetime,
+        limit: int,
+    ) -> Tuple[List[Todo], List[TodoTombstone]]:
+        await self.queue.wait_for_user(user_id)
+        return await self.repository.get_changes(user_id, since, until, limit)
+
+    async def purge_tombstones(self, deleted_before: datetime) -> int:
+        return await self.repository.purge_tombstones(deleted_before)
+
+    async def get_stats(
+        self,
+        user_id: UUID,
+        group_by: str = "day",
+        since: Optional[date] = None,
+        until: Optional[date] = None,
+    ) -> TodoStats:
+        # The counters only move when queued writes are committed
+        await self.queue.wait_for_user(user_id)
+        return await self.repository.get_stats(user_id, group_by, since, until)
+
+    async def get_todo_by_id(self, todo_id: UUID, fresh: bool = False) -> Optional[Todo]:
+        return await self._current(todo_id, fresh=fresh)
+
+    async def get_collection_version(self, user_id: UUID) -> Tuple[Optional[datetime], int]:
+        await self.queue.wait_for_user(user_id)
+        return await self.repository.get_collection_version(user_id)
+
+    async def update_todo(
+        self,
+        todo_id: UUID,
+        user_id: UUID,
+        changes: Dict[str, Any],
+        expected_updated_at: Optional[List[datetime]] = None,
+    ) -> Optional[Todo]:
+        todo = await self._owned(todo_id, user_id, expected_updated_at)
+        if todo is None:
+            return None
+        todo = todo.model_copy(update=changes)
+        await self.queue.update(todo, set(changes))
+        return todo
+
+    async def delete_todo(
+        self,
+        todo_id: UUID,
+        user_id: UUID,
+        expected_updated_at: Optional[List[datetime]] = None,
+    ) -> bool:
+        if await self._owned(todo_id, user_id, expected_updated_at) is None:
+            return False
+        await self.queue.delete(todo_id, user_id)
+        return True
+
+    async def bulk_write_todos(
+        self,
+        user_id: UUID,
+        creates: List[Todo],
+        updates: Dict[UUID, Dict[str, Any]],
+        deletes: List[UUID],
+    ) -> TodoBatchResult:
+        # Already a single transaction; only make sure it applies on top of queued writes
+        await self.queue.wait_for_user(user_id)
+        return await self.repository.bulk_write_todos(user_id, creates, updates, deletes)
+
+    async def insert_todos(self, todos: List[Todo], offline: bool = False) -> None:
+        # New rows cannot collide with queued writes; bypassing the queue keeps imports fast
+        await self.repository.insert_todos(todos, offline=offline)
@@ -1,16 +1,27 @@
 from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, Response, status
+from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 import os
 
+from .. import metrics
 from ..infrastructure.database import get_async_session
+from ..infrastructure.denylist_backend import create_denylist_backend
+from ..infrastructure.routing import READ_YOUR_WRITES_KEY
 from ..infrastructure.user_repository import SQLAlchemyUserRepository
+from ..application.auth_cache import AuthCache
 from ..application.auth_service import AuthService
-from ..domain.exceptions import UserAlreadyExistsError, InvalidCredentialsError
-from .schemas import UserCreate, UserResponse, Token
+from ..application.jwt_codec import ASYMMETRIC_ALGORITHMS, JWTCodec, read_key_file
+from ..application.password_hasher import PasswordHasher
+from ..application.token_denylist import TokenDenylist
+from ..domain.exceptions import UserAlreadyExistsError, InvalidCredentialsError, ServiceBusyError
+from .rate_limit import rate_limit
+from .schemas import LogoutRequest, RefreshTokenRequest, UserCreate, UserResponse, Token
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
+well_known_router = APIRouter(tags=["authentication"])
 
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl="/auth/token",
@@ -19,29 +30,143 @@ oauth2_scheme = OAuth2PasswordBearer(
 
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
+# RS256 and EdDSA sign with this PEM private key instead of SECRET_KEY
+JWT_PRIVATE_KEY_FILE = os.getenv("JWT_PRIVATE_KEY_FILE", "")
+# Defaults to the key's RFC 7638 thumbprint
+JWT_KEY_ID = os.getenv("JWT_KEY_ID", "") or None
+# Comma separated PEM public keys of the same algorithm, rotated out but still accepted
+JWT_PREVIOUS_PUBLIC_KEY_FILES = [
+    path.strip() for path in os.getenv("JWT_PREVIOUS_PUBLIC_KEY_FILES", "").split(",") if path.strip()
+]
+JWKS_MAX_AGE_SECONDS = int(os.getenv("JWKS_MAX_AGE_SECONDS", "300"))
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+# 0 stops issuing refresh tokens
+REFRESH_TOKEN_EXPIRE_DAYS = float(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
+TOKEN_DENYLIST_BACKEND = os.getenv("TOKEN_DENYLIST_BACKEND", "memory")
+TOKEN_DENYLIST_CAPACITY = int(os.getenv("TOKEN_DENYLIST_CAPACITY", "100000"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "30"))
+AUTH_CACHE_MAX_SIZE = int(os.getenv("AUTH_CACHE_MAX_SIZE", "10000"))
+AUTH_TRUST_TOKEN_CLAIMS = os.getenv("AUTH_TRUST_TOKEN_CLAIMS", "False").lower() == "true"
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "0")) or None
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+PASSWORD_HASH_REJECT_WHEN_BUSY = os.getenv("PASSWORD_HASH_REJECT_WHEN_BUSY", "False").lower() == "true"
+# Each login attempt costs a user lookup and a bcrypt hash
+RATE_LIMIT_LOGIN = os.getenv("RATE_LIMIT_LOGIN", "20/minute")
+RATE_LIMIT_LOGIN_PER_EMAIL = os.getenv("RATE_LIMIT_LOGIN_PER_EMAIL", "5/minute")
+RATE_LIMIT_REGISTER = os.getenv("RATE_LIMIT_REGISTER", "10/hour")
+RATE_LIMIT_REFRESH = os.getenv("RATE_LIMIT_REFRESH", "30/minute")
+
+# Shared by every request in this worker; disabled when the TTL is 0
+auth_cache = AuthCache(max_size=AUTH_CACHE_MAX_SIZE, ttl=AUTH_CACHE_TTL_SECONDS) if AUTH_CACHE_TTL_SECONDS > 0 else None
+
+# bcrypt runs on this pool so logins don't block the event loop
+password_hasher = PasswordHasher(
+    executor=PASSWORD_HASH_EXECUTOR,
+    max_workers=PASSWORD_HASH_WORKERS,
+    max_pending=PASSWORD_HASH_MAX_PENDING,
+    reject_when_busy=PASSWORD_HASH_REJECT_WHEN_BUSY,
+)
+
+
+def _build_jwt_codec() -> JWTCodec:
+    if ALGORITHM not in ASYMMETRIC_ALGORITHMS:
+        return JWTCodec(SECRET_KEY, ALGORITHM)
+    if not JWT_PRIVATE_KEY_FILE:
+        raise RuntimeError(f"ALGORITHM={ALGORITHM} needs JWT_PRIVATE_KEY_FILE")
+    return JWTCodec(
+        read_key_file(JWT_PRIVATE_KEY_FILE, ALGORITHM, kid=JWT_KEY_ID),
+        verification_keys=[read_key_file(path, ALGORITHM) for path in JWT_PREVIOUS_PUBLIC_KEY_FILES],
+    )
+
+
+# Keys are read here and parsed on the first token, then reused by every request
+jwt_codec = _build_jwt_codec()
+
+# Revoked token ids, checked on every authenticated request without a
+# database round trip; its cross-worker listener is started by the app's lifespan.
+# `memory` only covers this worker, so `uv run start` refuses it with several
+token_denylist = TokenDenylist(
+    create_denylist_backend(TOKEN_DENYLIST_BACKEND, redis_url=REDIS_URL),
+    capacity=TOKEN_DENYLIST_CAPACITY,
+)
+
+
+def build_auth_service(session: AsyncSession) -> AuthService:
+    # Only the repository is per request; everything else is shared
+    return AuthService(
+        SQLAlchemyUserRepository(session),
+        SECRET_KEY,
+        ALGORITHM,
+        cache=auth_cache,
+        trust_token_claims=AUTH_TRUST_TOKEN_CLAIMS,
+        password_hasher=password_hasher,
+        jwt_codec=jwt_codec,
+        denylist=token_denylist,
+    )
 
 
 async def get_auth_service(session: AsyncSession = Depends(get_async_session)) -> AuthService:
-    user_repository = SQLAlchemyUserRepository(session)
-    return AuthService(user_repository, SECRET_KEY, ALGORITHM)
+    return build_auth_service(session)
+
+
+def service_busy_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server is busy, please retry later",
+        headers={"Retry-After": "1"},
+    )
+
+
+def unauthorized_exception(detail: str = "Could not validate credentials") -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
 
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    auth_service: AuthService = Depends(get_auth_service)
+    session: AsyncSession = Depends(get_async_session)
 ):
+    # Builds the service itself rather than depending on get_auth_service:
+    # one node less to resolve on every authenticated request
     try:
-        return await auth_service.get_current_user(token)
+        with metrics.timed("auth"):
+            user = await build_auth_service(session).get_current_user(token)
+        # With read replicas, this user's reads stay on the primary for a
+        # moment after they write
+        session.info[READ_YOUR_WRITES_KEY] = user.id
+        return user
     except InvalidCredentialsError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
+        raise unauthorized_exception()
+
+
+def issue_tokens(auth_service: AuthService, user) -> dict:
+    access_token = auth_service.create_access_token(
+        data=auth_service.user_claims(user), expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    tokens = {"access_token": access_token, "token_type": "bearer"}
+    if REFRESH_TOKEN_EXPIRE_DAYS > 0:
+        tokens["refresh_token"] = auth_service.create_refresh_token(
+            user.id, timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
         )
+    return tokens
+
 
+async def login_email(form_data: OAuth2PasswordRequestForm = Depends()) -> str:
+    # Throttles guessing against one account from many addresses
+    return form_data.username.strip().lower()
 
-@router.post("/register", response_model=UserResponse, summary="Register a new user")
+
+@router.post(
+    "/register",
+    response_model=UserResponse,
+    summary="Register a new user",
+    dependencies=[Depends(rate_limit("register", RATE_LIMIT_REGISTER))],
+)
 async def register(
     user_data: UserCreate,
     auth_service: AuthService = Depends(get_auth_service)
@@ -65,9 +190,19 @@ async def register(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except ServiceBusyError:
+        raise service_busy_exception()
 
 
-@router.post("/token", response_model=Token, summary="Login for access token")
+@router.post(
+    "/token",
+    response_model=Token,
+    summary="Login for access token",
+    dependencies=[
+        Depends(rate_limit("login", RATE_LIMIT_LOGIN)),
+        Depends(rate_limit("login_email", RATE_LIMIT_LOGIN_PER_EMAIL, key=login_email)),
+    ],
+)
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     auth_service: AuthService = Depends(get_auth_service)
@@ -84,20 +219,62 @@ async def login(
     **Login credentials:**
     - **username**: Your email address
     - **password**: Your password
+
+    The response also carries a `refresh_token`: exchange it at
+    `/auth/refresh` for a new pair instead of logging in again.
+
+    Attempts are limited per client and per email; over the limit the
+    answer is 429 with a `Retry-After` header.
     """
     try:
         user = await auth_service.authenticate_user(form_data.username, form_data.password)
-        access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = auth_service.create_access_token(
-            data={"sub": str(user.id)}, expires_delta=access_token_expires
-        )
-        return {"access_token": access_token, "token_type": "bearer"}
+        return issue_tokens(auth_service, user)
     except InvalidCredentialsError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect email or password",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise unauthorized_exception("Incorrect email or password")
+    except ServiceBusyError:
+        raise service_busy_exception()
+
+
+@router.post(
+    "/refresh",
+    response_model=Token,
+    summary="Exchange a refresh token for new tokens",
+    dependencies=[Depends(rate_limit("refresh", RATE_LIMIT_REFRESH))],
+)
+async def refresh(
+    request: RefreshTokenRequest,
+    auth_service: AuthService = Depends(get_auth_service)
+):
+    """
+    Get a new access token and refresh token without sending the password.
+
+    Every refresh token works once; keep the new one from the response.
+    A refresh token that was already used or logged out is rejected with 401.
+    """
+    try:
+        user = await auth_service.refresh(request.refresh_token)
+        return issue_tokens(auth_service, user)
+    except InvalidCredentialsError:
+        raise unauthorized_exception()
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT, summary="Revoke your tokens")
+async def logout(
+    request: Optional[LogoutRequest] = Body(None),
+    token: str = Depends(oauth2_scheme),
+    current_user = Depends(get_current_user),
+    auth_service: AuthService = Depends(get_auth_service)
+):
+    """
+    Revoke the access token of this request and, when sent in the body, its
+    `refresh_token`. Both are rejected from then on by this worker, and by
+    every worker when `TOKEN_DENYLIST_BACKEND=redis`.
+    """
+    try:
+        await auth_service.logout(token, request.refresh_token if request is not None else None)
+    except InvalidCredentialsError:
+        raise unauthorized_exception()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
 @router.get("/me", response_model=UserResponse, summary="Get current user info")
@@ -110,3 +287,14 @@ async def read_users_me(current_user = Depends(get_current_user)):
     - Or use the 'Authorize' button at the top of this page
     """
     return UserResponse.model_validate(current_user)
+
+
+@well_known_router.get("/.well-known/jwks.json", summary="Public keys that sign access tokens")
+async def read_jwks():
+    """
+    The public keys (JWK Set) for verifying access tokens without calling
+    this API, e.g. at a gateway. Tokens name their key in the `kid` header;
+    rotated-out keys stay listed until their tokens have expired. Empty
+    while tokens are signed with a shared `SECRET_KEY`.
+    """
+    return JSONResponse(jwt_codec.jwks(), headers={"Cache-Control": f"public, max-age={JWKS_MAX_AGE_SECONDS}"})
@@ -0,0 +1,70 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from typing import List, Optional
+from uuid import UUID
+
+from ..domain.entities import Todo
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _to_micros(value: datetime) -> int:
+    return (value.replace(tzinfo=None) - _EPOCH) // timedelta(microseconds=1)
+
+
+def todo_etag(todo: Todo) -> str:
+    """Strong ETag for one todo: its id plus `updated_at` in microseconds."""
+    return f'"{todo.id.hex}-{_to_micros(todo.updated_at)}"'
+
+
+def collection_etag(user_id: UUID, last_modified: Optional[datetime], count: int, variant: str = "") -> str:
+    """ETag for a user's todo list, derived from the collection version.
+
+    `variant` distinguishes representations of the same collection, such as
+    different filters or pages.
+    """
+    version = f"{user_id.hex}:{_to_micros(last_modified) if last_modified else 0}:{count}:{variant}"
+    return f'"{hashlib.sha1(version.encode()).hexdigest()}"'
+
+
+def http_date(value: datetime) -> str:
+    return format_datetime(value.replace(tzinfo=timezone.utc), usegmt=True)
+
+
+def _split_etags(header: str) -> List[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison, as required for If-None-Match."""
+    if not if_none_match:
+        return False
+    tags = _split_etags(if_none_match)
+    return "*" in tags or any((tag[2:] if tag.startswith("W/") else tag) == etag for tag in tags)
+
+
+def parse_if_match(if_match: Optional[str], todo_id: UUID) -> Optional[List[datetime]]:
+    """Turn an If-Match header into the `updated_at` values the write may apply to.
+
+    Returns None when there is no precondition (header absent or `*`) and an
+    empty list when no tag could refer to this todo.
+    """
+    if not if_match:
+        return None
+    tags = _split_etags(if_match)
+    if "*" in tags:
+        return None
+
+    versions = []
+    for tag in tags:
+        if tag.startswith("W/"):
+            # If-Match requires strong comparison
+            continue
+        try:
+            tag_id, micros = tag.strip('"').split("-")
+            if UUID(tag_id) == todo_id:
+                versions.append(_EPOCH + timedelta(microseconds=int(micros)))
+        except ValueError:
+            continue
+    return versions
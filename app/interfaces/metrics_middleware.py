@@ -0,0 +1,70 @@
+import time
+
+from .. import metrics
+
+
+def _route_template(scope) -> str:
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    if path:
+        return path
+    # Older Starlette versions don't expose the matched route in the scope
+    app = scope.get("app")
+    for candidate in getattr(getattr(app, "router", None), "routes", ()):
+        match, _ = candidate.matches(scope)
+        if match.name == "FULL":
+            return candidate.path
+    return "unmatched"
+
+
+def _server_timing(request_metrics: metrics.RequestMetrics, total: float) -> bytes:
+    entries = [
+        f'db;desc="{request_metrics.query_count} queries";dur={request_metrics.db_time * 1000:.2f}'
+    ]
+    for phase, seconds in request_metrics.phases.items():
+        entries.append(f"{phase};dur={seconds * 1000:.2f}")
+    entries.append(f"app;dur={total * 1000:.2f}")
+    return ", ".join(entries).encode()
+
+
+class MetricsMiddleware:
+    """Records per-route latency, SQL count/time and phase timings.
+
+    Adds a `Server-Timing` header so the breakdown of a single request is
+    visible in browser dev tools. Plain ASGI so streaming responses pass
+    through untouched.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_metrics, token = metrics.start_request()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                total = time.perf_counter() - request_metrics.started
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", _server_timing(request_metrics, total)))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            metrics.end_request(token)
+            elapsed = time.perf_counter() - request_metrics.started
+            method = scope["method"]
+            route = _route_template(scope)
+            metrics.request_duration.observe(elapsed, method, route, str(status_code))
+            metrics.request_db_queries.observe(request_metrics.query_count, method, route)
+            metrics.request_db_duration.observe(request_metrics.db_time, method, route)
+            for phase, seconds in request_metrics.phases.items():
+                metrics.request_phase_duration.observe(seconds, route, phase)
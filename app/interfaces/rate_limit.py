@@ -0,0 +1,122 @@
+import logging
+import math
+import os
+from typing import Callable, Optional
+
+from fastapi import Depends, HTTPException, Request, status
+from starlette.responses import JSONResponse
+
+from .. import metrics
+from ..infrastructure.rate_limit import Rate, RateLimitResult, RateLimitStore, create_rate_limit_store
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_SHARDS = int(os.getenv("RATE_LIMIT_SHARDS", "16"))
+RATE_LIMIT_MAX_KEYS_PER_SHARD = int(os.getenv("RATE_LIMIT_MAX_KEYS_PER_SHARD", "10000"))
+# Per client IP across every route; empty disables the middleware
+RATE_LIMIT_DEFAULT = os.getenv("RATE_LIMIT_DEFAULT", "")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Shared by every request in this worker; None when rate limiting is disabled
+rate_limit_store = create_rate_limit_store(
+    RATE_LIMIT_BACKEND,
+    redis_url=REDIS_URL,
+    shards=RATE_LIMIT_SHARDS,
+    max_keys_per_shard=RATE_LIMIT_MAX_KEYS_PER_SHARD,
+)
+
+# Paths, and the paths below them, the middleware never limits, so probes
+# and scrapers keep working
+EXEMPT_PATHS = ("/health", "/metrics")
+
+
+def retry_after(result: RateLimitResult) -> str:
+    return str(max(1, math.ceil(result.retry_after)))
+
+
+async def check_rate_limit(store: RateLimitStore, name: str, key: str, rate: Rate) -> Optional[RateLimitResult]:
+    """The rejected result, or None when the hit is allowed.
+
+    A failing store lets the request through: an unreachable Redis should
+    not take the API down with it.
+    """
+    try:
+        result = await store.hit(f"{name}:{key}", rate)
+    except Exception:
+        logger.warning("Rate limit store failed, allowing request", exc_info=True)
+        return None
+    if result.allowed:
+        return None
+    metrics.rate_limited_requests.inc(name)
+    return result
+
+
+def client_ip(request: Request) -> str:
+    # Behind a proxy, run uvicorn with --proxy-headers so this is the real client
+    return request.client.host if request.client else "unknown"
+
+
+def rate_limit(name: str, spec: str, key: Callable = client_ip):
+    """Dependency allowing `spec` (e.g. `5/minute`) hits per value of `key`.
+
+    `key` is itself a dependency, e.g. returning the client IP, the user id
+    or the email being logged into. Over the limit the request fails with
+    429 and a `Retry-After` header.
+    """
+    rate = Rate.parse(spec)
+
+    if rate is None:
+        async def unlimited():
+            return None
+        return unlimited
+
+    async def limit(identity: str = Depends(key)):
+        if rate_limit_store is None:
+            return
+        rejected = await check_rate_limit(rate_limit_store, name, identity, rate)
+        if rejected is not None:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, please retry later",
+                headers={"Retry-After": retry_after(rejected)},
+            )
+
+    return limit
+
+
+class RateLimitMiddleware:
+    """Applies one rate per client IP to every HTTP request.
+
+    Runs before routing and authentication, so floods are turned away
+    without touching the database. Plain ASGI so streaming responses pass
+    through untouched.
+    """
+
+    def __init__(self, app, store: RateLimitStore, rate: Rate, exempt_paths=EXEMPT_PATHS):
+        self.app = app
+        self.store = store
+        self.rate = rate
+        self.exempt_paths = frozenset(exempt_paths)
+        self.exempt_prefixes = tuple(path + "/" for path in exempt_paths)
+
+    def is_exempt(self, path: str) -> bool:
+        return path in self.exempt_paths or path.startswith(self.exempt_prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.is_exempt(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get("client")
+        rejected = await check_rate_limit(self.store, "default", client[0] if client else "unknown", self.rate)
+        if rejected is None:
+            await self.app(scope, receive, send)
+            return
+
+        response = JSONResponse(
+            {"detail": "Too many requests, please retry later"},
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            headers={"Retry-After": retry_after(rejected)},
+        )
+        await response(scope, receive, send)
@@ -0,0 +1,45 @@
+from typing import Any, Dict, List
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+
+from .. import metrics
+from ..domain.entities import Todo
+from .schemas import TodoBatchItemResult, TodoResponse
+
+# Todo entities already carry validated data; serializing them with the
+# TodoResponse field set avoids building a second model per row.
+_TODO_RESPONSE_FIELDS = set(TodoResponse.model_fields)
+_todo_list_adapter = TypeAdapter(List[Todo])
+_BATCH_INCLUDE = {
+    "results": {"__all__": {**dict.fromkeys(TodoBatchItemResult.model_fields, True), "todo": _TODO_RESPONSE_FIELDS}}
+}
+
+
+class PydanticJSONResponse(JSONResponse):
+    """JSON response rendered by pydantic-core instead of `json.dumps`.
+
+    Accepts anything pydantic can serialize (models, lists of models, UUIDs,
+    datetimes) or bytes that were serialized beforehand.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return to_json(content)
+
+
+def todo_json(todo: Todo) -> bytes:
+    return todo.model_dump_json(include=_TODO_RESPONSE_FIELDS).encode()
+
+
+def todo_list_json(todos: List[Todo]) -> bytes:
+    with metrics.timed("serialize"):
+        return _todo_list_adapter.dump_json(todos, include={"__all__": _TODO_RESPONSE_FIELDS})
+
+
+def todo_batch_json(results: List[Dict[str, Any]]) -> bytes:
+    """A TodoBatchResponse body from result dicts holding Todo entities under `todo`."""
+    with metrics.timed("serialize"):
+        return to_json({"results": results}, include=_BATCH_INCLUDE)
@@ -1,7 +1,7 @@
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import List, Literal, Optional
 from uuid import UUID
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 
 
 # User schemas
@@ -25,6 +25,15 @@ class UserResponse(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
+
+
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
 
 
 class TokenData(BaseModel):
@@ -54,3 +63,70 @@ class TodoResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class TodoBatchOperation(BaseModel):
+    op: Literal["create", "update", "delete"]
+    id: Optional[UUID] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    completed: Optional[bool] = None
+
+
+class TodoBatchRequest(BaseModel):
+    operations: List[TodoBatchOperation] = Field(..., max_length=1000)
+
+
+class TodoBatchItemResult(BaseModel):
+    index: int
+    op: str
+    id: Optional[UUID] = None
+    status: int
+    detail: Optional[str] = None
+    todo: Optional[TodoResponse] = None
+
+
+class TodoBatchResponse(BaseModel):
+    results: List[TodoBatchItemResult]
+
+
+class TodoTombstoneResponse(BaseModel):
+    id: UUID
+    deleted_at: datetime
+
+
+class TodoChangesResponse(BaseModel):
+    todos: List[TodoResponse]
+    deleted: List[TodoTombstoneResponse]
+    # Pass as `since` on the next call
+    cursor: str
+    has_more: bool
+
+
+class TodoStatsBucketResponse(BaseModel):
+    # First day of the day or week (weeks start on Monday)
+    period: date
+    created: int
+    completed: int
+    completion_rate: float
+
+
+class TodoStatsResponse(BaseModel):
+    total: int
+    completed: int
+    pending: int
+    completion_rate: float
+    group_by: Literal["day", "week"]
+    buckets: List[TodoStatsBucketResponse]
+
+
+class TodoImportRowErrorResponse(BaseModel):
+    row: int
+    detail: str
+
+
+class TodoImportResponse(BaseModel):
+    imported: int
+    failed: int
+    errors: List[TodoImportRowErrorResponse]
+    aborted: Optional[str] = None
@@ -1,12 +1,15 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
-from .interfaces.auth_controller import router as auth_router
-from .interfaces.todo_controller import router as todo_router
+from . import metrics
+from .domain.exceptions import ServiceBusyError
+from .infrastructure.database import dispose_engine, get_engine, get_router, pool_metrics
 
-app = FastAPI(
-    title="Todo List API",
-    description="""
+DESCRIPTION = """
     A Todo List REST API built with FastAPI using Hexagonal Architecture.
 
     ## Authentication
@@ -21,39 +24,142 @@ app = FastAPI(
     * **User Registration & Authentication** with JWT
     * **Todo CRUD Operations** with user isolation
     * **Clean Architecture** with hexagonal design
-    """,
-    version="1.0.0",
-    openapi_tags=[
-        {
-            "name": "authentication",
-            "description": "User registration and authentication operations"
-        },
-        {
-            "name": "todos",
-            "description": "Todo management operations (requires authentication)"
-        }
-    ]
-)
-
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Configure this properly for production
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Include routers
-app.include_router(auth_router)
-app.include_router(todo_router)
-
-
-@app.get("/")
-async def root():
-    return {"message": "Welcome to Todo List API with Hexagonal Architecture"}
-
-
-@app.get("/health")
-async def health_check():
-    return {"status": "healthy"}
+    """
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from .interfaces.auth_controller import token_denylist
+    from .interfaces.todo_controller import todo_events, todo_write_queue
+
+    # The engine (and its pool) belongs to the serving process, never to
+    # whoever imported the module
+    get_engine()
+    if todo_write_queue is not None:
+        await todo_write_queue.start()
+    await todo_events.start()
+    await token_denylist.start()
+    yield
+    await token_denylist.close()
+    await todo_events.close()
+    if todo_write_queue is not None:
+        await todo_write_queue.close()
+    await dispose_engine()
+
+
+def _collect_pool_metrics():
+    for name, value in pool_metrics(get_engine()).items():
+        if isinstance(value, int):
+            yield (name,), value
+
+
+def create_app() -> FastAPI:
+    """Build the application.
+
+    `.env` is loaded here rather than on import, before the controllers read
+    their settings. Serve it with `uvicorn --factory app.main:create_app`.
+    """
+    load_dotenv()
+
+    from .interfaces.auth_controller import auth_cache, router as auth_router, well_known_router
+    from .infrastructure.rate_limit import Rate
+    from .interfaces.metrics_middleware import MetricsMiddleware
+    from .interfaces.rate_limit import RATE_LIMIT_DEFAULT, RateLimitMiddleware, rate_limit_store
+    from .interfaces.todo_controller import router as todo_router, todo_write_queue
+
+    app = FastAPI(
+        title="Todo List API",
+        description=DESCRIPTION,
+        version="1.0.0",
+        lifespan=lifespan,
+        openapi_tags=[
+            {
+                "name": "authentication",
+                "description": "User registration and authentication operations"
+            },
+            {
+                "name": "todos",
+                "description": "Todo management operations (requires authentication)"
+            }
+        ]
+    )
+
+    # CORS middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],  # Configure this properly for production
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["ETag", "Last-Modified", "X-Next-Cursor", "Server-Timing"],
+    )
+    default_rate = Rate.parse(RATE_LIMIT_DEFAULT)
+    if rate_limit_store is not None and default_rate is not None:
+        app.add_middleware(RateLimitMiddleware, store=rate_limit_store, rate=default_rate)
+    app.add_middleware(MetricsMiddleware)
+
+    # Include routers
+    app.include_router(auth_router)
+    app.include_router(well_known_router)
+    app.include_router(todo_router)
+
+    @app.exception_handler(ServiceBusyError)
+    async def service_busy_handler(request: Request, exc: ServiceBusyError):
+        # Routes that expect it answer their own 503; this covers the rest
+        return JSONResponse(
+            {"detail": str(exc)}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE, headers={"Retry-After": "1"}
+        )
+
+    @app.get("/")
+    async def root():
+        return {"message": "Welcome to Todo List API with Hexagonal Architecture"}
+
+    @app.get("/health")
+    async def health_check():
+        return {"status": "healthy"}
+
+    @app.get("/health/db")
+    async def database_health_check():
+        health = {"status": "healthy", "pool": pool_metrics(get_engine())}
+        router = get_router()
+        if router is not None:
+            health["replicas"] = [pool_metrics(replica) for replica in router.replicas]
+        if todo_write_queue is not None:
+            health["write_behind"] = todo_write_queue.health()
+            if todo_write_queue.consecutive_failures:
+                health["status"] = "degraded"
+        return health
+
+    def _collect_auth_cache_metrics():
+        if auth_cache is None:
+            return
+        for cache_name, stats in auth_cache.stats().items():
+            for name in ("hits", "misses", "evictions", "size"):
+                yield (cache_name, name), stats[name]
+
+    metrics.registry.register(metrics.Gauge(
+        "db_pool_connections", "Connection pool state", ("state",), _collect_pool_metrics,
+    ))
+    metrics.registry.register(metrics.Gauge(
+        "auth_cache", "Auth cache counters", ("cache", "stat"), _collect_auth_cache_metrics,
+    ))
+
+    @app.get("/metrics", include_in_schema=False)
+    async def read_metrics():
+        return Response(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+    return app
+
+
+_app = None
+
+
+def __getattr__(name):
+    # `app.main:app` keeps working for uvicorn, tests and benchmarks, but the
+    # app is only built when somebody actually asks for it
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,186 @@
+"""In-process request metrics rendered in the Prometheus text format.
+
+Request-scoped numbers (SQL query count and time, named phases such as JWT
+decoding or password hashing) are collected in a context variable that the
+metrics middleware opens for every HTTP request. Code outside a request
+(CLI, tests) records nothing.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class RequestMetrics:
+    __slots__ = ("started", "query_count", "db_time", "phases")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.db_time = 0.0
+        self.phases: Dict[str, float] = {}
+
+    def add_phase(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+
+_current_request: ContextVar[Optional[RequestMetrics]] = ContextVar("request_metrics", default=None)
+
+
+def start_request() -> Tuple[RequestMetrics, object]:
+    request_metrics = RequestMetrics()
+    return request_metrics, _current_request.set(request_metrics)
+
+
+def end_request(token) -> None:
+    _current_request.reset(token)
+
+
+def current_request() -> Optional[RequestMetrics]:
+    return _current_request.get()
+
+
+def record_query(seconds: float) -> None:
+    request_metrics = _current_request.get()
+    if request_metrics is not None:
+        request_metrics.query_count += 1
+        request_metrics.db_time += seconds
+
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    """Attribute the wall time of the block to `phase` of the current request."""
+    request_metrics = _current_request.get()
+    if request_metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        request_metrics.add_phase(phase, time.perf_counter() - start)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labelvalues, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labelvalues -> [bucket counts..., sum, count]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        series = self._series.get(labelvalues)
+        if series is None:
+            series = self._series[labelvalues] = [0.0] * (len(self.buckets) + 2)
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labelvalues, series in self._series.items():
+            for bound, count in zip(self.buckets, series):
+                labels = _format_labels(self.labelnames, labelvalues, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {_format_value(count)}")
+            labels = _format_labels(self.labelnames, labelvalues, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {_format_value(series[-1])}")
+            labels = _format_labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(series[-1])}")
+        return lines
+
+
+class Gauge:
+    """Gauge whose samples are read from a callback at scrape time."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str],
+                 collect: Callable[[], Iterable[Tuple[Sequence[str], float]]]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        for labelvalues, value in self.collect():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Time spent handling HTTP requests",
+    ("method", "route", "status"),
+))
+request_db_queries = registry.register(Histogram(
+    "http_request_db_queries", "SQL statements executed per HTTP request",
+    ("method", "route"), buckets=QUERY_COUNT_BUCKETS,
+))
+request_db_duration = registry.register(Histogram(
+    "http_request_db_duration_seconds", "Time spent in SQL per HTTP request",
+    ("method", "route"),
+))
+request_phase_duration = registry.register(Histogram(
+    "http_request_phase_duration_seconds", "Time spent in named phases of HTTP requests",
+    ("route", "phase"),
+))
+rate_limited_requests = registry.register(Counter(
+    "http_rate_limited_requests_total", "Requests rejected by a rate limit",
+    ("limit",),
+))
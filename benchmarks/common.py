@@ -0,0 +1,101 @@
+"""Helpers shared by the benchmarks: a throwaway database and latency stats."""
+import os
+import statistics
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Sequence
+
+BENCH_PASSWORD = "secret123"
+
+
+def use_temporary_database() -> str:
+    """Point the app at a fresh SQLite file. Call before importing `app`.
+
+    Also turns rate limiting off: every simulated client shares one address.
+    """
+    db_dir = tempfile.mkdtemp(prefix="todolist-bench-")
+    os.environ["RATE_LIMIT_BACKEND"] = "none"
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(db_dir, 'bench.db')}"
+    return os.environ["DATABASE_URL"]
+
+
+def create_tables() -> None:
+    from sqlalchemy import create_engine
+
+    from app.infrastructure.models import Base
+
+    engine = create_engine(os.environ["DATABASE_URL"])
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+
+def seed(users: int, todos_per_user: int) -> List[Dict]:
+    """Insert users and todos directly, bypassing the API and bcrypt per user.
+
+    Returns one dict per user with its `id`, `email` and the ids of its todos.
+    """
+    from sqlalchemy import create_engine, insert
+
+    from app.application.password_hasher import hash_password
+    from app.infrastructure.models import TodoModel, UserModel
+
+    hashed_password = hash_password(BENCH_PASSWORD)
+    start = datetime.utcnow() - timedelta(days=1)
+    seeded = []
+    user_rows = []
+    todo_rows = []
+    for user_index in range(users):
+        user_id = uuid.uuid4()
+        email = f"bench-{user_index}@example.com"
+        user_rows.append({
+            "id": user_id,
+            "email": email,
+            "username": f"bench{user_index}",
+            "hashed_password": hashed_password,
+            "is_active": True,
+            "created_at": start,
+            "updated_at": start,
+        })
+        todo_ids = []
+        for todo_index in range(todos_per_user):
+            todo_id = uuid.uuid4()
+            created_at = start + timedelta(seconds=todo_index)
+            todo_rows.append({
+                "id": todo_id,
+                "title": f"todo {todo_index}",
+                "description": "seeded by the benchmark",
+                "completed": todo_index % 3 == 0,
+                "user_id": user_id,
+                "created_at": created_at,
+                "updated_at": created_at,
+            })
+            todo_ids.append(todo_id)
+        seeded.append({"id": user_id, "email": email, "todo_ids": todo_ids})
+
+    engine = create_engine(os.environ["DATABASE_URL"])
+    with engine.begin() as conn:
+        if user_rows:
+            conn.execute(insert(UserModel), user_rows)
+        for offset in range(0, len(todo_rows), 5000):
+            conn.execute(insert(TodoModel), todo_rows[offset:offset + 5000])
+    engine.dispose()
+    return seeded
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(latencies_ms: Sequence[float], elapsed: float, errors: int = 0) -> Dict[str, float]:
+    return {
+        "requests": len(latencies_ms),
+        "errors": errors,
+        "throughput_rps": round(len(latencies_ms) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(statistics.fmean(latencies_ms), 3),
+        "p50_ms": round(percentile(latencies_ms, 50), 3),
+        "p95_ms": round(percentile(latencies_ms, 95), 3),
+        "p99_ms": round(percentile(latencies_ms, 99), 3),
+    }
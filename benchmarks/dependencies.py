@@ -0,0 +1,75 @@
+"""Measure the per-request cost of resolving dependencies.
+
+GET /health resolves no dependencies, GET /auth/me only the token, the
+session and the current user (answered from the auth cache), and a cached
+GET /todos/ adds the todo service and the rate limit keys on top. Running
+the ASGI app in-process, the differences are what dependency resolution
+and per-request construction cost:
+
+    python -m benchmarks.dependencies --requests 5000
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from .common import create_tables, summarize, use_temporary_database
+
+ENDPOINTS = ("/health", "/auth/me", "/todos/?limit=10")
+
+
+async def run(args):
+    import httpx
+
+    from app.main import app
+
+    create_tables()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        credentials = {"username": "bench@example.com", "password": "secret123"}
+        await client.post(
+            "/auth/register",
+            json={"email": credentials["username"], "username": "bench", "password": "secret123"},
+        )
+        token = (await client.post("/auth/token", data=credentials)).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        await client.post("/todos/", json={"title": "bench"}, headers=headers)
+
+        results = {}
+        for path in ENDPOINTS:
+            for _ in range(args.warmup):
+                await client.get(path, headers=headers)
+            latencies = []
+            errors = 0
+            start = time.perf_counter()
+            for _ in range(args.requests):
+                request_start = time.perf_counter()
+                response = await client.get(path, headers=headers)
+                latencies.append((time.perf_counter() - request_start) * 1000)
+                errors += response.status_code != 200
+            results[path] = summarize(latencies, time.perf_counter() - start, errors)
+
+    baseline = results["/health"]["mean_ms"]
+    for path, stats in results.items():
+        overhead_us = (stats["mean_ms"] - baseline) * 1000
+        print(f"GET {path:<18} mean={stats['mean_ms'] * 1000:7.1f}us "
+              f"p95={stats['p95_ms'] * 1000:7.1f}us over /health={overhead_us:6.1f}us "
+              f"errors={stats['errors']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=200)
+    args = parser.parse_args()
+
+    use_temporary_database()
+    # Cache hits only: what is left is the framework and our dependencies
+    os.environ.setdefault("TODO_CACHE_BACKEND", "memory")
+    os.environ.setdefault("AUTH_CACHE_TTL_SECONDS", "300")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Cold start: time to import `app.main` and build the app in a fresh interpreter.
+
+Every run is a new Python process, so nothing is cached in `sys.modules`:
+
+    python -m benchmarks.importtime --runs 10 --budget-ms 1500 --output startup.json
+
+With --budget-ms the run fails (exit code 1) when the median of import plus
+create_app() exceeds the budget. --top lists the slowest imports as reported
+by `python -X importtime`.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded lazily by the app; listed so a regression that imports them eagerly shows up
+DEFERRED_MODULES = ("passlib", "bcrypt", "cryptography", "redis")
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+app.main.create_app()
+created = time.perf_counter()
+from app.infrastructure import database
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "modules": len(sys.modules),
+    "engine_created": database._engine is not None,
+    "deferred_loaded": [name for name in %r if name in sys.modules],
+}))
+""" % (DEFERRED_MODULES,)
+
+
+def _run_child(*python_flags: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    return subprocess.run(
+        [sys.executable, *python_flags, "-c", CHILD],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+
+
+def measure(runs: int) -> Dict:
+    samples = [json.loads(_run_child().stdout) for _ in range(runs)]
+    totals = [sample["import_ms"] + sample["create_app_ms"] for sample in samples]
+    last = samples[-1]
+    return {
+        "runs": runs,
+        "import_ms": round(statistics.median(sample["import_ms"] for sample in samples), 2),
+        "create_app_ms": round(statistics.median(sample["create_app_ms"] for sample in samples), 2),
+        "total_ms": round(statistics.median(totals), 2),
+        "max_total_ms": round(max(totals), 2),
+        "modules": last["modules"],
+        "engine_created": last["engine_created"],
+        "deferred_loaded": last["deferred_loaded"],
+    }
+
+
+def slowest_imports(top: int) -> List[Tuple[str, float, float]]:
+    """(module, self ms, cumulative ms) of the `top` slowest imports, by cumulative time."""
+    stderr = _run_child("-X", "importtime").stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # Only modules imported directly by the app, not their whole subtree
+        if len(name) - len(name.lstrip()) > 4:
+            continue
+        rows.append((name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000))
+    return sorted(rows, key=lambda row: row[2], reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="slowest imports to list (0 to skip)")
+    parser.add_argument("--budget-ms", type=float, help="fail when the median total exceeds this")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    result = measure(args.runs)
+    print(f"import app.main: {result['import_ms']:.1f}ms  create_app(): {result['create_app_ms']:.1f}ms  "
+          f"total: {result['total_ms']:.1f}ms (max {result['max_total_ms']:.1f}ms)  "
+          f"modules: {result['modules']}")
+    print(f"engine created on import: {result['engine_created']}  "
+          f"deferred modules loaded: {', '.join(result['deferred_loaded']) or 'none'}")
+
+    if args.top:
+        print(f"\n{'cumulative':>12} {'self':>9}  module")
+        for name, self_ms, cumulative_ms in slowest_imports(args.top):
+            print(f"{cumulative_ms:>10.1f}ms {self_ms:>7.1f}ms  {name}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "meta": {
+                    "timestamp": datetime.utcnow().isoformat(),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                },
+                "results": result,
+            }, f, indent=2)
+
+    if args.budget_ms is not None and result["total_ms"] > args.budget_ms:
+        print(f"OVER BUDGET {result['total_ms']:.1f}ms > {args.budget_ms:.1f}ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
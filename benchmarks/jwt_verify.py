@@ -0,0 +1,74 @@
+"""Token verification throughput in AuthService.get_current_user, per algorithm.
+
+The auth cache is off and the user is rebuilt from the token's claims, so
+every call verifies a signature and nothing else; no database is needed.
+When python-jose is installed, its decode (which parses the key on every
+call) is timed on the same tokens for comparison:
+
+    python -m benchmarks.jwt_verify --iterations 20000
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta
+
+ALGORITHMS = ("HS256", "RS256", "EdDSA")
+
+
+def _time(function, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return time.perf_counter() - start
+
+
+def _report(label: str, elapsed: float, iterations: int) -> None:
+    print(f"{label:<28} {iterations / elapsed:>10,.0f}/s  {elapsed / iterations * 1e6:8.1f}us each")
+
+
+def run(args):
+    from app.application.auth_service import AuthService
+    from app.application.jwt_codec import JWTCodec, generate_key_pem, load_key
+    from app.domain.entities import User
+
+    user = User(email="bench@example.com", username="bench", hashed_password="", id=uuid.uuid4())
+    loop = asyncio.new_event_loop()
+    for algorithm in ALGORITHMS:
+        secret = "benchmark-secret" if algorithm == "HS256" else generate_key_pem(algorithm)
+        codec = JWTCodec(load_key(algorithm, secret))
+        service = AuthService(None, "unused", jwt_codec=codec, trust_token_claims=True)
+        token = service.create_access_token(service.user_claims(user), timedelta(minutes=30))
+
+        def verify():
+            loop.run_until_complete(service.get_current_user(token))
+
+        verify()
+        _report(f"{algorithm} JWTCodec.decode", _time(lambda: codec.decode(token), args.iterations), args.iterations)
+        _report(f"{algorithm} get_current_user", _time(verify, args.iterations), args.iterations)
+
+        try:
+            from jose import jwt as jose_jwt
+        except ImportError:
+            continue
+        if algorithm == "EdDSA":
+            continue  # python-jose cannot verify EdDSA
+        key = secret if algorithm == "HS256" else codec.signing_key.public_pem()
+        jose_token = jose_jwt.encode(
+            {"sub": str(user.id), "exp": datetime.utcnow() + timedelta(minutes=30)},
+            secret if algorithm == "HS256" else secret.decode(),
+            algorithm=algorithm,
+        )
+        elapsed = _time(lambda: jose_jwt.decode(jose_token, key, algorithms=[algorithm]), args.iterations)
+        _report(f"{algorithm} python-jose decode", elapsed, args.iterations)
+    loop.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=10000)
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
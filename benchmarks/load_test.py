@@ -0,0 +1,217 @@
+"""In-process load test of the API routes.
+
+Seeds users and todos into a temporary SQLite database, drives the real
+ASGI app through httpx's ASGITransport (no server, no network) and reports
+throughput and latency percentiles per scenario:
+
+    python -m benchmarks.load_test --users 20 --todos 200 --requests 500 --concurrency 16 \\
+        --output bench.json
+    python -m benchmarks.load_test --baseline bench.json --max-regression 0.2
+
+With --baseline the run fails (exit code 1) when any scenario's p95 grew,
+or its throughput dropped, by more than --max-regression.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import platform
+import sys
+import time
+import uuid
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+from .common import BENCH_PASSWORD, create_tables, seed, summarize, use_temporary_database
+
+SCENARIOS = [
+    "register",
+    "token",
+    "auth_me",
+    "todos_list",
+    "todos_create",
+    "todos_get",
+    "todos_update",
+    "todos_delete",
+]
+
+
+async def run_scenario(request: Callable[[int], Awaitable[int]], total: int, concurrency: int) -> Dict:
+    latencies: List[float] = []
+    errors = 0
+    counter = itertools.count()
+
+    async def worker():
+        nonlocal errors
+        while True:
+            index = next(counter)
+            if index >= total:
+                return
+            start = time.perf_counter()
+            status_code = await request(index)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - start, errors)
+
+
+async def run(args) -> Dict:
+    import httpx
+
+    from app.main import app
+
+    create_tables()
+    users = seed(args.users, args.todos)
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        tokens = []
+        for user in users:
+            response = await client.post(
+                "/auth/token", data={"username": user["email"], "password": BENCH_PASSWORD}
+            )
+            tokens.append({"Authorization": f"Bearer {response.json()['access_token']}"})
+
+        def headers_for(index):
+            return tokens[index % len(tokens)]
+
+        def todo_for(index):
+            user = users[index % len(users)]
+            return user["todo_ids"][(index // len(users)) % len(user["todo_ids"])]
+
+        created: List[Tuple[int, str]] = []
+        run_id = uuid.uuid4().hex[:8]
+
+        async def register(index):
+            response = await client.post("/auth/register", json={
+                "email": f"new-{run_id}-{index}@example.com",
+                "username": "loadtest",
+                "password": BENCH_PASSWORD,
+            })
+            return response.status_code
+
+        async def token(index):
+            user = users[index % len(users)]
+            response = await client.post(
+                "/auth/token", data={"username": user["email"], "password": BENCH_PASSWORD}
+            )
+            return response.status_code
+
+        async def auth_me(index):
+            return (await client.get("/auth/me", headers=headers_for(index))).status_code
+
+        async def todos_list(index):
+            return (await client.get("/todos/", headers=headers_for(index))).status_code
+
+        async def todos_create(index):
+            response = await client.post(
+                "/todos/", json={"title": f"load {index}"}, headers=headers_for(index)
+            )
+            if response.status_code < 400:
+                created.append((index, response.json()["id"]))
+            return response.status_code
+
+        async def todos_get(index):
+            return (await client.get(f"/todos/{todo_for(index)}", headers=headers_for(index))).status_code
+
+        async def todos_update(index):
+            response = await client.put(
+                f"/todos/{todo_for(index)}", json={"completed": index % 2 == 0}, headers=headers_for(index)
+            )
+            return response.status_code
+
+        async def todos_delete(index):
+            owner_index, todo_id = created[index % len(created)]
+            return (await client.delete(f"/todos/{todo_id}", headers=headers_for(owner_index))).status_code
+
+        scenarios = {
+            "register": (register, args.auth_requests),
+            "token": (token, args.auth_requests),
+            "auth_me": (auth_me, args.requests),
+            "todos_list": (todos_list, args.requests),
+            "todos_create": (todos_create, args.requests),
+            "todos_get": (todos_get, args.requests),
+            "todos_update": (todos_update, args.requests),
+            "todos_delete": (todos_delete, args.requests),
+        }
+        selected = args.scenarios or SCENARIOS
+        for name in SCENARIOS:
+            if name not in selected:
+                continue
+            request, total = scenarios[name]
+            if name == "todos_delete":
+                total = min(total, len(created))
+                if not total:
+                    continue
+            results[name] = await run_scenario(request, total, args.concurrency)
+            print(f"{name:>13}: {results[name]['throughput_rps']:>9.1f} req/s  "
+                  f"p50={results[name]['p50_ms']:.2f}ms p95={results[name]['p95_ms']:.2f}ms "
+                  f"p99={results[name]['p99_ms']:.2f}ms errors={results[name]['errors']}")
+
+    return {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "users": args.users,
+            "todos_per_user": args.todos,
+            "requests": args.requests,
+            "auth_requests": args.auth_requests,
+            "concurrency": args.concurrency,
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, max_regression: float) -> List[str]:
+    """Describe every scenario that regressed beyond the allowed ratio."""
+    regressions = []
+    for name, result in current["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            continue
+        if previous["p95_ms"] and result["p95_ms"] > previous["p95_ms"] * (1 + max_regression):
+            regressions.append(f"{name}: p95 {previous['p95_ms']:.2f}ms -> {result['p95_ms']:.2f}ms")
+        if previous["throughput_rps"] and result["throughput_rps"] < previous["throughput_rps"] * (1 - max_regression):
+            regressions.append(
+                f"{name}: throughput {previous['throughput_rps']:.1f} -> {result['throughput_rps']:.1f} req/s"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--todos", type=int, default=100, help="todos seeded per user")
+    parser.add_argument("--requests", type=int, default=500, help="requests per todo/auth_me scenario")
+    parser.add_argument("--auth-requests", type=int, default=50,
+                        help="requests for register/token, which are dominated by bcrypt")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--scenario", dest="scenarios", action="append", choices=SCENARIOS)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against a previous JSON result")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+
+    use_temporary_database()
+    report = asyncio.run(run(args))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
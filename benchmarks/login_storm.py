@@ -0,0 +1,80 @@
+"""Measure GET /todos/ latency while a burst of logins is running.
+
+Runs the ASGI app in-process against a throwaway SQLite database, so it
+needs no server or network. Compare the hashing executors with e.g.:
+
+    python -m benchmarks.login_storm --executor inline
+    python -m benchmarks.login_storm --executor thread
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from .common import create_tables, percentile, use_temporary_database
+
+
+async def run(args):
+    import httpx
+
+    from app.main import app
+
+    create_tables()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        credentials = {"username": "bench@example.com", "password": "secret123"}
+        await client.post(
+            "/auth/register",
+            json={"email": credentials["username"], "username": "bench", "password": "secret123"},
+        )
+        token = (await client.post("/auth/token", data=credentials)).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        await client.post("/todos/", json={"title": "bench"}, headers=headers)
+
+        latencies = []
+        logins_done = asyncio.Event()
+
+        async def login_worker(count):
+            for _ in range(count):
+                await client.post("/auth/token", data=credentials)
+
+        async def poller():
+            while not logins_done.is_set():
+                start = time.perf_counter()
+                await client.get("/todos/", headers=headers)
+                latencies.append((time.perf_counter() - start) * 1000)
+                await asyncio.sleep(args.poll_interval)
+
+        per_worker = max(1, args.logins // args.concurrency)
+        poll_task = asyncio.create_task(poller())
+        start = time.perf_counter()
+        await asyncio.gather(*(login_worker(per_worker) for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+        logins_done.set()
+        await poll_task
+
+    print(f"executor={args.executor} logins={per_worker * args.concurrency} "
+          f"concurrency={args.concurrency} elapsed={elapsed:.2f}s")
+    print(f"GET /todos/ samples={len(latencies)} "
+          f"p50={statistics.median(latencies):.1f}ms "
+          f"p99={percentile(latencies, 99):.1f}ms "
+          f"max={max(latencies):.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--executor", choices=["inline", "thread", "process"], default="thread")
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--poll-interval", type=float, default=0.005)
+    args = parser.parse_args()
+
+    use_temporary_database()
+    os.environ["PASSWORD_HASH_EXECUTOR"] = args.executor
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Compare the old and new ways of turning todo rows into a JSON list response.
+
+    python -m benchmarks.serialize_todos --count 10000
+"""
+import argparse
+import json
+import time
+import uuid
+from datetime import datetime
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    from fastapi.encoders import jsonable_encoder
+
+    from app.domain.entities import Todo
+    from app.infrastructure.models import TodoModel
+    from app.interfaces.responses import todo_list_json
+    from app.interfaces.schemas import TodoResponse
+
+    user_id = uuid.uuid4()
+    now = datetime.utcnow()
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "title": f"todo {i}",
+            "description": "benchmark row",
+            "completed": i % 2 == 0,
+            "user_id": user_id,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(args.count)
+    ]
+    orm_rows = [TodoModel(**row) for row in rows]
+
+    def before():
+        # ORM row -> Todo -> TodoResponse -> response_model check -> jsonable_encoder -> json.dumps
+        todos = [Todo.model_validate(row) for row in orm_rows]
+        responses = [TodoResponse.model_validate(todo) for todo in todos]
+        responses = [TodoResponse.model_validate(response) for response in responses]
+        json.dumps(jsonable_encoder(responses)).encode()
+
+    def after():
+        # Column row -> Todo.model_construct -> one pydantic-core dump
+        todo_list_json([Todo.model_construct(**row) for row in rows])
+
+    baseline = best_of(before, args.repeat)
+    optimized = best_of(after, args.repeat)
+    print(f"serialize {args.count} todos: before={baseline * 1000:.1f}ms "
+          f"after={optimized * 1000:.1f}ms speedup={baseline / optimized:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Micro-benchmarks for the hot paths under the API routes.
+
+    pytest benchmarks/test_micro.py --benchmark-json micro.json
+    pytest benchmarks/test_micro.py --benchmark-compare --benchmark-compare-fail=mean:20%
+"""
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from .common import create_tables, seed, use_temporary_database
+
+use_temporary_database()
+
+from sqlalchemy.ext.asyncio import AsyncSession  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.application.auth_service import AuthService  # noqa: E402
+from app.domain.entities import Todo  # noqa: E402
+from app.infrastructure.database import create_engine_from_settings  # noqa: E402
+from app.infrastructure.models import TodoModel  # noqa: E402
+from app.infrastructure.todo_repository import SQLAlchemyTodoRepository  # noqa: E402
+from app.infrastructure.user_repository import SQLAlchemyUserRepository  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def seeded_user():
+    create_tables()
+    return seed(users=1, todos_per_user=1000)[0]
+
+
+@pytest.fixture(scope="module")
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="module")
+def session(loop):
+    engine = create_engine_from_settings()
+    session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)()
+    yield session
+    loop.run_until_complete(session.close())
+    loop.run_until_complete(engine.dispose())
+
+
+@pytest.fixture(scope="module")
+def auth_service(session):
+    return AuthService(SQLAlchemyUserRepository(session), "benchmark-secret")
+
+
+def test_todo_model_validate(benchmark):
+    row = TodoModel(
+        id=uuid.uuid4(),
+        title="benchmark",
+        description="from attributes",
+        completed=False,
+        user_id=uuid.uuid4(),
+        created_at=datetime.utcnow(),
+        updated_at=datetime.utcnow(),
+    )
+    benchmark(Todo.model_validate, row)
+
+
+def test_jwt_encode(benchmark, auth_service):
+    claims = {"sub": str(uuid.uuid4()), "email": "bench@example.com"}
+    benchmark(auth_service.create_access_token, claims, timedelta(minutes=30))
+
+
+def test_jwt_decode(benchmark, auth_service):
+    token = auth_service.create_access_token({"sub": str(uuid.uuid4())}, timedelta(minutes=30))
+    benchmark(auth_service._decode_token, token)
+
+
+def test_repository_get_todos_page(benchmark, loop, session, seeded_user):
+    repository = SQLAlchemyTodoRepository(session)
+    benchmark(lambda: loop.run_until_complete(repository.get_todos_by_user_id(seeded_user["id"], limit=100)))
+
+
+def test_repository_get_todo_by_id(benchmark, loop, session, seeded_user):
+    repository = SQLAlchemyTodoRepository(session)
+    todo_id = seeded_user["todo_ids"][0]
+    benchmark(lambda: loop.run_until_complete(repository.get_todo_by_id(todo_id)))
+
+
+def test_repository_collection_version(benchmark, loop, session, seeded_user):
+    repository = SQLAlchemyTodoRepository(session)
+    benchmark(lambda: loop.run_until_complete(repository.get_collection_version(seeded_user["id"])))
+
+
+def test_user_repository_get_user_by_id(benchmark, loop, session, seeded_user):
+    repository = SQLAlchemyUserRepository(session)
+    benchmark(lambda: loop.run_until_complete(repository.get_user_by_id(seeded_user["id"])))
@@ -0,0 +1,64 @@
+"""Bulk import throughput: a generated file of todos through `import-todos`.
+
+The file is written once to a temporary directory and imported for a
+seeded user on a fresh SQLite database, with the same parser, validation
+and batched inserts as `POST /todos/import`:
+
+    python -m benchmarks.todo_import --rows 1000000 --format csv
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from .common import create_tables, seed, use_temporary_database
+
+
+def write_file(path: str, rows: int, format: str) -> None:
+    with open(path, "w", newline="") as out:
+        if format == "csv":
+            out.write("title,description,completed,created_at\n")
+        elif format == "json":
+            out.write("[\n")
+        for index in range(rows):
+            row = {
+                "title": f"todo {index}",
+                "description": "imported, with a comma" if index % 2 else "",
+                "completed": index % 3 == 0,
+                "created_at": f"2024-{index % 12 + 1:02d}-{index % 28 + 1:02d}T12:00:00",
+            }
+            if format == "csv":
+                out.write(f'{row["title"]},"{row["description"]}",{str(row["completed"]).lower()},{row["created_at"]}\n')
+            elif format == "json":
+                out.write(("," if index else "") + json.dumps(row) + "\n")
+            else:
+                out.write(json.dumps(row) + "\n")
+        if format == "json":
+            out.write("]\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--format", choices=["csv", "ndjson", "json"], default="csv")
+    parser.add_argument("--batch-size", type=int, default=20000)
+    args = parser.parse_args()
+
+    use_temporary_database()
+    create_tables()
+    email = seed(1, 0)[0]["email"]
+    path = os.path.join(tempfile.mkdtemp(prefix="todolist-import-"), f"todos.{args.format}")
+    write_file(path, args.rows, args.format)
+    print(f"{args.rows:,} rows, {os.path.getsize(path) / 1e6:.1f} MB of {args.format}")
+
+    from app.cli import run_import
+
+    start = time.perf_counter()
+    status = run_import([path, "--user", email, "--batch-size", str(args.batch_size)])
+    elapsed = time.perf_counter() - start
+    print(f"imported in {elapsed:.1f}s ({args.rows / elapsed:,.0f} todos/s), exit status {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Stats for one user read from the trigger-maintained counters vs a GROUP BY over todos.
+
+    python -m benchmarks.todo_stats --todos 100000
+"""
+import argparse
+import asyncio
+import time
+
+from .common import create_tables, seed, use_temporary_database
+
+
+async def best_of(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = await function()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+async def run(args):
+    from app.infrastructure.database import async_session, dispose_engine
+    from app.infrastructure.todo_repository import SQLAlchemyTodoRepository
+
+    user_id = seed(1, args.todos)[0]["id"]
+    async with async_session() as session:
+        repository = SQLAlchemyTodoRepository(session)
+        for group_by in ("day", "week"):
+            counters, fast = await best_of(lambda: repository.get_stats(user_id, group_by), args.repeat)
+            naive, slow = await best_of(lambda: repository.aggregate_stats(user_id, group_by), args.repeat)
+            assert fast == slow, (fast, slow)
+            print(f"group_by={group_by:<5} counters {counters * 1e3:8.2f}ms  "
+                  f"GROUP BY {naive * 1e3:8.2f}ms  ({naive / counters:,.0f}x)")
+    await dispose_engine()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--todos", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    use_temporary_database()
+    create_tables()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Compare todo write throughput with and without the write-behind queue.
+
+Each simulated request opens its own session, like the API does, and
+either commits directly or queues the write. Every client creates a todo
+and then updates it repeatedly, so the queue has updates to coalesce:
+
+    python -m benchmarks.write_behind --clients 32 --updates 10
+    python -m benchmarks.write_behind --synchronous FULL --journal
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+from .common import summarize
+
+
+async def run_mode(args, write_behind: bool):
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.orm import sessionmaker
+
+    from app.domain.entities import Todo
+    from app.infrastructure.database import DatabaseSettings, create_engine_from_settings
+    from app.infrastructure.models import Base
+    from app.infrastructure.todo_repository import SQLAlchemyTodoRepository
+    from app.infrastructure.write_behind import TodoWriteQueue, WriteBehindTodoRepository
+
+    db_dir = tempfile.mkdtemp(prefix="todolist-bench-")
+    engine = create_engine_from_settings(DatabaseSettings(
+        url=f"sqlite+aiosqlite:///{os.path.join(db_dir, 'bench.db')}",
+        sqlite_synchronous=args.synchronous,
+    ))
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    make_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    queue = None
+    if write_behind:
+        queue = TodoWriteQueue(
+            make_session,
+            journal_dir=os.path.join(db_dir, "journal") if args.journal else None,
+            max_latency=args.max_latency_ms / 1000,
+            max_batch_size=args.max_batch_size,
+        )
+        await queue.start()
+
+    latencies = []
+
+    async def timed(operation):
+        start = time.perf_counter()
+        async with make_session() as session:
+            repository = SQLAlchemyTodoRepository(session)
+            if queue is not None:
+                repository = WriteBehindTodoRepository(repository, queue)
+            result = await operation(repository)
+        latencies.append((time.perf_counter() - start) * 1000)
+        return result
+
+    async def client():
+        user_id = uuid.uuid4()
+        todo = await timed(lambda repository: repository.create_todo(Todo(title="bench", user_id=user_id)))
+        for i in range(args.updates):
+            changes = {"title": f"bench {i}", "updated_at": datetime.utcnow()}
+            await timed(lambda repository: repository.update_todo(todo.id, user_id, changes))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(args.clients)))
+    acknowledged = time.perf_counter() - start
+    if queue is not None:
+        await queue.close()
+    durable = time.perf_counter() - start
+    await engine.dispose()
+    shutil.rmtree(db_dir, ignore_errors=True)
+
+    stats = summarize(latencies, acknowledged)
+    stats["drained_ops_per_s"] = round(len(latencies) / durable, 2)
+    if queue is not None:
+        stats["transactions"] = queue.flushes
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--updates", type=int, default=10)
+    parser.add_argument("--synchronous", choices=["OFF", "NORMAL", "FULL"], default="FULL")
+    parser.add_argument("--journal", action="store_true", help="fsync queued writes to a journal")
+    parser.add_argument("--max-latency-ms", type=float, default=50)
+    parser.add_argument("--max-batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    for name, write_behind in (("direct", False), ("write-behind", True)):
+        stats = asyncio.run(run_mode(args, write_behind))
+        print(name.ljust(13), " ".join(f"{key}={value}" for key, value in stats.items()))
+
+
+if __name__ == "__main__":
+    main()
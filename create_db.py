@@ -1,12 +1,13 @@
 import asyncio
 from sqlalchemy.ext.asyncio import create_async_engine
-from app.infrastructure.database import ASYNC_DATABASE_URL
+from dotenv import load_dotenv
+from app.infrastructure.database import async_database_url
 from app.infrastructure.models import Base
 
 
 async def create_tables():
     """Create database tables"""
-    engine = create_async_engine(ASYNC_DATABASE_URL, echo=True)
+    engine = create_async_engine(async_database_url(), echo=True)
 
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
@@ -16,4 +17,5 @@ async def create_tables():
 
 
 if __name__ == "__main__":
+    load_dotenv()
     asyncio.run(create_tables())
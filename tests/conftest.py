@@ -0,0 +1,45 @@
+import os
+import tempfile
+import uuid
+
+import pytest
+
+# Point the app at a throwaway SQLite file before anything imports the engine
+_db_dir = tempfile.mkdtemp(prefix="todolist-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+# Every test client shares one IP; tests that need limits install a store
+os.environ["RATE_LIMIT_BACKEND"] = "none"
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+from app.infrastructure.models import Base
+from app.main import app
+
+
+@pytest.fixture(scope="session", autouse=True)
+def create_tables():
+    engine = create_engine(os.environ["DATABASE_URL"])
+    Base.metadata.create_all(engine)
+    engine.dispose()
+    yield
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def auth_headers(client):
+    email = f"user-{uuid.uuid4().hex[:8]}@example.com"
+    client.post(
+        "/auth/register",
+        json={"email": email, "username": "tester", "password": "secret123"},
+    )
+    response = client.post(
+        "/auth/token",
+        data={"username": email, "password": "secret123"},
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
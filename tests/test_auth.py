@@ -0,0 +1,205 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional
+from uuid import UUID
+
+import pytest
+
+from app.application.auth_cache import AuthCache
+from app.ttl_cache import TTLCache
+from app.application.auth_service import AuthService
+from app.application.jwt_codec import HMACKey, JWTCodec, generate_key_pem, load_key
+from app.application.password_hasher import PasswordHasher, hash_password
+from app.application.token_denylist import TokenDenylist
+from app.domain.entities import User
+from app.domain.exceptions import InvalidCredentialsError, ServiceBusyError
+from app.domain.repositories import UserRepository
+
+
+class CountingUserRepository(UserRepository):
+    def __init__(self, user: User):
+        self.user = user
+        self.lookups = 0
+
+    async def create_user(self, user: User) -> User:
+        return user
+
+    async def get_user_by_email(self, email: str) -> Optional[User]:
+        return self.user if email == self.user.email else None
+
+    async def get_user_by_id(self, user_id: UUID) -> Optional[User]:
+        self.lookups += 1
+        return self.user if user_id == self.user.id else None
+
+
+def make_service(**kwargs):
+    user = User(email="cache@example.com", username="cache", hashed_password="x")
+    repository = CountingUserRepository(user)
+    service = AuthService(repository, "test-secret", **kwargs)
+    token = service.create_access_token(service.user_claims(user), timedelta(minutes=5))
+    return service, repository, token
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.evictions == 1
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set("a", 1, ttl=-1)
+    assert cache.get("a") is None
+    assert cache.misses == 1
+
+
+def test_get_current_user_uses_cache():
+    cache = AuthCache(max_size=10, ttl=60)
+    service, repository, token = make_service(cache=cache)
+
+    for _ in range(3):
+        user = asyncio.run(service.get_current_user(token))
+
+    assert user.email == "cache@example.com"
+    assert repository.lookups == 1
+    assert cache.tokens.hits == 2
+    assert cache.users.hits == 2
+
+    service.invalidate_user(user.id)
+    asyncio.run(service.get_current_user(token))
+    assert repository.lookups == 2
+
+
+def test_get_current_user_trusts_token_claims():
+    service, repository, token = make_service(trust_token_claims=True)
+
+    user = asyncio.run(service.get_current_user(token))
+
+    assert user.username == "cache"
+    assert repository.lookups == 0
+
+
+def test_cache_stats_are_exported_as_metrics(client, auth_headers):
+    client.get("/auth/me", headers=auth_headers)
+    assert client.get("/auth/cache/stats").status_code == 404
+    assert 'auth_cache{cache="tokens",stat="hits"}' in client.get("/metrics").text
+
+
+def test_password_hasher_round_trip():
+    hasher = PasswordHasher(max_workers=1)
+
+    async def run():
+        hashed = await hasher.hash("secret123")
+        return await hasher.verify("secret123", hashed), await hasher.verify("wrong", hashed)
+
+    assert asyncio.run(run()) == (True, False)
+    hasher.shutdown()
+
+
+def test_password_hasher_rejects_when_busy():
+    hasher = PasswordHasher(max_workers=1, max_pending=0, reject_when_busy=True)
+    hashed = hash_password("secret123")
+
+    async def run():
+        return await asyncio.gather(
+            hasher.verify("secret123", hashed),
+            hasher.verify("secret123", hashed),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+    assert True in results
+    assert any(isinstance(result, ServiceBusyError) for result in results)
+    assert hasher.rejected == 1
+    hasher.shutdown()
+
+
+def test_token_denylist_expires_and_prunes():
+    now = [1000.0]
+    denylist = TokenDenylist(capacity=10, clock=lambda: now[0])
+
+    async def revoke_all():
+        await denylist.revoke("short", 1010)
+        await denylist.revoke("long", 2000)
+
+    asyncio.run(revoke_all())
+    assert denylist.is_revoked("short") and denylist.is_revoked("long")
+    assert not denylist.is_revoked("never")
+
+    now[0] = 1500
+    assert not denylist.is_revoked("short")
+
+    for index in range(20):
+        asyncio.run(denylist.revoke(f"jti-{index}", 3000 + index))
+    # Pruned: the expired entry went first, then those expiring soonest
+    assert len(denylist) <= 10 and denylist.evictions > 0
+    assert denylist.is_revoked("jti-19")
+    assert not denylist.is_revoked("short")
+
+
+def test_refresh_rotates_and_logout_revokes(client):
+    credentials = {"username": "refresh@example.com", "password": "secret123"}
+    client.post("/auth/register", json={"email": credentials["username"], "username": "r", "password": "secret123"})
+    tokens = client.post("/auth/token", data=credentials).json()
+
+    rotated = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert rotated.status_code == 200
+    rotated = rotated.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+    # Refresh tokens are single use, and are not access tokens
+    assert client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+    headers = {"Authorization": f"Bearer {rotated['refresh_token']}"}
+    assert client.get("/auth/me", headers=headers).status_code == 401
+
+    headers = {"Authorization": f"Bearer {rotated['access_token']}"}
+    assert client.get("/auth/me", headers=headers).status_code == 200
+    response = client.post("/auth/logout", json={"refresh_token": rotated["refresh_token"]}, headers=headers)
+    assert response.status_code == 204
+    assert client.get("/auth/me", headers=headers).status_code == 401
+    assert client.post("/auth/refresh", json={"refresh_token": rotated["refresh_token"]}).status_code == 401
+
+
+@pytest.mark.parametrize("algorithm", ["RS256", "EdDSA"])
+def test_asymmetric_tokens_survive_key_rotation(algorithm):
+    expires = datetime.utcnow() + timedelta(minutes=5)
+    old_key = load_key(algorithm, generate_key_pem(algorithm))
+    new_key = load_key(algorithm, generate_key_pem(algorithm))
+    old_token = JWTCodec(old_key).encode({"sub": "old", "exp": expires})
+
+    codec = JWTCodec(new_key, verification_keys=[load_key(algorithm, old_key.public_pem())])
+    assert codec.decode(old_token)["sub"] == "old"
+    assert codec.decode(codec.encode({"sub": "new", "exp": expires}))["sub"] == "new"
+    assert {key["kid"] for key in codec.jwks()["keys"]} == {old_key.kid, new_key.kid}
+
+    # Unknown kid, and an HMAC token "signed" with the public key under the right kid
+    forged = JWTCodec(HMACKey(new_key.public_pem().decode(), kid=new_key.kid)).encode({"sub": "x"})
+    for token in (old_token, forged):
+        with pytest.raises(InvalidCredentialsError):
+            JWTCodec(new_key).decode(token)
+
+
+def test_jwt_codec_rejects_expired_and_tampered_tokens():
+    codec = JWTCodec("test-secret")
+    expired = codec.encode({"sub": "a", "exp": datetime.utcnow() - timedelta(seconds=1)})
+    valid = codec.encode({"sub": "a", "exp": datetime.utcnow() + timedelta(minutes=5)})
+    header, payload, signature = valid.split(".")
+    tampered = ".".join([header, codec.encode({"sub": "b"}).split(".")[1], signature])
+
+    for token in (expired, tampered, "not-a-token"):
+        with pytest.raises(InvalidCredentialsError):
+            codec.decode(token)
+    assert codec.decode(valid)["sub"] == "a"
+
+
+def test_jwks_endpoint(client):
+    response = client.get("/.well-known/jwks.json")
+    assert response.status_code == 200
+    # Signed with the shared secret in tests: nothing to publish
+    assert response.json() == {"keys": []}
+    assert "max-age" in response.headers["Cache-Control"]
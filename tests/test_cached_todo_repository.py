@@ -0,0 +1,116 @@
+import asyncio
+import uuid
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.domain.entities import Todo
+from app.infrastructure.cache import InMemoryCacheBackend
+from app.infrastructure.cached_todo_repository import CachedTodoRepository
+from app.infrastructure.database import DatabaseSettings, create_engine_from_settings
+from app.infrastructure.models import Base
+from app.infrastructure.todo_repository import SQLAlchemyTodoRepository
+
+
+def run_with_repository(tmp_path, scenario):
+    async def run():
+        engine = create_engine_from_settings(
+            DatabaseSettings(url=f"sqlite+aiosqlite:///{tmp_path / 'cache.db'}")
+        )
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        cache = InMemoryCacheBackend(max_size=100, ttl=60)
+        async with sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)() as session:
+            repository = CachedTodoRepository(SQLAlchemyTodoRepository(session), cache)
+            await scenario(repository, cache)
+        await engine.dispose()
+
+    asyncio.run(run())
+
+
+def test_reads_are_served_from_cache(tmp_path):
+    async def scenario(repository, cache):
+        user_id = uuid.uuid4()
+        todo = await repository.create_todo(Todo(title="cached", user_id=user_id))
+
+        assert [t.id for t in await repository.get_todos_by_user_id(user_id)] == [todo.id]
+        assert [t.id for t in await repository.get_todos_by_user_id(user_id)] == [todo.id]
+        assert (await repository.get_todo_by_id(todo.id)).title == "cached"
+        assert cache.entries.hits >= 2
+
+    run_with_repository(tmp_path, scenario)
+
+
+def test_writes_invalidate_cached_reads(tmp_path):
+    async def scenario(repository, cache):
+        user_id = uuid.uuid4()
+        todo = await repository.create_todo(Todo(title="before", user_id=user_id))
+        await repository.get_todos_by_user_id(user_id)
+        await repository.get_collection_version(user_id)
+
+        await repository.update_todo(todo.id, user_id, {"title": "after"})
+        assert (await repository.get_todo_by_id(todo.id)).title == "after"
+        assert (await repository.get_todos_by_user_id(user_id))[0].title == "after"
+
+        await repository.create_todo(Todo(title="second", user_id=user_id))
+        assert (await repository.get_collection_version(user_id))[1] == 2
+
+        await repository.delete_todo(todo.id, user_id)
+        assert await repository.get_todo_by_id(todo.id) is None
+        assert [t.title for t in await repository.get_todos_by_user_id(user_id)] == ["second"]
+
+    run_with_repository(tmp_path, scenario)
+
+
+def test_read_racing_a_write_does_not_cache_the_old_row(tmp_path):
+    async def scenario(repository, cache):
+        user_id = uuid.uuid4()
+        deleted = await repository.create_todo(Todo(title="deleted", user_id=user_id))
+        updated = await repository.create_todo(Todo(title="before", user_id=user_id))
+        await cache.delete(repository._todo_key(deleted.id), repository._todo_key(updated.id))
+
+        database = repository.repository
+        read_from_database = database.get_todo_by_id
+
+        async def read_then_write(todo_id, fresh=False):
+            # The row is read, then another request writes before it is cached
+            todo = await read_from_database(todo_id, fresh=fresh)
+            if todo_id == deleted.id:
+                await repository.delete_todo(deleted.id, user_id)
+            else:
+                await repository.update_todo(updated.id, user_id, {"title": "after"})
+            return todo
+
+        database.get_todo_by_id = read_then_write
+        assert (await repository.get_todo_by_id(deleted.id)).title == "deleted"
+        assert (await repository.get_todo_by_id(updated.id)).title == "before"
+        database.get_todo_by_id = read_from_database
+
+        assert await repository.get_todo_by_id(deleted.id) is None
+        assert (await repository.get_todo_by_id(updated.id)).title == "after"
+
+    run_with_repository(tmp_path, scenario)
+
+
+def test_updates_finishing_out_of_order_do_not_cache_the_older_row(tmp_path):
+    async def scenario(repository, cache):
+        user_id = uuid.uuid4()
+        todo = await repository.create_todo(Todo(title="before", user_id=user_id))
+
+        database = repository.repository
+        update_in_database = database.update_todo
+
+        async def overtaken_update(todo_id, user_id, changes, expected_updated_at=None):
+            # The first update commits, then a second one commits and returns first
+            first = await update_in_database(todo_id, user_id, changes, expected_updated_at)
+            database.update_todo = update_in_database
+            await repository.update_todo(todo_id, user_id, {"title": "second"})
+            return first
+
+        database.update_todo = overtaken_update
+        assert (await repository.update_todo(todo.id, user_id, {"title": "first"})).title == "first"
+
+        assert (await repository.get_todo_by_id(todo.id)).title == "second"
+        assert (await repository.get_todo_by_id(todo.id)).title == "second"
+
+    run_with_repository(tmp_path, scenario)
@@ -0,0 +1,67 @@
+import os
+
+import pytest
+import uvicorn
+
+from app import cli
+
+
+def test_server_settings_from_env_and_flags(monkeypatch):
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+    monkeypatch.setenv("SERVER_LIMIT_CONCURRENCY", "")
+    monkeypatch.setenv("SERVER_KEEP_ALIVE", "15")
+
+    settings = cli.parse_server_settings(["--port", "9000", "--loop", "uvloop", "--limit-concurrency", "200"])
+
+    assert settings.workers == 3
+    assert settings.port == 9000
+    assert settings.keep_alive == 15
+    assert settings.loop == "uvloop"
+    assert settings.limit_concurrency == 200
+    assert settings.preload is False
+
+
+def test_workers_default_to_cpu_count(monkeypatch):
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    monkeypatch.setenv("TOKEN_DENYLIST_BACKEND", "redis")
+    assert cli.parse_server_settings([]).workers == (os.cpu_count() or 1)
+
+
+def test_workers_default_to_one_with_a_per_worker_denylist(monkeypatch):
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    monkeypatch.setenv("TOKEN_DENYLIST_BACKEND", "memory")
+    calls = []
+    monkeypatch.setattr(uvicorn, "run", lambda app, **kwargs: calls.append(kwargs))
+
+    cli.run_start([])
+    assert calls[0]["workers"] == 1
+
+
+def test_run_start_passes_tuning_to_uvicorn(monkeypatch, capsys):
+    monkeypatch.setenv("TOKEN_DENYLIST_BACKEND", "redis")
+    monkeypatch.setenv("RATE_LIMIT_BACKEND", "memory")
+    calls = []
+    monkeypatch.setattr(uvicorn, "run", lambda app, **kwargs: calls.append((app, kwargs)))
+
+    cli.run_start(["--workers", "2", "--backlog", "4096", "--graceful-timeout", "10"])
+
+    app, kwargs = calls[0]
+    assert app == "app.main:create_app"
+    assert kwargs["factory"] is True
+    assert kwargs["workers"] == 2
+    assert kwargs["backlog"] == 4096
+    assert kwargs["timeout_graceful_shutdown"] == 10
+    assert "RATE_LIMIT_BACKEND=redis" in capsys.readouterr().out
+
+
+def test_run_start_refuses_workers_with_a_per_worker_denylist(monkeypatch):
+    monkeypatch.setenv("TOKEN_DENYLIST_BACKEND", "memory")
+    calls = []
+    monkeypatch.setattr(uvicorn, "run", lambda app, **kwargs: calls.append(kwargs))
+
+    with pytest.raises(SystemExit):
+        cli.run_start(["--workers", "2"])
+    assert calls == []
+
+    cli.run_start(["--workers", "1"])
+    assert calls[0]["workers"] == 1
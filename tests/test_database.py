@@ -0,0 +1,123 @@
+import asyncio
+import uuid
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.domain.entities import Todo
+
+from app.infrastructure.database import (
+    DatabaseSettings,
+    LazySession,
+    create_engine_from_settings,
+    pool_metrics,
+)
+from app.infrastructure.models import Base
+from app.infrastructure.todo_repository import SQLAlchemyTodoRepository
+
+
+def test_sqlite_engine_applies_pragmas(tmp_path):
+    settings = DatabaseSettings(
+        url=f"sqlite+aiosqlite:///{tmp_path / 'pragmas.db'}",
+        sqlite_busy_timeout_ms=1234,
+    )
+    engine = create_engine_from_settings(settings)
+
+    async def read_pragmas():
+        async with engine.connect() as conn:
+            journal_mode = (await conn.execute(text("PRAGMA journal_mode"))).scalar()
+            busy_timeout = (await conn.execute(text("PRAGMA busy_timeout"))).scalar()
+            synchronous = (await conn.execute(text("PRAGMA synchronous"))).scalar()
+        await engine.dispose()
+        return journal_mode, busy_timeout, synchronous
+
+    assert asyncio.run(read_pragmas()) == ("wal", 1234, 1)
+
+
+def test_engine_is_quiet_by_default(tmp_path):
+    engine = create_engine_from_settings(
+        DatabaseSettings(url=f"sqlite+aiosqlite:///{tmp_path / 'quiet.db'}", pool_size=3)
+    )
+    assert engine.echo is False
+    assert pool_metrics(engine)["size"] == 3
+
+
+def test_blank_settings_fall_back_to_defaults(monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "")
+    monkeypatch.setenv("DB_MAX_OVERFLOW", "20")
+    monkeypatch.setenv("DB_STATEMENT_TIMEOUT_MS", "")
+
+    settings = DatabaseSettings.from_env()
+
+    assert settings.pool_size == 5
+    assert settings.max_overflow == 20
+    assert settings.statement_timeout_ms is None
+
+
+def test_lazy_session_opens_on_first_use(tmp_path):
+    engine = create_engine_from_settings(DatabaseSettings(url=f"sqlite+aiosqlite:///{tmp_path / 'lazy.db'}"))
+    opened = []
+
+    def factory():
+        opened.append(AsyncSession(engine))
+        return opened[-1]
+
+    async def use_sessions():
+        unused = LazySession(factory)
+        unused.info["user"] = "a"
+        await unused.close()
+        assert opened == []
+
+        session = LazySession(factory)
+        session.info["user"] = "b"
+        assert (await session.execute(text("SELECT 1"))).scalar() == 1
+        await session.close()
+        await engine.dispose()
+        return session
+
+    session = asyncio.run(use_sessions())
+    assert len(opened) == 1
+    assert session.is_open and opened[0].info == {"user": "b"}
+
+
+def test_search_falls_back_to_like_on_other_databases(tmp_path, monkeypatch):
+    async def run():
+        engine = create_engine_from_settings(DatabaseSettings(url=f"sqlite+aiosqlite:///{tmp_path / 'like.db'}"))
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        # Any dialect without full-text support takes the portable path
+        monkeypatch.setattr(engine.dialect, "name", "mssql")
+        user_id = uuid.uuid4()
+        async with AsyncSession(engine) as session:
+            repository = SQLAlchemyTodoRepository(session)
+            for title, description in (("Buy Groceries", "bread and milk"), ("Call 100% of leads", None),
+                                       ("Bake bread", "sourdough")):
+                await repository.create_todo(Todo(title=title, description=description, user_id=user_id))
+
+            async def search(query):
+                return [todo.title for todo in await repository.search_todos(user_id, query, limit=10)]
+
+            assert await search("BREAD") == ["Bake bread", "Buy Groceries"]
+            assert await search("bread milk") == ["Buy Groceries"]
+            assert await search("100%") == ["Call 100% of leads"]
+            assert await search("_") == []
+            assert await search("  ") == []
+        await engine.dispose()
+
+    asyncio.run(run())
+
+
+def test_failed_statement_does_not_leak_its_start_time(tmp_path):
+    async def run():
+        engine = create_engine_from_settings(DatabaseSettings(url=f"sqlite+aiosqlite:///{tmp_path / 'timing.db'}"))
+        async with engine.connect() as conn:
+            try:
+                await conn.execute(text("SELECT * FROM missing_table"))
+            except Exception:
+                pass
+            assert "query_start_time" not in conn.sync_connection.info
+            await conn.execute(text("SELECT 1"))
+            assert "query_start_time" not in conn.sync_connection.info
+        await engine.dispose()
+
+    asyncio.run(run())
@@ -1,6 +1,12 @@
+import os
+import subprocess
+import sys
+
 import pytest
 from fastapi.testclient import TestClient
-from app.main import app
+from app.main import app, create_app
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 client = TestClient(app)
 
@@ -15,3 +21,42 @@ def test_health_check():
     response = client.get("/health")
     assert response.status_code == 200
     assert response.json() == {"status": "healthy"}
+
+
+def test_database_health_check():
+    response = client.get("/health/db")
+    assert response.status_code == 200
+    assert response.json()["pool"]["pool_class"]
+
+
+def test_metrics_endpoint_reports_routes_and_queries():
+    client.get("/health")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert 'http_request_duration_seconds_count{method="GET",route="/health",status="200"}' in response.text
+    assert "http_request_db_queries" in response.text
+
+
+def test_server_timing_header():
+    response = client.get("/health")
+    assert "app;dur=" in response.headers["Server-Timing"]
+
+
+def test_create_app_defers_engine_and_crypto():
+    # A fresh interpreter, so modules imported by other tests don't count
+    code = (
+        "import sys, app.main; app.main.create_app(); "
+        "from app.infrastructure import database; "
+        "assert database._engine is None; "
+        "assert not {'cryptography', 'passlib'} & set(sys.modules), sorted(sys.modules)"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=ROOT)
+
+
+def test_lifespan_creates_and_disposes_engine():
+    from app.infrastructure import database
+
+    with TestClient(create_app()) as lifespan_client:
+        assert database._engine is not None
+        assert lifespan_client.get("/health/db").status_code == 200
+    assert database._engine is None
@@ -0,0 +1,96 @@
+import asyncio
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.infrastructure.rate_limit import InMemoryRateLimitStore, Rate
+from app.interfaces import rate_limit
+from app.interfaces.rate_limit import RateLimitMiddleware
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def hits(store, key, rate, count):
+    async def run():
+        return [await store.hit(key, rate) for _ in range(count)]
+
+    return asyncio.run(run())
+
+
+def test_parse_rate():
+    assert Rate.parse("10/minute") == Rate(limit=10, window=60)
+    assert Rate.parse("5/30s") == Rate(limit=5, window=30)
+    assert Rate.parse("") is None
+    with pytest.raises(ValueError):
+        Rate.parse("10 per minute")
+
+
+def test_sliding_window_weights_the_previous_window():
+    clock = FakeClock()
+    store = InMemoryRateLimitStore(shards=4, clock=clock)
+    rate = Rate(limit=4, window=10)
+
+    assert [result.allowed for result in hits(store, "k", rate, 5)] == [True, True, True, True, False]
+    rejected = hits(store, "k", rate, 1)[0]
+    assert 10 < rejected.retry_after <= 20
+
+    # Half way into the next window half of the 4 previous hits still count
+    clock.now += 15
+    assert [result.allowed for result in hits(store, "k", rate, 3)] == [True, True, False]
+    # Other keys have their own counters
+    assert hits(store, "other", rate, 1)[0].allowed
+
+
+def test_in_memory_store_bounds_each_shard():
+    clock = FakeClock()
+    store = InMemoryRateLimitStore(shards=2, max_keys_per_shard=10, clock=clock)
+    rate = Rate(limit=1, window=1)
+    for i in range(100):
+        hits(store, f"key-{i}", rate, 1)
+    assert len(store) <= 20
+
+
+def test_login_is_throttled_per_email(client, monkeypatch):
+    monkeypatch.setattr(rate_limit, "rate_limit_store", InMemoryRateLimitStore())
+    credentials = {"username": f"{uuid.uuid4().hex[:8]}@example.com", "password": "wrong"}
+
+    statuses = [client.post("/auth/token", data=credentials).status_code for _ in range(6)]
+    assert statuses == [401] * 5 + [429]
+    response = client.post("/auth/token", data=credentials)
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+def test_middleware_limits_per_client_and_skips_health():
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, store=InMemoryRateLimitStore(), rate=Rate(limit=2, window=60))
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    @app.get("/health/db")
+    async def health_db():
+        return {"status": "healthy"}
+
+    @app.get("/healthz")
+    async def healthz():
+        return {"status": "healthy"}
+
+    client = TestClient(app)
+    assert [client.get("/ping").status_code for _ in range(3)] == [200, 200, 429]
+    assert client.get("/ping").headers["Retry-After"]
+    assert client.get("/health").status_code == 200
+    assert client.get("/health/db").status_code == 200
+    assert client.get("/healthz").status_code == 429
@@ -0,0 +1,106 @@
+import asyncio
+import uuid
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.domain.entities import Todo, User
+from app.infrastructure.database import DatabaseSettings, create_engine_from_settings
+from app.infrastructure.models import Base
+from app.infrastructure.routing import READ_YOUR_WRITES_KEY, DatabaseRouter, RoutingSession
+from app.infrastructure.todo_repository import SQLAlchemyTodoRepository
+from app.infrastructure.user_repository import SQLAlchemyUserRepository
+
+
+def run_with_router(tmp_path, scenario, **router_options):
+    """Primary plus two replicas, each its own SQLite file and never replicated to."""
+    async def run():
+        engines = [
+            create_engine_from_settings(DatabaseSettings(url=f"sqlite+aiosqlite:///{tmp_path / name}"))
+            for name in ("primary.db", "replica-a.db", "replica-b.db")
+        ]
+        for engine in engines:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+        router = DatabaseRouter(engines[0], engines[1:], **router_options)
+        make_session = sessionmaker(
+            engines[0], class_=AsyncSession, expire_on_commit=False,
+            sync_session_class=RoutingSession, router=router,
+        )
+        try:
+            await scenario(router, make_session)
+        finally:
+            for engine in engines:
+                await engine.dispose()
+
+    asyncio.run(run())
+
+
+async def seed_replica(engine, user_id, title):
+    async with sessionmaker(engine, class_=AsyncSession)() as session:
+        await SQLAlchemyTodoRepository(session).create_todo(Todo(title=title, user_id=user_id))
+
+
+def test_writes_go_to_primary_and_reads_round_robin_over_replicas(tmp_path):
+    async def scenario(router, make_session):
+        user_id = uuid.uuid4()
+        await seed_replica(router.replicas[0], user_id, "from a")
+        await seed_replica(router.replicas[1], user_id, "from b")
+
+        async with make_session() as session:
+            created = await SQLAlchemyTodoRepository(session).create_todo(Todo(title="primary", user_id=user_id))
+        assert created.title == "primary"
+
+        titles = []
+        for _ in range(4):
+            async with make_session() as session:
+                todos = await SQLAlchemyTodoRepository(session).get_todos_by_user_id(user_id)
+                titles.append([todo.title for todo in todos])
+        assert titles == [["from a"], ["from b"], ["from a"], ["from b"]]
+
+    run_with_router(tmp_path, scenario, read_your_writes_seconds=0)
+
+
+def test_reads_stick_to_primary_after_a_write(tmp_path):
+    async def scenario(router, make_session):
+        user_id = uuid.uuid4()
+        async with make_session() as session:
+            session.info[READ_YOUR_WRITES_KEY] = user_id
+            todo = await SQLAlchemyTodoRepository(session).create_todo(Todo(title="mine", user_id=user_id))
+
+        async with make_session() as session:
+            session.info[READ_YOUR_WRITES_KEY] = user_id
+            repository = SQLAlchemyTodoRepository(session)
+            assert (await repository.get_todo_by_id(todo.id)).title == "mine"
+
+        # Somebody else's reads still go to a (lagging) replica
+        async with make_session() as session:
+            session.info[READ_YOUR_WRITES_KEY] = uuid.uuid4()
+            assert await SQLAlchemyTodoRepository(session).get_todo_by_id(todo.id) is None
+
+    run_with_router(tmp_path, scenario, read_your_writes_seconds=60)
+
+
+def test_user_lookup_falls_back_to_primary(tmp_path):
+    async def scenario(router, make_session):
+        async with make_session() as session:
+            user = await SQLAlchemyUserRepository(session).create_user(
+                User(email="new@example.com", username="new", hashed_password="x")
+            )
+
+        async with make_session() as session:
+            repository = SQLAlchemyUserRepository(session)
+            assert (await repository.get_user_by_email("new@example.com")).id == user.id
+            assert (await repository.get_user_by_id(user.id)).email == "new@example.com"
+            assert await repository.get_user_by_email("missing@example.com") is None
+
+    run_with_router(tmp_path, scenario, read_your_writes_seconds=0)
+
+
+def test_least_connections_prefers_idle_replica(tmp_path):
+    async def scenario(router, make_session):
+        async with router.replicas[0].connect():
+            assert router.choose_replica() is router.replicas[1]
+            assert router.choose_replica() is router.replicas[1]
+
+    run_with_router(tmp_path, scenario, strategy="least_connections")
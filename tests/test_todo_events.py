@@ -0,0 +1,103 @@
+import asyncio
+import uuid
+
+from app.application.todo_events import TodoEventBroker
+from app.domain.entities import Todo, TodoEvent
+from app.interfaces import todo_controller
+
+
+class FakeRequest:
+    async def is_disconnected(self) -> bool:
+        return False
+
+
+def created(user_id, title="todo"):
+    todo = Todo(title=title, user_id=user_id)
+    return TodoEvent(type="created", user_id=user_id, todo_id=todo.id, todo=todo)
+
+
+def test_broker_delivers_to_the_users_subscribers_only():
+    async def run():
+        broker = TodoEventBroker()
+        user_id = uuid.uuid4()
+        mine = broker.subscribe(user_id)
+        theirs = broker.subscribe(uuid.uuid4())
+        event = created(user_id)
+        await broker.publish([event])
+        assert await mine.get() == event
+        assert theirs.queue.empty()
+        broker.unsubscribe(mine)
+        broker.unsubscribe(theirs)
+        assert broker.subscriber_count() == 0
+
+    asyncio.run(run())
+
+
+def test_ring_buffer_replays_after_last_event_id():
+    async def run():
+        broker = TodoEventBroker(buffer_size=3)
+        user_id = uuid.uuid4()
+        events = [created(user_id, f"todo {i}") for i in range(5)]
+        await broker.publish(events)
+        assert broker.events_after(user_id, events[2].id) == events[3:]
+        assert broker.events_after(user_id, events[4].id) == []
+        # Evicted from the ring buffer
+        assert broker.events_after(user_id, events[0].id) is None
+        assert broker.events_after(uuid.uuid4(), events[4].id) is None
+
+    asyncio.run(run())
+
+
+def test_slow_subscriber_is_cut_off():
+    async def run():
+        broker = TodoEventBroker(max_queued=2)
+        user_id = uuid.uuid4()
+        subscription = broker.subscribe(user_id)
+        await broker.publish([created(user_id) for _ in range(3)])
+        assert await subscription.get() is None
+
+    asyncio.run(run())
+
+
+def test_event_stream_resumes_from_last_event_id():
+    async def run():
+        user_id = uuid.uuid4()
+        missed = [created(user_id, f"missed {i}") for i in range(3)]
+        await todo_controller.todo_events.publish(missed)
+
+        stream = todo_controller._event_stream(FakeRequest(), user_id, missed[0].id)
+        assert await stream.__anext__() == b"retry: 3000\n\n"
+        replayed = [await stream.__anext__(), await stream.__anext__()]
+        assert [message.split(b"\n")[0] for message in replayed] == [
+            f"id: {event.id}".encode() for event in missed[1:]
+        ]
+
+        live = TodoEvent(type="deleted", user_id=user_id, todo_id=uuid.uuid4())
+        await todo_controller.todo_events.publish([live])
+        message = await stream.__anext__()
+        assert message.startswith(f"id: {live.id}\nevent: deleted\n".encode())
+        await stream.aclose()
+        assert todo_controller.todo_events.subscriber_count() == 0
+
+        stream = todo_controller._event_stream(FakeRequest(), user_id, "unknown")
+        await stream.__anext__()
+        assert await stream.__anext__() == b"event: reset\ndata: {}\n\n"
+        await stream.aclose()
+
+    asyncio.run(run())
+
+
+def test_todo_writes_publish_events(client, auth_headers):
+    user_id = uuid.UUID(client.get("/auth/me", headers=auth_headers).json()["id"])
+    subscription = todo_controller.todo_events.subscribe(user_id)
+    try:
+        todo = client.post("/todos/", json={"title": "watched"}, headers=auth_headers).json()
+        client.put(f"/todos/{todo['id']}", json={"completed": True}, headers=auth_headers)
+        client.delete(f"/todos/{todo['id']}", headers=auth_headers)
+        events = [subscription.queue.get_nowait() for _ in range(3)]
+    finally:
+        todo_controller.todo_events.unsubscribe(subscription)
+    assert [(event.type, str(event.todo_id)) for event in events] == [
+        ("created", todo["id"]), ("updated", todo["id"]), ("deleted", todo["id"])
+    ]
+    assert events[1].todo.completed
@@ -0,0 +1,398 @@
+import asyncio
+import json
+import os
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.application.todo_import import parse_records
+
+
+def create_todos(client, headers, count, **fields):
+    return [
+        client.post("/todos/", json={"title": f"todo {i}", **fields}, headers=headers).json()
+        for i in range(count)
+    ]
+
+
+def test_todo_crud(client, auth_headers):
+    created = client.post(
+        "/todos/", json={"title": "Learn FastAPI", "description": "hexagonal"}, headers=auth_headers
+    ).json()
+    assert created["completed"] is False
+
+    response = client.put(
+        f"/todos/{created['id']}", json={"completed": True}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["completed"] is True
+
+    response = client.get(f"/todos/{created['id']}", headers=auth_headers)
+    assert response.json()["title"] == "Learn FastAPI"
+
+    response = client.delete(f"/todos/{created['id']}", headers=auth_headers)
+    assert response.status_code == 200
+    assert client.get(f"/todos/{created['id']}", headers=auth_headers).status_code == 404
+
+
+def test_todos_keyset_pagination(client, auth_headers):
+    created = create_todos(client, auth_headers, 5)
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/todos/", params=params, headers=auth_headers)
+        assert response.status_code == 200
+        seen.extend(todo["id"] for todo in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert seen == [todo["id"] for todo in created]
+
+
+def test_todos_listing_pages_are_read_in_index_order():
+    engine = create_engine(os.environ["DATABASE_URL"])
+    query = (
+        "EXPLAIN QUERY PLAN SELECT * FROM todos WHERE user_id = :user_id {filter}"
+        "AND (created_at > :created_at OR (created_at = :created_at AND id > :id)) "
+        "ORDER BY created_at, id LIMIT 100"
+    )
+    params = {"user_id": str(uuid.uuid4()), "created_at": datetime.utcnow(), "id": str(uuid.uuid4())}
+    with engine.connect() as conn:
+        for filter, index in (("", "ix_todos_user_created_id"),
+                              ("AND completed = 1 ", "ix_todos_user_completed_created_id")):
+            plan = " ".join(row[-1] for row in conn.execute(text(query.format(filter=filter)), params))
+            assert index in plan
+            assert "TEMP B-TREE" not in plan
+    engine.dispose()
+
+
+def test_todos_filter_by_completed(client, auth_headers):
+    todos = create_todos(client, auth_headers, 3)
+    client.put(f"/todos/{todos[1]['id']}", json={"completed": True}, headers=auth_headers)
+
+    response = client.get("/todos/", params={"completed": True}, headers=auth_headers)
+    assert [todo["id"] for todo in response.json()] == [todos[1]["id"]]
+
+    response = client.get("/todos/", params={"completed": False}, headers=auth_headers)
+    assert len(response.json()) == 2
+
+
+def test_todos_invalid_cursor(client, auth_headers):
+    response = client.get("/todos/", params={"cursor": "not-a-cursor"}, headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_export_todos_ndjson(client, auth_headers):
+    created = create_todos(client, auth_headers, 3)
+
+    response = client.get("/todos/export", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [todo["id"] for todo in lines] == [todo["id"] for todo in created]
+
+
+def test_export_todos_json_array(client, auth_headers):
+    created = create_todos(client, auth_headers, 3)
+
+    response = client.get("/todos/export", params={"format": "json"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert [todo["id"] for todo in response.json()] == [todo["id"] for todo in created]
+
+
+def test_export_todos_empty(client, auth_headers):
+    response = client.get("/todos/export", params={"format": "json"}, headers=auth_headers)
+    assert response.json() == []
+
+
+def test_import_todos_csv(client, auth_headers):
+    body = (
+        "\ufeffTitle,Description,Completed,Created_At\n"
+        'Buy milk,"two\nlines, quoted",true,2024-01-02T03:04:05+02:00\n'
+        ",no title,false,\n"
+        "\n"
+        "Walk dog,,not-a-bool,\n"
+        "Call mom,,,\n"
+    ).encode()
+    response = client.post("/todos/import", content=body, headers={**auth_headers, "Content-Type": "text/csv"})
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["imported"], result["failed"], result["aborted"]) == (2, 2, None)
+    assert [error["row"] for error in result["errors"]] == [4, 6]
+    assert result["errors"][0]["detail"].startswith("title:")
+
+    todos = client.get("/todos/", headers=auth_headers).json()
+    assert [(todo["title"], todo["completed"]) for todo in todos] == [("Buy milk", True), ("Call mom", False)]
+    assert todos[0]["description"] == "two\nlines, quoted"
+    assert todos[0]["created_at"].startswith("2024-01-02T01:04:05")
+    assert client.get("/todos/stats", headers=auth_headers).json()["total"] == 2
+
+
+def test_import_todos_round_trips_an_export(client, auth_headers):
+    create_todos(client, auth_headers, 3)
+    exported = client.get("/todos/export", headers=auth_headers).content
+
+    response = client.post(
+        "/todos/import", params={"format": "ndjson"}, content=exported + b"{oops\n", headers=auth_headers
+    )
+    result = response.json()
+    assert (result["imported"], result["failed"]) == (3, 1)
+    assert result["errors"][0]["row"] == 4
+    titles = [todo["title"] for todo in client.get("/todos/", headers=auth_headers).json()]
+    assert sorted(titles) == sorted(["todo 0", "todo 1", "todo 2"] * 2)
+
+
+def test_import_todos_json_array_cut_short(client, auth_headers):
+    body = b'[{"title": "one"}, {"title": "two", "completed": 1}, {"title": "thr'
+    response = client.post(
+        "/todos/import", content=body, headers={**auth_headers, "Content-Type": "application/json"}
+    )
+    assert response.status_code == 400
+    assert response.json()["imported"] == 2
+    assert response.json()["aborted"].startswith("Item 3")
+
+    response = client.post("/todos/import", content=b"title\n", headers=auth_headers)
+    assert response.status_code == 415
+
+
+@pytest.mark.parametrize("format, body", [
+    ("csv", 'title,description\n"a ""quoted""\r\ntitle",x\nb,\u00e9t\u00e9\n'.encode()),
+    ("ndjson", '{"title": "a"}\n\n{"title": "\u00e9t\u00e9"}'.encode()),
+    ("json", '[ {"title": "a", "n": 12345}, 7 ,{"title": "\u00e9t\u00e9"} ]'.encode()),
+])
+def test_parse_records_is_independent_of_chunking(format, body):
+    async def parse(chunk_size):
+        async def chunks():
+            for start in range(0, len(body), chunk_size):
+                yield body[start:start + chunk_size]
+        return [record async for records in parse_records(chunks(), format) for record in records]
+
+    whole = asyncio.run(parse(len(body)))
+    assert len(whole) >= 2
+    assert asyncio.run(parse(1)) == whole
+
+
+def test_search_todos(client, auth_headers):
+    def search(q, **params):
+        response = client.get("/todos/search", params={"q": q, **params}, headers=auth_headers)
+        assert response.status_code == 200
+        return [todo["title"] for todo in response.json()]
+
+    client.post("/todos/", json={"title": "Buy groceries", "description": "milk and bread"}, headers=auth_headers)
+    client.post("/todos/", json={"title": "Bake bread", "description": "sourdough"}, headers=auth_headers)
+    renamed = client.post("/todos/", json={"title": "Call plumber"}, headers=auth_headers).json()
+
+    # Title matches rank above description matches; stemming and prefixes apply
+    assert search("bread") == ["Bake bread", "Buy groceries"]
+    assert search("baking") == ["Bake bread"]
+    assert search("groc") == ["Buy groceries"]
+    assert search("bread", limit=1, offset=1) == ["Buy groceries"]
+    assert search('milk AND (') == ["Buy groceries"]
+
+    client.put(f"/todos/{renamed['id']}", json={"title": "Call electrician"}, headers=auth_headers)
+    assert search("plumber") == []
+    assert search("electrician") == ["Call electrician"]
+
+    client.delete(f"/todos/{renamed['id']}", headers=auth_headers)
+    assert search("electrician") == []
+
+    email = "searcher@example.com"
+    client.post("/auth/register", json={"email": email, "username": "searcher", "password": "secret123"})
+    token = client.post("/auth/token", data={"username": email, "password": "secret123"}).json()["access_token"]
+    response = client.get("/todos/search", params={"q": "bread"}, headers={"Authorization": f"Bearer {token}"})
+    assert response.json() == []
+
+
+def test_todo_changes_delta_sync(client, auth_headers, monkeypatch):
+    from app.interfaces import todo_controller
+
+    monkeypatch.setattr(todo_controller, "TODO_SYNC_SETTLE_SECONDS", 0)
+
+    def changes(**params):
+        response = client.get("/todos/changes", params=params, headers=auth_headers)
+        assert response.status_code == 200
+        return response.json()
+
+    kept, updated, deleted = create_todos(client, auth_headers, 3)
+    full = changes()
+    assert [todo["id"] for todo in full["todos"]] == [kept["id"], updated["id"], deleted["id"]]
+    assert full["deleted"] == [] and not full["has_more"]
+    caught_up = changes(since=full["cursor"])
+    assert caught_up["todos"] == [] and caught_up["deleted"] == []
+
+    client.put(f"/todos/{updated['id']}", json={"completed": True}, headers=auth_headers)
+    client.delete(f"/todos/{deleted['id']}", headers=auth_headers)
+    delta = changes(since=full["cursor"])
+    assert [(todo["id"], todo["completed"]) for todo in delta["todos"]] == [(updated["id"], True)]
+    assert [tombstone["id"] for tombstone in delta["deleted"]] == [deleted["id"]]
+
+    # Paging through the same delta one change at a time
+    first = changes(since=full["cursor"], limit=1)
+    second = changes(since=first["cursor"], limit=1)
+    assert first["has_more"] and len(first["todos"]) == 1 and first["deleted"] == []
+    assert second["todos"] == [] and len(second["deleted"]) == 1
+
+    # Fresh writes are held back until they have settled
+    monkeypatch.setattr(todo_controller, "TODO_SYNC_SETTLE_SECONDS", 60)
+    create_todos(client, auth_headers, 1)
+    assert changes(since=delta["cursor"])["todos"] == []
+
+    expired = todo_controller.encode_cursor(datetime(2000, 1, 1), uuid.uuid4())
+    response = client.get("/todos/changes", params={"since": expired}, headers=auth_headers)
+    assert response.status_code == 410
+
+
+def test_todo_stats(client, auth_headers):
+    todos = create_todos(client, auth_headers, 4)
+    client.put(f"/todos/{todos[0]['id']}", json={"completed": True}, headers=auth_headers)
+    client.delete(f"/todos/{todos[1]['id']}", headers=auth_headers)
+    client.post(
+        "/todos/batch",
+        json={"operations": [
+            {"op": "create", "title": "done", "completed": True},
+            {"op": "update", "id": todos[2]["id"], "completed": True},
+            {"op": "update", "id": todos[2]["id"], "completed": False},
+        ]},
+        headers=auth_headers,
+    )
+
+    stats = client.get("/todos/stats", headers=auth_headers).json()
+    assert (stats["total"], stats["completed"], stats["pending"]) == (4, 2, 2)
+    assert stats["completion_rate"] == 0.5
+    today = datetime.utcnow().date()
+    assert stats["buckets"] == [
+        {"period": today.isoformat(), "created": 4, "completed": 2, "completion_rate": 0.5}
+    ]
+
+    weekly = client.get("/todos/stats", params={"group_by": "week"}, headers=auth_headers).json()
+    monday = today - timedelta(days=today.weekday())
+    assert [bucket["period"] for bucket in weekly["buckets"]] == [monday.isoformat()]
+    later = client.get("/todos/stats", params={"since": (today + timedelta(days=1)).isoformat()},
+                       headers=auth_headers).json()
+    assert later["buckets"] == [] and later["total"] == 4
+
+
+def test_update_and_delete_other_users_todo_is_forbidden(client, auth_headers):
+    todo = create_todos(client, auth_headers, 1)[0]
+
+    email = "intruder@example.com"
+    client.post("/auth/register", json={"email": email, "username": "intruder", "password": "secret123"})
+    token = client.post("/auth/token", data={"username": email, "password": "secret123"}).json()["access_token"]
+    intruder = {"Authorization": f"Bearer {token}"}
+
+    assert client.put(f"/todos/{todo['id']}", json={"title": "x"}, headers=intruder).status_code == 403
+    assert client.delete(f"/todos/{todo['id']}", headers=intruder).status_code == 403
+    assert client.get(f"/todos/{todo['id']}", headers=auth_headers).json()["title"] == todo["title"]
+
+
+def test_update_missing_todo_is_not_found(client, auth_headers):
+    missing = "00000000-0000-0000-0000-000000000000"
+    assert client.put(f"/todos/{missing}", json={"title": "x"}, headers=auth_headers).status_code == 404
+    assert client.delete(f"/todos/{missing}", headers=auth_headers).status_code == 404
+
+
+def test_update_bumps_updated_at(client, auth_headers):
+    todo = create_todos(client, auth_headers, 1)[0]
+    updated = client.put(f"/todos/{todo['id']}", json={"title": "renamed"}, headers=auth_headers).json()
+    assert updated["title"] == "renamed"
+    assert updated["updated_at"] > todo["updated_at"]
+
+
+def test_batch_operations(client, auth_headers):
+    existing = create_todos(client, auth_headers, 2)
+    missing = "00000000-0000-0000-0000-000000000000"
+
+    response = client.post(
+        "/todos/batch",
+        json={
+            "operations": [
+                {"op": "create", "title": "from batch"},
+                {"op": "update", "id": existing[0]["id"], "completed": True},
+                {"op": "delete", "id": existing[1]["id"]},
+                {"op": "delete", "id": missing},
+                {"op": "update"},
+            ]
+        },
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["status"] for result in results] == [201, 200, 200, 404, 422]
+    assert results[0]["todo"]["title"] == "from batch"
+    assert results[1]["todo"]["completed"] is True
+
+    remaining = {todo["id"] for todo in client.get("/todos/", headers=auth_headers).json()}
+    assert remaining == {results[0]["id"], existing[0]["id"]}
+
+
+def test_get_todo_conditional(client, auth_headers):
+    todo = create_todos(client, auth_headers, 1)[0]
+
+    response = client.get(f"/todos/{todo['id']}", headers=auth_headers)
+    etag = response.headers["ETag"]
+    assert "Last-Modified" in response.headers
+
+    response = client.get(f"/todos/{todo['id']}", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+    client.put(f"/todos/{todo['id']}", json={"completed": True}, headers=auth_headers)
+    response = client.get(f"/todos/{todo['id']}", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+
+
+def test_get_todos_conditional(client, auth_headers):
+    create_todos(client, auth_headers, 2)
+
+    etag = client.get("/todos/", headers=auth_headers).headers["ETag"]
+    response = client.get("/todos/", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+    create_todos(client, auth_headers, 1)
+    response = client.get("/todos/", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(response.json()) == 3
+
+    # Updates and deletes move the version too
+    for change in (
+        lambda todo: client.put(f"/todos/{todo['id']}", json={"completed": True}, headers=auth_headers),
+        lambda todo: client.delete(f"/todos/{todo['id']}", headers=auth_headers),
+    ):
+        response = client.get("/todos/", headers=auth_headers)
+        etag = response.headers["ETag"]
+        change(response.json()[0])
+        assert client.get("/todos/", headers={**auth_headers, "If-None-Match": etag}).status_code == 200
+
+
+def test_if_match_optimistic_concurrency(client, auth_headers):
+    todo = create_todos(client, auth_headers, 1)[0]
+    etag = client.get(f"/todos/{todo['id']}", headers=auth_headers).headers["ETag"]
+
+    response = client.put(
+        f"/todos/{todo['id']}", json={"title": "first"}, headers={**auth_headers, "If-Match": etag}
+    )
+    assert response.status_code == 200
+    new_etag = response.headers["ETag"]
+
+    response = client.put(
+        f"/todos/{todo['id']}", json={"title": "stale"}, headers={**auth_headers, "If-Match": etag}
+    )
+    assert response.status_code == 412
+
+    response = client.delete(f"/todos/{todo['id']}", headers={**auth_headers, "If-Match": etag})
+    assert response.status_code == 412
+    response = client.delete(f"/todos/{todo['id']}", headers={**auth_headers, "If-Match": new_etag})
+    assert response.status_code == 200
+
+
+def test_server_timing_counts_queries(client, auth_headers):
+    response = client.get("/todos/", headers=auth_headers)
+    server_timing = response.headers["Server-Timing"]
+    assert 'queries";dur=' in server_timing
+    assert "db;desc=\"0 queries\"" not in server_timing
@@ -0,0 +1,172 @@
+import asyncio
+import os
+import uuid
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.domain.entities import Todo
+from app.domain.exceptions import ServiceBusyError
+from app.infrastructure.database import DatabaseSettings, create_engine_from_settings
+from app.infrastructure.models import Base
+from app.infrastructure.todo_repository import SQLAlchemyTodoRepository
+from app.infrastructure.write_behind import TodoWriteQueue, WriteBehindTodoRepository
+
+
+def run_with_queue(tmp_path, scenario):
+    async def run():
+        engine = create_engine_from_settings(
+            DatabaseSettings(url=f"sqlite+aiosqlite:///{tmp_path / 'write-behind.db'}")
+        )
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        make_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        try:
+            await scenario(make_session)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+def test_writes_are_coalesced_into_one_transaction(tmp_path):
+    async def scenario(make_session):
+        queue = TodoWriteQueue(make_session, max_latency=60)
+        user_id = uuid.uuid4()
+        async with make_session() as session:
+            repository = WriteBehindTodoRepository(SQLAlchemyTodoRepository(session), queue)
+            kept = await repository.create_todo(Todo(title="draft", user_id=user_id))
+            await repository.update_todo(kept.id, user_id, {"title": "final"})
+            await repository.update_todo(kept.id, user_id, {"completed": True})
+            dropped = await repository.create_todo(Todo(title="oops", user_id=user_id))
+            assert await repository.delete_todo(dropped.id, user_id)
+
+            # Queued state is visible before anything was written
+            assert (await repository.get_todo_by_id(kept.id)).title == "final"
+            assert await repository.get_todo_by_id(dropped.id) is None
+            assert queue.flushes == 0
+
+            # Other users can't touch queued todos
+            assert await repository.update_todo(kept.id, uuid.uuid4(), {"title": "x"}) is None
+
+            # A collection read waits for the user's writes to land
+            todos = await repository.get_todos_by_user_id(user_id)
+            assert [(todo.title, todo.completed) for todo in todos] == [("final", True)]
+            assert queue.flushes == 1
+            await queue.close()
+
+        async with make_session() as session:
+            todos = await SQLAlchemyTodoRepository(session).get_todos_by_user_id(user_id)
+            assert [todo.title for todo in todos] == ["final"]
+
+    run_with_queue(tmp_path, scenario)
+
+
+def test_full_batch_flushes_before_max_latency(tmp_path):
+    async def scenario(make_session):
+        queue = TodoWriteQueue(make_session, max_latency=60, max_batch_size=3)
+        async with make_session() as session:
+            repository = WriteBehindTodoRepository(SQLAlchemyTodoRepository(session), queue)
+            for i in range(3):
+                await repository.create_todo(Todo(title=f"todo {i}", user_id=uuid.uuid4()))
+            await asyncio.wait_for(queue.flush(), timeout=5)
+            assert queue.flushes == 1
+            assert queue.flushed_writes == 3
+            await queue.close()
+
+    run_with_queue(tmp_path, scenario)
+
+
+def test_journal_of_dead_worker_is_replayed(tmp_path):
+    journal_dir = str(tmp_path / "journal")
+
+    async def scenario(make_session):
+        user_id = uuid.uuid4()
+        crashed = TodoWriteQueue(make_session, journal_dir=journal_dir, max_latency=60)
+        async with make_session() as session:
+            repository = WriteBehindTodoRepository(SQLAlchemyTodoRepository(session), crashed)
+            todo = await repository.create_todo(Todo(title="journaled", user_id=user_id))
+            await repository.update_todo(todo.id, user_id, {"completed": True})
+        # Simulate the process dying: stop without flushing and release the lock
+        crashed._flusher.cancel()
+        crashed._journal.close()
+        assert len(os.listdir(journal_dir)) == 1
+
+        recovered = TodoWriteQueue(make_session, journal_dir=journal_dir)
+        await recovered.start()
+        async with make_session() as session:
+            replayed = await SQLAlchemyTodoRepository(session).get_todo_by_id(todo.id)
+        assert (replayed.title, replayed.completed) == ("journaled", True)
+        await recovered.close()
+        assert os.listdir(journal_dir) == []
+
+    run_with_queue(tmp_path, scenario)
+
+
+def test_failed_flush_keeps_writes_queued_and_journaled(tmp_path, monkeypatch):
+    journal_dir = str(tmp_path / "journal")
+
+    async def scenario(make_session):
+        user_id = uuid.uuid4()
+        queue = TodoWriteQueue(make_session, journal_dir=journal_dir, max_latency=0.01, max_retries=2)
+
+        async def database_down(self, creates, updates, deletes):
+            raise ConnectionError("database is down")
+
+        monkeypatch.setattr(SQLAlchemyTodoRepository, "apply_write_batch", database_down)
+        async with make_session() as session:
+            repository = WriteBehindTodoRepository(SQLAlchemyTodoRepository(session), queue)
+            todo = await repository.create_todo(Todo(title="acknowledged", user_id=user_id))
+            # Readers are told, rather than shown a list without the write
+            with pytest.raises(ServiceBusyError):
+                await repository.get_todos_by_user_id(user_id)
+            assert queue.health()["status"] == "failing"
+            # A newer write lands on top of the requeued create
+            await repository.update_todo(todo.id, user_id, {"completed": True})
+            assert (await repository.get_todo_by_id(todo.id)).completed
+
+        # The worker stops while the database is still down
+        await queue.close()
+        assert len(os.listdir(journal_dir)) == 1
+
+        monkeypatch.undo()
+        recovered = TodoWriteQueue(make_session, journal_dir=journal_dir)
+        await recovered.start()
+        async with make_session() as session:
+            replayed = await SQLAlchemyTodoRepository(session).get_todo_by_id(todo.id)
+        assert (replayed.title, replayed.completed) == ("acknowledged", True)
+        await recovered.close()
+        assert os.listdir(journal_dir) == []
+
+    run_with_queue(tmp_path, scenario)
+
+
+def test_requeued_batch_is_flushed_once_the_database_is_back(tmp_path, monkeypatch):
+    async def scenario(make_session):
+        user_id = uuid.uuid4()
+        queue = TodoWriteQueue(make_session, max_latency=0.01, max_retries=1, max_backoff=0.05)
+        apply_write_batch = SQLAlchemyTodoRepository.apply_write_batch
+        failures = []
+
+        async def flaky(self, creates, updates, deletes):
+            if len(failures) < 2:
+                failures.append(1)
+                raise ConnectionError("database is down")
+            return await apply_write_batch(self, creates, updates, deletes)
+
+        monkeypatch.setattr(SQLAlchemyTodoRepository, "apply_write_batch", flaky)
+        async with make_session() as session:
+            repository = WriteBehindTodoRepository(SQLAlchemyTodoRepository(session), queue)
+            todo = await repository.create_todo(Todo(title="eventually", user_id=user_id))
+            for _ in range(100):
+                if queue.flushes:
+                    break
+                await asyncio.sleep(0.02)
+            assert queue.failed_flushes == 2
+            assert queue.health() == {"status": "ok", "pending": 0, "consecutive_failures": 0, "last_error": None}
+            todos = await repository.get_todos_by_user_id(user_id)
+            assert [saved.id for saved in todos] == [todo.id]
+            await queue.close()
+
+    run_with_queue(tmp_path, scenario)